@@ -1,11 +1,65 @@
 # backend/api/main.py
+import os
+import time
+import asyncio
 from datetime import datetime
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from backend.api.routes import chat
-from src.database.connection import get_db_connection
+from backend.api.services.warmup import WarmUp
+from src.agent.context import context_metrics
+from src.agent.classifier import get_query_classifier
+from src.agent.response_cache import response_cache
+from src.utils.telemetry import REQUEST_LATENCY, configure_tracing, metrics_payload
+from src.database.menu_catalog import get_menu_catalog, start_catalog_refresher, stop_catalog_refresher
+from src.database.menu_sampler import refreshMenuPopularity, start_popularity_refresher, stop_popularity_refresher
+from src.database.ingestion import run_ingestion_once
+from src.database.connection import (
+  get_db_pool,
+  close_db_pool,
+  open_async_db_pool,
+  close_async_db_pool,
+  get_async_db_connection
+)
+
+MENU_INGEST_ON_STARTUP = os.getenv("MENU_INGEST_ON_STARTUP", "true").lower() == "true"
+
+# ================================== WARM UP ===================================
+async def open_db_pools() -> None:
+  await asyncio.to_thread(get_db_pool().open)
+  await open_async_db_pool()
+
+async def load_menu_catalog() -> None:
+  await asyncio.to_thread(get_menu_catalog)
+
+async def refresh_menu_popularity() -> None:
+  await asyncio.to_thread(refreshMenuPopularity)
+
+async def prepare_query_classifier() -> None:
+  await asyncio.to_thread(get_query_classifier)
+
+# The search indexes pull in numpy, they are imported by their warm-up step
+async def prepare_menu_search() -> None:
+  from src.database.menu_search import prepareMenuSearch
+  await asyncio.to_thread(prepareMenuSearch)
+
+async def prepare_menu_embeddings() -> None:
+  from src.database.menu_embeddings import prepareMenuEmbeddings
+  await asyncio.to_thread(prepareMenuEmbeddings)
+
+warm_up = WarmUp()
+warm_up.add_step("database", open_db_pools, required=False)
+if MENU_INGEST_ON_STARTUP:
+  warm_up.add_step("menu_ingestion", run_ingestion_once, required=False)
+warm_up.add_step("menu_catalog", load_menu_catalog, required=False)
+warm_up.add_step("menu_popularity", refresh_menu_popularity, required=False)
+warm_up.add_step("query_classifier", prepare_query_classifier)
+warm_up.add_step("menu_search", prepare_menu_search, required=False)
+warm_up.add_step("menu_embeddings", prepare_menu_embeddings, required=False)
+warm_up.add_step("agent", chat.get_agent)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -13,10 +67,29 @@ async def lifespan(app: FastAPI):
   print("\n" + "="*60)
   print("MT Coffee Shop API Starting...")
   print("="*60)
+  configure_tracing()
+  await chat.session_manager.store.setup()
+  chat.session_manager.start_sweeper()
+  start_catalog_refresher()
+  start_popularity_refresher()
+  # Serve /health at once, the rest is prepared in the background (/ready)
+  warm_up.start()
   yield
   print("\n" + "="*60)
   print("MT Coffee Shop API Shutting down...")
   print("="*60)
+  await warm_up.stop()
+  await chat.session_manager.stop_sweeper()
+  await stop_catalog_refresher()
+  await stop_popularity_refresher()
+  await asyncio.gather(*chat.background_tasks, return_exceptions=True)
+  if chat.agent is not None:
+    from src.agent.checkpoint import close_checkpointer
+    from src.agent.tool_executor import shutdown_tool_executor
+    await close_checkpointer(chat.agent.checkpointer)
+    shutdown_tool_executor()
+  close_db_pool()
+  await close_async_db_pool()
 
 # Create FastAPI app
 app = FastAPI(
@@ -35,6 +108,23 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+  """Latency histogram per route template (streamed bodies: see chat turns)"""
+  start = time.perf_counter()
+  status_code = 500
+  try:
+    response = await call_next(request)
+    status_code = response.status_code
+    return response
+  finally:
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+      method=request.method,
+      route=getattr(route, "path", "unmatched"),
+      status=str(status_code)
+    ).observe(time.perf_counter() - start)
+
 # Include routers
 app.include_router(chat.router)
   
@@ -52,9 +142,8 @@ async def health_check():
   """Health check endpoint"""
   db_status = "operational"
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute("SELECT 1")
+    async with get_async_db_connection() as conn:
+      await conn.execute("SELECT 1")
   except Exception:
     db_status = "down"
     
@@ -63,7 +152,32 @@ async def health_check():
     "timestamp": datetime.now().isoformat(),
     "service": {
       "api": "operational",
-      "agent": "operational",
+      "agent": "operational" if chat.agent is not None else "starting",
       "database": db_status
     }
-  }
\ No newline at end of file
+  }
+  
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+  """
+  Readiness endpoint: 503 until the start-up warm-up has built the agent.
+  /health only tells the process is alive.
+  """
+  snapshot = warm_up.snapshot()
+  return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+  
+@app.get("/metrics", tags=["Health"])
+async def prometheus_metrics():
+  """Prometheus latency histograms per route, tool, DB query and LLM backend"""
+  body, content_type = metrics_payload()
+  return Response(content=body, media_type=content_type)
+
+@app.get("/metrics/context", tags=["Health"])
+async def context_metrics_summary():
+  """Prompt tokens saved by history compaction"""
+  return context_metrics.snapshot()
+
+@app.get("/metrics/cache", tags=["Health"])
+async def response_cache_summary():
+  """Hit rate of the menu question response cache"""
+  return response_cache.stats()
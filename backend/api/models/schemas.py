@@ -49,6 +49,10 @@ class ChatHistoryResponse(BaseModel):
   customer_id:  str
   messages:      List[Dict[str, Any]]
   
+class SessionDeleteResponse(BaseModel):
+  """Response when a session is deleted"""
+  message:      str
+  
 class ErrorResponse(BaseModel):
   """Reponse when having an error"""
   error:        str
@@ -1,24 +1,74 @@
 # backend/api/routes/chat.py
+import asyncio
 from datetime import datetime
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
-from src.agent.graph import create_agent
+from src.agent.response_cache import response_cache
+from src.utils.telemetry import chat_turn
 from backend.api.services.session import SessionManager
-from backend.api.services.process_content import normalize_ai_content
+from backend.api.services.process_content import normalize_ai_content, format_sse
 from backend.api.models.schemas import (
   ChatStartRequest,
   ChatStartResponse,
   ChatMessageRequest, 
   ChatMessageResponse,
   ChatHistoryResponse,
-  ErrorResponse
+  SessionDeleteResponse
 )
 
 # Initialize variables
 router = APIRouter(prefix="/chat", tags=["chat"])
 session_manager = SessionManager(ttl_minutes=60) 
-agent = create_agent()
+agent = None
+agent_lock = asyncio.Lock()
+background_tasks = set()
+
+async def get_agent():
+  """
+  Return the agent, building it on first use: the graph, the LLM clients
+  and the checkpointer (which needs the event loop) are not created at
+  import time. The start-up warm-up task usually builds it before the
+  first request.
+  """
+  global agent
+  if agent is None:
+    async with agent_lock:
+      if agent is None:
+        from src.agent.graph import create_agent
+        from src.agent.checkpoint import open_checkpointer
+        agent = create_agent(await open_checkpointer())
+  return agent
+
+async def delete_thread(session_id: str) -> None:
+  await (await get_agent()).checkpointer.adelete_thread(session_id)
+
+def forget_conversation(session_id: str) -> None:
+  """Drop the checkpointed history of an expired or deleted session"""
+  task = asyncio.get_running_loop().create_task(delete_thread(session_id))
+  background_tasks.add(task)
+  task.add_done_callback(background_tasks.discard)
+
+session_manager.add_expiry_listener(forget_conversation)
+
+async def answer_from_cache(cache_key, message: str, config: dict):
+  """
+  Answer a menu question from the response cache without calling the LLM.
+  The turn is still appended to the thread so the history stays complete.
+  """
+  if cache_key is None:
+    return None
+  reply = response_cache.get(cache_key)
+  if reply is None:
+    return None
+
+  await (await get_agent()).aupdate_state(
+    config,
+    {"messages": [HumanMessage(content=message), AIMessage(content=reply)]},
+    as_node="chatbot"
+  )
+  return reply
 
 # ------------------------------------------------------------------------------
 @router.post(
@@ -38,7 +88,7 @@ async def start_chat(request: ChatStartRequest):
   """Endpoint to start a new conversation"""
   try:
     # Create session
-    session_id, customer_id = session_manager.create_session(
+    session_id, customer_id = await session_manager.create_session(
       customer_id=request.customer_id
     )
     
@@ -49,7 +99,9 @@ async def start_chat(request: ChatStartRequest):
       "finished": False
     }
     config = {"configurable": {"thread_id": session_id}}
-    result = agent.invoke(state, config)
+    agent = await get_agent()
+    with chat_turn("start", session_id):
+      result = await agent.ainvoke(state, config)
     
     welcome_msg = result["messages"][-1].content
     
@@ -86,13 +138,13 @@ async def send_messsage(request: ChatMessageRequest):
   """Endpoint to send message to agent"""
   try:
     # Validate session
-    if not session_manager.is_valid_session(request.session_id):
+    if not await session_manager.is_valid_session(request.session_id):
       raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired session"
       )
       
-    customer_id = session_manager.get_customer_id(request.session_id)
+    customer_id = await session_manager.get_customer_id(request.session_id)
     
     # Create state with new message
     state = {
@@ -108,7 +160,22 @@ async def send_messsage(request: ChatMessageRequest):
     print(f"Message: {request.message}")
     print(f"{'='*60}\n")
     
-    result = agent.invoke(state, config)
+    with chat_turn("message", request.session_id):
+      cache_key = response_cache.key_for(request.message)
+      cached_reply = await answer_from_cache(cache_key, request.message, config)
+      if cached_reply is None:
+        agent = await get_agent()
+        result = await agent.ainvoke(state, config)
+        response_cache.remember_turn(cache_key, result["messages"])
+    
+    if cached_reply is not None:
+      print("Response served from cache")
+      return ChatMessageResponse(
+        session_id=request.session_id,
+        message=cached_reply,
+        timestamp=datetime.now(),
+        tool_calls=None
+      )
     
     # Get last response
     last_message = result["messages"][-1]
@@ -148,6 +215,92 @@ async def send_messsage(request: ChatMessageRequest):
       detail=f"Failed to process message: {str(e)}"
     )
 
+# ------------------------------------------------------------------------------
+@router.post(
+  "/message/stream",
+  summary="Send message to agent and stream the response",
+  description="""
+  Same as `/chat/message` but the answer is streamed as server-sent events
+  while the agent runs:
+  
+  - `token`: a piece of the assistant text (`{"text": ...}`)
+  - `tool_start` / `tool_end`: a tool call began / finished
+  - `final`: the complete assistant message (`{"message": ...}`)
+  - `error`: the turn failed (`{"detail": ...}`)
+  """
+)
+async def stream_message(request: ChatMessageRequest):
+  """Endpoint to send message to agent and stream tokens back"""
+  if not await session_manager.is_valid_session(request.session_id):
+    raise HTTPException(
+      status_code=status.HTTP_401_UNAUTHORIZED,
+      detail="Invalid or expired session"
+    )
+    
+  customer_id = await session_manager.get_customer_id(request.session_id)
+  state = {
+    "messages": [HumanMessage(content=request.message)],
+    "customer_id": customer_id,
+    "finished": False
+  }
+  config = {"configurable": {"thread_id": request.session_id}}
+  
+  async def event_stream():
+    with chat_turn("stream", request.session_id):
+      try:
+        cache_key = response_cache.key_for(request.message)
+        cached_reply = await answer_from_cache(cache_key, request.message, config)
+        if cached_reply is not None:
+          yield format_sse("token", {"text": cached_reply})
+          yield format_sse("final", {
+            "session_id": request.session_id,
+            "message": cached_reply,
+            "timestamp": datetime.now().isoformat()
+          })
+          return
+      
+        agent = await get_agent()
+        async for event in agent.astream_events(state, config, version="v2"):
+          kind = event["event"]
+        
+          if kind == "on_chat_model_stream":
+            text = normalize_ai_content(event["data"]["chunk"].content)
+            if text:
+              yield format_sse("token", {"text": text})
+            
+          elif kind == "on_tool_start":
+            yield format_sse("tool_start", {
+              "name": event["name"],
+              "args": event["data"].get("input")
+            })
+          
+          elif kind == "on_tool_end":
+            output = event["data"].get("output")
+            yield format_sse("tool_end", {
+              "name": event["name"],
+              "output": normalize_ai_content(getattr(output, "content", output))
+            })
+      
+        # Final answer from the checkpointed thread
+        final_state = await agent.aget_state(config)
+        last_message = final_state.values["messages"][-1]
+        response_cache.remember_turn(cache_key, final_state.values["messages"])
+        yield format_sse("final", {
+          "session_id": request.session_id,
+          "message": normalize_ai_content(last_message.content),
+          "timestamp": datetime.now().isoformat()
+        })
+      
+      except Exception as e:
+        print(f"Error in stream_message: {e}")
+        yield format_sse("error", {"detail": f"Failed to process message: {str(e)}"})
+  
+  return StreamingResponse(
+    event_stream(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
+
 # ------------------------------------------------------------------------------
 @router.get(
   "/history/{session_id}",
@@ -159,17 +312,18 @@ async def get_history(session_id: str):
   """Endpoint to get chat history"""
   try:
     # Validate session
-    if not session_manager.is_valid_session(session_id):
+    if not await session_manager.is_valid_session(session_id):
       raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired session"
       )
       
-    customer_id = session_manager.get_customer_id(session_id)
+    customer_id = await session_manager.get_customer_id(session_id)
     
     # Get state from checkpointer
     config = {"configurable": {"thread_id": session_id}}
-    state = agent.get_state(config)  
+    agent = await get_agent()
+    state = await agent.aget_state(config)  
     
     # Format message
     messages = []
@@ -198,15 +352,14 @@ async def get_history(session_id: str):
 # ------------------------------------------------------------------------------
 @router.delete(
   "/session/{session_id}",
-  response_model=ErrorResponse,
+  response_model=SessionDeleteResponse,
   summary="Clear expired session",
   description="Clear all expired session and conversation history"
 )
 async def clear_session(session_id: str):
   """Endpoint to delete session"""
   try:
-    if session_id in session_manager.sessions:
-      del session_manager.sessions[session_id]
+    if await session_manager.delete_session(session_id):
       return {"message": f"Session {session_id} deleted"}
     else:
       raise HTTPException(
@@ -1,4 +1,6 @@
 # backend/api/services/process_content.py
+import json
+
 def normalize_ai_content(content) -> str:
   if isinstance(content, str):
     return content
@@ -11,3 +13,9 @@ def normalize_ai_content(content) -> str:
     )
 
   return str(content)
+
+# ------------------------------------------------------------------------------
+def format_sse(event: str, data) -> str:
+  """Encode one server-sent event frame with a JSON payload"""
+  payload = json.dumps(data, ensure_ascii=False, default=str)
+  return f"event: {event}\ndata: {payload}\n\n"
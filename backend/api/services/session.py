@@ -1,76 +1,345 @@
 # backend/api/services/session.py
+import os
 import uuid
-from typing import Dict, Optional
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 
+from src.database.connection import get_async_db_connection, async_advisory_lock
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_SHARDS = int(os.getenv("SESSION_SHARDS", "16"))
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "30"))
+
+# ================================ SESSION STORES ==============================
+class SessionStore(ABC):
+  """
+  Storage backend of SessionManager. A session is a dict with `customer_id`,
+  `created_at` and `last_activity`. Implementations must be safe to share
+  between concurrent requests; shared stores make sessions visible to every
+  uvicorn worker.
+  """
+  @abstractmethod
+  async def create(self, session_id: str, session: Dict) -> None: ...
+
+  @abstractmethod
+  async def touch(self, session_id: str, now: datetime) -> Optional[Dict]:
+    """Refresh last_activity and return the session, None if unknown"""
+
+  @abstractmethod
+  async def get(self, session_id: str) -> Optional[Dict]: ...
+
+  @abstractmethod
+  async def delete(self, session_id: str) -> bool: ...
+
+  @abstractmethod
+  async def pop_expired(self, cutoff: datetime, limit: int = 1000) -> List[str]:
+    """Remove and return sessions whose last_activity is older than cutoff"""
+
+  @abstractmethod
+  async def count(self) -> int: ...
+
+  async def setup(self) -> None:
+    """Prepare the backing storage (create tables, ...)"""
+
+  async def close(self) -> None:
+    pass
+
+# ------------------------------------------------------------------------------
+class InMemorySessionStore(SessionStore):
+  """
+  Process-local store split into shards, each with its own lock.
+
+  Every shard keeps its sessions in an OrderedDict ordered by last_activity
+  (a touched session moves to the end), so expired sessions are always at
+  the front: sweeping costs O(expired), not O(sessions).
+  """
+  def __init__(self, shards: int = 16):
+    self.shards = [OrderedDict() for _ in range(shards)]
+    self.locks = [threading.Lock() for _ in range(shards)]
+
+  def _shard(self, session_id: str) -> int:
+    return hash(session_id) % len(self.shards)
+
+  # ----------------------------------------------------------------------------
+  async def create(self, session_id: str, session: Dict) -> None:
+    index = self._shard(session_id)
+    with self.locks[index]:
+      self.shards[index][session_id] = session
+
+  async def touch(self, session_id: str, now: datetime) -> Optional[Dict]:
+    index = self._shard(session_id)
+    with self.locks[index]:
+      session = self.shards[index].get(session_id)
+      if session is None:
+        return None
+      session["last_activity"] = now
+      self.shards[index].move_to_end(session_id)
+      return dict(session)
+
+  async def get(self, session_id: str) -> Optional[Dict]:
+    index = self._shard(session_id)
+    with self.locks[index]:
+      session = self.shards[index].get(session_id)
+      return dict(session) if session is not None else None
+
+  async def delete(self, session_id: str) -> bool:
+    index = self._shard(session_id)
+    with self.locks[index]:
+      return self.shards[index].pop(session_id, None) is not None
+
+  # ----------------------------------------------------------------------------
+  async def pop_expired(self, cutoff: datetime, limit: int = 1000) -> List[str]:
+    expired = []
+    for shard, lock in zip(self.shards, self.locks):
+      with lock:
+        while shard and len(expired) < limit:
+          session_id, session = next(iter(shard.items()))
+          if session["last_activity"] >= cutoff:
+            break
+          shard.popitem(last=False)
+          expired.append(session_id)
+    return expired
+
+  async def count(self) -> int:
+    return sum(len(shard) for shard in self.shards)
+
+# ------------------------------------------------------------------------------
+class PostgresSessionStore(SessionStore):
+  """
+  Store shared by every API worker, kept in the `chat_sessions` table.
+
+  Any worker can serve any request of any session, so no sticky routing is
+  needed. Expired rows are claimed with FOR UPDATE SKIP LOCKED, so each
+  expired session is reported by exactly one worker's sweeper.
+  """
+  async def setup(self) -> None:
+    # Workers start together, serialize the DDL
+    async with async_advisory_lock("chat_sessions_setup"), get_async_db_connection() as conn:
+      await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+          session_id      VARCHAR(64) PRIMARY KEY,
+          customer_id     VARCHAR(255) NOT NULL,
+          created_at      TIMESTAMP NOT NULL DEFAULT NOW(),
+          last_activity   TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """
+      )
+      await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS chat_sessions_last_activity_idx
+        ON chat_sessions (last_activity)
+        """
+      )
+
+  # ----------------------------------------------------------------------------
+  async def create(self, session_id: str, session: Dict) -> None:
+    async with get_async_db_connection() as conn:
+      await conn.execute(
+        """
+        INSERT INTO chat_sessions (session_id, customer_id, created_at, last_activity)
+        VALUES (%s, %s, %s, %s)
+        """,
+        (session_id, session["customer_id"], session["created_at"], session["last_activity"])
+      )
+
+  async def touch(self, session_id: str, now: datetime) -> Optional[Dict]:
+    async with get_async_db_connection() as conn:
+      cur = await conn.execute(
+        """
+        UPDATE chat_sessions SET last_activity = %s
+        WHERE session_id = %s
+        RETURNING customer_id, created_at, last_activity
+        """, (now, session_id)
+      )
+      row = await cur.fetchone()
+    return self._as_session(row)
+
+  async def get(self, session_id: str) -> Optional[Dict]:
+    async with get_async_db_connection() as conn:
+      cur = await conn.execute(
+        """
+        SELECT customer_id, created_at, last_activity
+        FROM chat_sessions
+        WHERE session_id = %s
+        """, (session_id,)
+      )
+      row = await cur.fetchone()
+    return self._as_session(row)
+
+  async def delete(self, session_id: str) -> bool:
+    async with get_async_db_connection() as conn:
+      cur = await conn.execute(
+        "DELETE FROM chat_sessions WHERE session_id = %s", (session_id,)
+      )
+      return cur.rowcount > 0
+
+  # ----------------------------------------------------------------------------
+  async def pop_expired(self, cutoff: datetime, limit: int = 1000) -> List[str]:
+    async with get_async_db_connection() as conn:
+      cur = await conn.execute(
+        """
+        DELETE FROM chat_sessions
+        WHERE session_id IN (
+          SELECT session_id FROM chat_sessions
+          WHERE last_activity < %s
+          ORDER BY last_activity
+          LIMIT %s
+          FOR UPDATE SKIP LOCKED
+        )
+        RETURNING session_id
+        """, (cutoff, limit)
+      )
+      return [row[0] for row in await cur.fetchall()]
+
+  async def count(self) -> int:
+    async with get_async_db_connection() as conn:
+      cur = await conn.execute("SELECT COUNT(*) FROM chat_sessions")
+      return (await cur.fetchone())[0]
+
+  # ----------------------------------------------------------------------------
+  @staticmethod
+  def _as_session(row) -> Optional[Dict]:
+    if row is None:
+      return None
+    return {"customer_id": row[0], "created_at": row[1], "last_activity": row[2]}
+
+# ------------------------------------------------------------------------------
+def create_session_store(backend: Optional[str] = None) -> SessionStore:
+  """Build the store selected by SESSION_BACKEND"""
+  backend = (backend or SESSION_BACKEND).lower()
+  if backend == "memory":
+    return InMemorySessionStore(shards=SESSION_SHARDS)
+  if backend == "postgres":
+    return PostgresSessionStore()
+  raise ValueError(f"Invalid session backend: {backend}")
+
+# =============================== SESSION MANAGER ==============================
 class SessionManager:
   """
-  Manage sessions for all conversations
-  Purpose in there is for demo so just using in-memory dict 
+  Manage sessions for all conversations.
+  Sessions live in a pluggable SessionStore and a background sweeper
+  (started from the FastAPI lifespan) removes expired ones.
   """
-  def __init__(self, ttl_minutes: int = 60):
-    self.sessions: Dict[str, Dict] = {}
+  def __init__(self, ttl_minutes: int = 60, store: Optional[SessionStore] = None):
+    self.store = store or create_session_store()
     self.ttl = timedelta(minutes=ttl_minutes)
-    
-  # ----------------------------------------------------------------------------  
-  def create_session(self, customer_id: Optional[str]) -> tuple[str, str]:
+    self.expiry_listeners: List[Callable[[str], None]] = []
+    self.sweeper: Optional[asyncio.Task] = None
+
+  # ----------------------------------------------------------------------------
+  def add_expiry_listener(self, callback: Callable[[str], None]) -> None:
+    """
+    Register a callback run with the session_id whenever a session expires
+    or is deleted, e.g. to drop the conversation's checkpoints.
     """
-    Create a new session 
-    
+    self.expiry_listeners.append(callback)
+
+  # ----------------------------------------------------------------------------
+  def _notify_expired(self, session_id: str) -> None:
+    for callback in self.expiry_listeners:
+      try:
+        callback(session_id)
+      except Exception as e:
+        print(f"Expiry listener failed for session {session_id}: {e}")
+
+  # ----------------------------------------------------------------------------
+  async def create_session(self, customer_id: Optional[str]) -> tuple[str, str]:
+    """
+    Create a new session
+
     Returns:
       (session_id, customer_id)
     """
     session_id = str(uuid.uuid4())
-    
+
     # Create new customer_id if not exist
     if not customer_id:
       customer_id = f"CUST_{str(uuid.uuid4().hex[:8].upper())}"
-      
-    self.sessions[session_id] = {
+
+    now = datetime.now()
+    await self.store.create(session_id, {
       "customer_id": customer_id,
-      "created_at": datetime.now(),
-      "last_activity": datetime.now()
-    }
-    
+      "created_at": now,
+      "last_activity": now
+    })
+
     print(f"Created a new session: {session_id} for customer: {customer_id}")
     return session_id, customer_id
-  
+
   # ----------------------------------------------------------------------------
-  def get_customer_id(self, session_id: str) -> Optional[str]:
+  async def get_customer_id(self, session_id: str) -> Optional[str]:
     """Get customer_id from session_id"""
-    session = self.sessions.get(session_id)
+    session = await self.store.touch(session_id, datetime.now())
     if not session:
       return None
-    
-    session["last_activity"] = datetime.now()
     return session["customer_id"]
-  
+
   # ----------------------------------------------------------------------------
-  def is_valid_session(self, session_id: str) -> bool:
+  async def is_valid_session(self, session_id: str) -> bool:
     """Check the session_id is valid or not"""
-    session = self.sessions.get(session_id)
+    session = await self.store.get(session_id)
     if not session:
       return False
-    
-    # Check TTL (Time to live)
+
+    # Check TTL (Time to live), the sweeper may not have run yet
     elapsed = datetime.now() - session["last_activity"]
     if elapsed > self.ttl:
       print(f"Session {session_id} expired")
-      del self.sessions[session_id]
+      if await self.store.delete(session_id):
+        self._notify_expired(session_id)
       return False
-    
+
     return True
-  
+
   # ----------------------------------------------------------------------------
-  def cleanup_expired(self):
-    """Cleanup the expired sessions"""
-    now = datetime.now()
-    expired = [
-      sid for sid, session in self.sessions.items()
-      if now - session["last_activity"] > self.ttl
-    ]
-    
-    for sid in expired:
-      del self.sessions[sid]
-    if expired:
-      print(f"Clean up {len(expired)} expired sessions")
\ No newline at end of file
+  async def delete_session(self, session_id: str) -> bool:
+    """Delete a session, returns False if it does not exist"""
+    if not await self.store.delete(session_id):
+      return False
+
+    self._notify_expired(session_id)
+    return True
+
+  # ----------------------------------------------------------------------------
+  async def cleanup_expired(self) -> int:
+    """Cleanup the expired sessions, returns how many were removed"""
+    cutoff = datetime.now() - self.ttl
+    removed = 0
+    while True:
+      expired = await self.store.pop_expired(cutoff)
+      for sid in expired:
+        self._notify_expired(sid)
+      removed += len(expired)
+      if not expired:
+        break
+
+    if removed:
+      print(f"Clean up {removed} expired sessions")
+    return removed
+
+  # ============================== BACKGROUND SWEEPER ==========================
+  def start_sweeper(self, interval_seconds: float = SESSION_SWEEP_SECONDS) -> None:
+    """Run cleanup_expired every `interval_seconds` on the running event loop"""
+    async def sweep():
+      while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+          await self.cleanup_expired()
+        except Exception as e:
+          print(f"Session sweeper failed, reason: {e}")
+
+    if self.sweeper is None or self.sweeper.done():
+      self.sweeper = asyncio.get_running_loop().create_task(sweep())
+
+  # ----------------------------------------------------------------------------
+  async def stop_sweeper(self) -> None:
+    if self.sweeper is not None:
+      self.sweeper.cancel()
+      await asyncio.gather(self.sweeper, return_exceptions=True)
+      self.sweeper = None
+    await self.store.close()
@@ -0,0 +1,79 @@
+# backend/api/services/warmup.py
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# ================================== WARM UP ===================================
+class WarmUp:
+  """
+  Start-up work run in the background once the server is accepting
+  connections, so /health answers right away while the slow parts (menu
+  ingestion, catalog load, agent and LLM clients) are prepared.
+
+  Steps run in order. A failed optional step is logged and skipped (the
+  component is then loaded lazily on first use); the server is ready when
+  every required step has succeeded.
+  """
+  def __init__(self):
+    self.steps: List[tuple] = []
+    self.status: Dict[str, Dict] = {}
+    self.started_at = time.monotonic()
+    self.task: Optional[asyncio.Task] = None
+
+  # ----------------------------------------------------------------------------
+  def add_step(
+    self,
+    name: str,
+    step: Callable[[], Awaitable],
+    required: bool = True
+  ) -> None:
+    """
+    Args:
+      name(str): Step name reported by /ready.
+      step(Callable): Coroutine function doing the work.
+      required(bool): Whether the server is not ready without it.
+    """
+    self.steps.append((name, step, required))
+    self.status[name] = {"state": "pending", "required": required}
+
+  # ----------------------------------------------------------------------------
+  async def run(self) -> None:
+    for name, step, required in self.steps:
+      self.status[name]["state"] = "running"
+      start = time.perf_counter()
+      try:
+        await step()
+        self.status[name]["state"] = "done"
+      except Exception as e:
+        print(f"Warm up step {name} failed, reason: {e}")
+        self.status[name].update(state="failed", error=str(e))
+      self.status[name]["seconds"] = round(time.perf_counter() - start, 3)
+
+    if self.ready:
+      print(f"API ready in {time.monotonic() - self.started_at:.2f}s")
+
+  # ----------------------------------------------------------------------------
+  def start(self) -> None:
+    """Run the steps on the running event loop without blocking start-up"""
+    self.started_at = time.monotonic()
+    self.task = asyncio.get_running_loop().create_task(self.run())
+
+  async def stop(self) -> None:
+    if self.task is not None and not self.task.done():
+      self.task.cancel()
+    await asyncio.gather(*([self.task] if self.task else []), return_exceptions=True)
+
+  # ----------------------------------------------------------------------------
+  @property
+  def ready(self) -> bool:
+    return all(
+      status["state"] == "done"
+      for status in self.status.values() if status["required"]
+    )
+
+  def snapshot(self) -> Dict:
+    return {
+      "ready": self.ready,
+      "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+      "steps": self.status
+    }
@@ -1,23 +1,53 @@
+import os
+import tempfile
 import uvicorn
 from datetime import datetime
-from src.database.ingestion import run_ingestion
+
+# dev: one process with auto-reload, prod: API_WORKERS processes, no reloader
+API_MODE = os.getenv("API_MODE", "dev")
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+
+def configure_shared_state(workers: int) -> None:
+  """
+  Workers do not share memory, so sessions and conversation checkpoints
+  must live in Postgres for any worker to serve any request (no sticky
+  routing needed). Default both stores to Postgres and refuse
+  process-local ones. Prometheus samples of all workers are merged through
+  a shared PROMETHEUS_MULTIPROC_DIR.
+  """
+  if workers <= 1:
+    return
+
+  # Each worker writes its Prometheus samples here, /metrics merges them
+  os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="mt_coffee_metrics_"))
+  os.environ.setdefault("SESSION_BACKEND", "postgres")
+  os.environ.setdefault("CHECKPOINT_BACKEND", "postgres")
+  for name in ("SESSION_BACKEND", "CHECKPOINT_BACKEND"):
+    if os.environ[name].lower() != "postgres":
+      raise SystemExit(
+        f"{name}={os.environ[name]} is process-local, use postgres with {workers} workers"
+      )
 
 if __name__ == "__main__":
-  print("Checking and ingesting data...")
-  try:
-    run_ingestion()
-  except Exception as e:
-    print(f"Ingestion failed, but starting server anyway: {e}")
-  
+  # Menu ingestion runs in the API warm-up (see MENU_INGEST_ON_STARTUP), the
+  # server starts listening without waiting for it
+  production = API_MODE == "prod"
+  workers = max(1, API_WORKERS) if production else 1
+  configure_shared_state(workers)
+
   print("\n" + "="*60)
   print(f"Starting MT Coffee Shop API Server")
   print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+  print(f"Mode: {API_MODE}, workers: {workers}")
   print("="*60 + "\n")
-  
+
   uvicorn.run(
-    "api.main:app",
-    host="0.0.0.0",
-    port=8000,
-    reload=True,
+    "backend.api.main:app",
+    host=API_HOST,
+    port=API_PORT,
+    reload=not production,
+    workers=workers,
     log_level="info"
-  )
\ No newline at end of file
+  )
@@ -0,0 +1,81 @@
+# benchmarks/compare.py
+"""
+Compare two load test results (benchmarks/load_test.py) and flag
+regressions: a latency percentile or per-turn cost that grew, or a
+throughput that dropped, by more than --threshold percent.
+
+Exits with status 1 when a regression is found, so it can gate CI.
+
+Usage:
+  python -m benchmarks.compare base.json new.json --threshold 10
+"""
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+def change(base: Optional[float], new: Optional[float]) -> Optional[float]:
+  """Relative change in percent, None when not comparable"""
+  if base is None or new is None or base == 0:
+    return None
+  return (new - base) / base * 100
+
+# ------------------------------------------------------------------------------
+def compare(base: dict, new: dict, threshold: float) -> List[str]:
+  """Print the comparison table and return the regressions found"""
+  rows = []
+  for key in ("requests_per_second", "turns_per_second"):
+    rows.append((f"throughput.{key}", base["throughput"].get(key), new["throughput"].get(key), False))
+  for endpoint in sorted(set(base["endpoints"]) | set(new["endpoints"])):
+    for key in ("p50_ms", "p95_ms", "p99_ms", "errors"):
+      rows.append((
+        f"{endpoint}.{key}",
+        base["endpoints"].get(endpoint, {}).get(key),
+        new["endpoints"].get(endpoint, {}).get(key),
+        True
+      ))
+  for key in new.get("per_turn", {}):
+    rows.append((f"per_turn.{key}", base.get("per_turn", {}).get(key), new["per_turn"][key], True))
+  rows.append(("memory.rss_growth_mb", base["memory"]["rss_growth_mb"], new["memory"]["rss_growth_mb"], True))
+
+  print(f"base {base['commit']} ({base['timestamp']})  vs  new {new['commit']} ({new['timestamp']})")
+  if base["params"] != new["params"]:
+    print(f"warning: different parameters {base['params']} vs {new['params']}")
+  print(f"{'metric':<36}{'base':>12}{'new':>12}{'change':>10}")
+
+  regressions = []
+  for name, base_value, new_value, lower_is_better in rows:
+    delta = change(base_value, new_value)
+    worse = delta is not None and (delta > threshold if lower_is_better else delta < -threshold)
+    # Errors usually start from zero, any increase counts
+    if name.endswith(".errors") and (new_value or 0) > (base_value or 0):
+      worse = True
+    flag = "  <-- regression" if worse else ""
+    print(
+      f"{name:<36}{'-' if base_value is None else base_value:>12}"
+      f"{'-' if new_value is None else new_value:>12}"
+      f"{'' if delta is None else f'{delta:+.1f}%':>10}{flag}"
+    )
+    if worse:
+      regressions.append(name)
+  return regressions
+
+# ------------------------------------------------------------------------------
+def main(args) -> None:
+  with open(args.base, encoding="utf-8") as f:
+    base = json.load(f)
+  with open(args.new, encoding="utf-8") as f:
+    new = json.load(f)
+
+  regressions = compare(base, new, args.threshold)
+  if regressions:
+    print(f"\n{len(regressions)} regression(s) over {args.threshold}%: {', '.join(regressions)}")
+    sys.exit(1)
+  print(f"\nNo regression over {args.threshold}%")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+  parser.add_argument("base", help="baseline result JSON")
+  parser.add_argument("new", help="result JSON to check")
+  parser.add_argument("--threshold", type=float, default=10, help="tolerated change in percent")
+  main(parser.parse_args())
@@ -0,0 +1,72 @@
+# benchmarks/ephemeral_db.py
+"""
+Throwaway Postgres database for benchmarks, created with the app schema and
+dropped afterwards.
+
+- With an admin URL (BENCH_ADMIN_DATABASE_URL): a fresh `bench_<id>`
+  database on that server.
+- Without: a private server started by `pgserver` (pip install pgserver)
+  in a temporary directory.
+"""
+import os
+import uuid
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+
+INIT_SQL_PATH = Path(__file__).resolve().parent.parent / "src" / "scripts" / "init_db.sql"
+
+def apply_schema(dsn: str) -> None:
+  """Create the app tables like the Postgres container's init script"""
+  with psycopg.connect(dsn, autocommit=True) as conn:
+    conn.execute(INIT_SQL_PATH.read_text(encoding="utf-8"))
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def ephemeral_database(admin_url: Optional[str] = None) -> Iterator[str]:
+  """
+  Args:
+    admin_url(str): Server to create the database on, defaults to
+                    BENCH_ADMIN_DATABASE_URL; a private pgserver if unset.
+
+  Yields:
+    str: Connection string of the new database, schema applied.
+  """
+  admin_url = admin_url or os.getenv("BENCH_ADMIN_DATABASE_URL")
+  if admin_url:
+    with fresh_database(admin_url) as dsn:
+      yield dsn
+    return
+
+  try:
+    import pgserver
+  except ImportError:
+    raise SystemExit("Set BENCH_ADMIN_DATABASE_URL or pip install pgserver")
+
+  with tempfile.TemporaryDirectory(prefix="mt_coffee_bench_pg_") as pgdata:
+    server = pgserver.get_server(pgdata, cleanup_mode="delete")
+    try:
+      with fresh_database(server.get_uri()) as dsn:
+        yield dsn
+    finally:
+      server.cleanup()
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def fresh_database(admin_url: str) -> Iterator[str]:
+  """Create `bench_<id>` on the server of `admin_url`, drop it on exit"""
+  name = f"bench_{uuid.uuid4().hex[:12]}"
+  # UTF8 like the Postgres image, whatever the server's default encoding
+  with psycopg.connect(admin_url, autocommit=True) as conn:
+    conn.execute(f"CREATE DATABASE \"{name}\" ENCODING 'UTF8' TEMPLATE template0")
+  try:
+    dsn = make_conninfo(admin_url, dbname=name)
+    apply_schema(dsn)
+    yield dsn
+  finally:
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+      conn.execute(f"DROP DATABASE IF EXISTS \"{name}\" WITH (FORCE)")
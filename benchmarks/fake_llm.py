@@ -0,0 +1,101 @@
+# benchmarks/fake_llm.py
+"""
+Deterministic chat model standing in for the LLM router in benchmarks.
+
+It answers from fixed rules on the last message, sleeps like a remote model
+and reports token usage, so runs are repeatable and measure the app rather
+than a provider.
+"""
+import re
+import time
+import asyncio
+import itertools
+from typing import Dict, List
+
+from pydantic import Field, PrivateAttr
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from src.utils.helpers import normalize_text
+
+CUSTOMER_ID_PATTERN = re.compile(r"customer ID is (\S+?)\.")
+CONFIRM_PATTERN = re.compile(r"\b(chot|xac nhan|dat luon)\b")
+MENU_PATTERN = re.compile(r"\b(menu|mon|gia|co gi|goi y|loai)\b")
+
+# ================================ FAKE MODEL ==================================
+class ScriptedChatModel(BaseChatModel):
+  """
+  Rules, checked on the last message:
+  - a tool result: a short reply quoting it
+  - a confirmation ("chốt", "xác nhận"): place_order with `order_items`
+  - a menu question: hand_customer_query with the message
+  - anything else: a plain text reply
+  """
+  latency: float = 0.0
+  order_items: List[Dict] = Field(default_factory=list)
+  _counter: itertools.count = PrivateAttr(default_factory=itertools.count)
+  _calls: int = PrivateAttr(default=0)
+
+  @property
+  def _llm_type(self) -> str:
+    return "scripted_fake"
+
+  @property
+  def calls(self) -> int:
+    return self._calls
+
+  def bind_tools(self, tools, **kwargs) -> "ScriptedChatModel":
+    return self
+
+  # ----------------------------------------------------------------------------
+  def reply(self, messages) -> AIMessage:
+    self._calls += 1
+    call_id = f"call_{next(self._counter)}"
+    last = messages[-1]
+    prompt_chars = sum(len(str(m.content)) for m in messages)
+    usage = {"input_tokens": prompt_chars // 4, "output_tokens": 24, "total_tokens": prompt_chars // 4 + 24}
+
+    if isinstance(last, ToolMessage):
+      return AIMessage(content=f"Dạ, {str(last.content)[:80]}", usage_metadata=usage)
+
+    text = last.content if isinstance(last, HumanMessage) and isinstance(last.content, str) else ""
+    text_norm = normalize_text(text)
+    if CONFIRM_PATTERN.search(text_norm) and self.order_items:
+      customer_id = "UNKNOWN"
+      for message in messages:
+        match = isinstance(message, SystemMessage) and CUSTOMER_ID_PATTERN.search(message.content)
+        if match:
+          customer_id = match.group(1)
+      return AIMessage(
+        content="",
+        tool_calls=[{
+          "name": "place_order",
+          "args": {"customer_id": customer_id, "items": self.order_items},
+          "id": call_id
+        }],
+        usage_metadata=usage
+      )
+
+    if MENU_PATTERN.search(text_norm):
+      return AIMessage(
+        content="",
+        tool_calls=[{"name": "hand_customer_query", "args": {"query": text}, "id": call_id}],
+        usage_metadata=usage
+      )
+
+    return AIMessage(
+      content="Dạ vâng, bạn xác nhận giúp mình để quán lên đơn nhé!",
+      usage_metadata=usage
+    )
+
+  # ----------------------------------------------------------------------------
+  def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    if self.latency:
+      time.sleep(self.latency)
+    return ChatResult(generations=[ChatGeneration(message=self.reply(messages))])
+
+  async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    if self.latency:
+      await asyncio.sleep(self.latency)
+    return ChatResult(generations=[ChatGeneration(message=self.reply(messages))])
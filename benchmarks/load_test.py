@@ -0,0 +1,267 @@
+# benchmarks/load_test.py
+"""
+Load test of the chat API: every virtual customer starts a chat, runs a
+scripted Vietnamese ordering conversation through /chat/message and reads
+/chat/history, with `--concurrency` customers in flight.
+
+The app runs in-process behind httpx's ASGI transport with a deterministic
+fake LLM (benchmarks/fake_llm.py, behind the real LLM router) and an
+ephemeral Postgres database (benchmarks/ephemeral_db.py). Reported:
+throughput, p50/p95/p99 per endpoint, DB helper calls and connection
+checkouts per turn, LLM calls per turn and RSS growth. Results are written
+as JSON; compare two runs with benchmarks/compare.py.
+
+Usage:
+  python -m benchmarks.load_test --sessions 100 --concurrency 20 --llm-latency 50
+  python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+from .ephemeral_db import ephemeral_database
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# A customer browsing, asking a price, ordering and confirming
+CONVERSATION = [
+  "Chào bạn, quán có những loại cà phê nào vậy?",
+  "Bạc Xỉu Foam Dừa giá bao nhiêu?",
+  "Cho mình 2 ly Bạc Xỉu Foam Dừa size L, ít đá nhé",
+  "Ok chốt đơn giúp mình",
+  "Cảm ơn bạn nhiều nha"
+]
+ORDER_ITEMS = [
+  {"item_name": "Bạc Xỉu Foam Dừa", "quantity": 2, "customizations": {"size": "L", "ice": "50%"}}
+]
+
+# ================================== HELPERS ===================================
+def percentile(values: List[float], q: float) -> Optional[float]:
+  """Nearest-rank percentile, q in [0, 1]"""
+  if not values:
+    return None
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+def rss_mb() -> float:
+  """Current resident set size (peak RSS where /proc is unavailable)"""
+  try:
+    with open("/proc/self/statm") as f:
+      return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+  except OSError:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def git_commit() -> str:
+  try:
+    return subprocess.run(
+      ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+  except Exception:
+    return "unknown"
+
+# ------------------------------------------------------------------------------
+def sample_total(sample_name: str, **labels) -> Optional[float]:
+  """Sum of a Prometheus sample of the app's telemetry, None without it"""
+  try:
+    from prometheus_client import REGISTRY
+  except ImportError:
+    return None
+  total = 0.0
+  for family in REGISTRY.collect():
+    for sample in family.samples:
+      if sample.name == sample_name and all(sample.labels.get(k) in v for k, v in labels.items()):
+        total += sample.value
+  return total
+
+def db_counters() -> Dict[str, Optional[float]]:
+  return {
+    "helper_calls": sample_total("mt_db_query_duration_seconds_count"),
+    "connection_checkouts": sample_total("mt_queue_wait_seconds_count", queue=("db_sync", "db_async"))
+  }
+
+# ================================== DRIVER ====================================
+class Recorder:
+  def __init__(self):
+    self.latencies: Dict[str, List[float]] = {}
+    self.errors: Dict[str, int] = {}
+
+  async def call(self, endpoint: str, request):
+    start = time.perf_counter()
+    try:
+      response = await request
+      response.raise_for_status()
+      return response.json()
+    except Exception:
+      self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+      return None
+    finally:
+      self.latencies.setdefault(endpoint, []).append((time.perf_counter() - start) * 1000)
+
+# ------------------------------------------------------------------------------
+async def run_customer(client, recorder: Recorder) -> None:
+  started = await recorder.call("start", client.post("/chat/start", json={}))
+  if started is None:
+    return
+  session_id = started["session_id"]
+  for message in CONVERSATION:
+    await recorder.call(
+      "message", client.post("/chat/message", json={"session_id": session_id, "message": message})
+    )
+  await recorder.call("history", client.get(f"/chat/history/{session_id}"))
+
+# ------------------------------------------------------------------------------
+async def run_load(args) -> dict:
+  import httpx
+  from backend.api.main import app, warm_up
+  from src.database.menu_catalog import get_menu_catalog
+  from src.utils.llm_manager import LLMBackend, LLMRouter, set_shared_llm
+  from .fake_llm import ScriptedChatModel
+
+  fake = ScriptedChatModel(latency=args.llm_latency / 1000, order_items=ORDER_ITEMS)
+  set_shared_llm(LLMRouter(backends=[LLMBackend("fake", lambda api_key=None: fake)]))
+
+  transport = httpx.ASGITransport(app=app)
+  async with app.router.lifespan_context(app), httpx.AsyncClient(
+    transport=transport, base_url="http://bench", timeout=120
+  ) as client:
+    while not warm_up.ready:
+      if warm_up.task is not None and warm_up.task.done():
+        raise SystemExit(f"Warm-up failed: {warm_up.snapshot()}")
+      await asyncio.sleep(0.05)
+    if not get_menu_catalog().items:
+      raise SystemExit(f"The menu is empty, check MENU_CSV_PATH: {os.environ['MENU_CSV_PATH']}")
+
+    # One customer first so lazy paths (catalog, compiled graph) are warm
+    await run_customer(client, Recorder())
+    gc.collect()
+    rss_start = rss_mb()
+    db_before = db_counters()
+    llm_before = fake.calls
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def customer():
+      async with semaphore:
+        await run_customer(client, recorder)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(customer() for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    rss_end = rss_mb()
+    db_after = db_counters()
+    llm_calls = fake.calls - llm_before
+
+  requests = sum(len(v) for v in recorder.latencies.values())
+  turns = len(recorder.latencies.get("message", []))
+  per_turn = lambda before, after: (
+    round((after - before) / turns, 2) if turns and before is not None and after is not None else None
+  )
+  return {
+    "throughput": {
+      "requests_per_second": round(requests / elapsed, 2),
+      "turns_per_second": round(turns / elapsed, 2),
+      "elapsed_seconds": round(elapsed, 3)
+    },
+    "endpoints": {
+      endpoint: {
+        "count": len(values),
+        "errors": recorder.errors.get(endpoint, 0),
+        "p50_ms": round(percentile(values, 0.50), 2),
+        "p95_ms": round(percentile(values, 0.95), 2),
+        "p99_ms": round(percentile(values, 0.99), 2)
+      }
+      for endpoint, values in recorder.latencies.items()
+    },
+    "per_turn": {
+      "db_helper_calls": per_turn(db_before["helper_calls"], db_after["helper_calls"]),
+      "db_connection_checkouts": per_turn(db_before["connection_checkouts"], db_after["connection_checkouts"]),
+      "llm_calls": round(llm_calls / turns, 2) if turns else None
+    },
+    "memory": {
+      "rss_start_mb": round(rss_start, 1),
+      "rss_end_mb": round(rss_end, 1),
+      "rss_growth_mb": round(rss_end - rss_start, 1)
+    }
+  }
+
+# ================================== REPORT ====================================
+def print_report(result: dict) -> None:
+  params = result["params"]
+  print(
+    f"{params['sessions']} customers x {len(CONVERSATION)} turns, concurrency {params['concurrency']}, "
+    f"LLM latency {params['llm_latency_ms']}ms, commit {result['commit']}"
+  )
+  throughput = result["throughput"]
+  print(
+    f"throughput: {throughput['requests_per_second']} req/s, "
+    f"{throughput['turns_per_second']} turns/s in {throughput['elapsed_seconds']}s"
+  )
+  print(f"{'endpoint':<10}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+  for endpoint, stats in result["endpoints"].items():
+    print(
+      f"{endpoint:<10}{stats['count']:>7}{stats['errors']:>8}"
+      f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+    )
+  print(f"per turn: {result['per_turn']}")
+  print(f"memory: {result['memory']}")
+
+# ------------------------------------------------------------------------------
+def main(args) -> None:
+  # The app reads its settings at import: configure before importing it
+  os.environ.setdefault("MENU_CSV_PATH", str(ROOT / "data" / "coffee_house_data.csv"))
+  os.environ["SESSION_BACKEND"] = args.session_backend
+  os.environ["CHECKPOINT_BACKEND"] = args.checkpoint_backend
+  os.environ["TELEMETRY_TURN_LOG"] = "false"
+
+  with ephemeral_database(args.admin_url) as dsn:
+    os.environ["DATABASE_URL"] = dsn
+    # The app logs every message with print(), keep it out of the report
+    with open(os.devnull, "w") as sink, redirect_stdout(sink if args.quiet else sys.stdout):
+      measured = asyncio.run(run_load(args))
+
+  result = {
+    "commit": git_commit(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "params": {
+      "sessions": args.sessions,
+      "concurrency": args.concurrency,
+      "llm_latency_ms": args.llm_latency,
+      "session_backend": args.session_backend,
+      "checkpoint_backend": args.checkpoint_backend
+    },
+    **measured
+  }
+  print_report(result)
+
+  output = Path(args.output) if args.output else RESULTS_DIR / f"load_{result['commit']}_{int(time.time())}.json"
+  output.parent.mkdir(parents=True, exist_ok=True)
+  output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+  print(f"results: {output}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+  parser.add_argument("--sessions", type=int, default=50, help="virtual customers")
+  parser.add_argument("--concurrency", type=int, default=10)
+  parser.add_argument("--llm-latency", type=float, default=50, help="fake LLM latency per call (ms)")
+  parser.add_argument("--session-backend", default="memory", choices=["memory", "postgres"])
+  parser.add_argument("--checkpoint-backend", default="memory", choices=["memory", "sqlite", "postgres"])
+  parser.add_argument("--admin-url", help="server for the throwaway database (else pgserver)")
+  parser.add_argument("--output", help="result JSON path, default benchmarks/results/")
+  parser.add_argument("--verbose", dest="quiet", action="store_false", help="show the app logs")
+  main(parser.parse_args())
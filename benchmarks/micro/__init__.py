@@ -0,0 +1,15 @@
+"""
+Microbenchmarks (pytest-benchmark) of the per-message hot paths: query
+classification, text normalization and menu lookups, on the real mappings
+and on synthetic 1k/10k/100k item menus.
+
+pytest-benchmark is a development dependency, not installed in the images:
+
+  pip install -r requirements-dev.txt
+
+Files are named bench_*.py so the regular test run does not collect them:
+
+  python -m pytest benchmarks/micro/bench_*.py --benchmark-columns=min,median,ops
+  python -m pytest benchmarks/micro/bench_*.py --benchmark-autosave
+  python -m pytest benchmarks/micro/bench_*.py --benchmark-compare
+"""
@@ -0,0 +1,32 @@
+# benchmarks/micro/bench_classifier.py
+"""
+QueryClassifier.classify_query over real customer questions, with the shop's
+mappings and with synthetic multi-brand mappings of growing size.
+"""
+import pytest
+
+from src.utils.settings import mappings
+from src.utils.helpers import QueryClassifier
+from .queries import ALL_QUERIES, CORPUS
+from .conftest import build_classifier
+from .synthetic import synthetic_mappings
+
+@pytest.mark.parametrize("group", list(CORPUS))
+def test_classify_query(benchmark, group):
+  classifier = QueryClassifier(mappings)
+  queries = CORPUS[group]
+  results = benchmark(lambda: [classifier.classify_query(q) for q in queries])
+  benchmark.extra_info["queries_per_round"] = len(queries)
+  benchmark.extra_info["matched"] = sum(r["type"] != "unknown" for r in results)
+
+# ------------------------------------------------------------------------------
+def test_classify_query_scaling(benchmark, menu_size):
+  classifier = build_classifier(menu_size)
+  results = benchmark(lambda: [classifier.classify_query(q) for q in ALL_QUERIES])
+  benchmark.extra_info["queries_per_round"] = len(ALL_QUERIES)
+  benchmark.extra_info["matched"] = sum(r["type"] != "unknown" for r in results)
+
+def test_build_classifier(benchmark, menu_size):
+  menu = synthetic_mappings(menu_size)
+  classifier = benchmark.pedantic(QueryClassifier, args=(menu,), rounds=3, iterations=1)
+  assert len(classifier.items) == menu_size
@@ -0,0 +1,39 @@
+# benchmarks/micro/bench_menu_embeddings.py
+"""
+Hashed TF-IDF recommendations: one query at a time versus the whole corpus
+as a batch, plus the cost of building the sparse vectors.
+"""
+import functools
+
+import pytest
+
+from src.database.menu_embeddings import MenuEmbeddingIndex
+from .queries import ALL_QUERIES
+from .synthetic import synthetic_items
+
+EMBEDDING_SIZES = [1_000, 10_000, 100_000]
+
+@functools.lru_cache(maxsize=None)
+def build_index(size: int) -> MenuEmbeddingIndex:
+  return MenuEmbeddingIndex.build(synthetic_items(size), f"synthetic:{size}")
+
+# ------------------------------------------------------------------------------
+@pytest.mark.parametrize("size", EMBEDDING_SIZES, ids=lambda size: f"{size // 1000}k")
+def test_top_k_single(benchmark, size):
+  index = build_index(size)
+  benchmark(lambda: [index.top_k([q]) for q in ALL_QUERIES])
+  benchmark.extra_info["queries_per_round"] = len(ALL_QUERIES)
+
+@pytest.mark.parametrize("size", EMBEDDING_SIZES, ids=lambda size: f"{size // 1000}k")
+def test_top_k_batched(benchmark, size):
+  index = build_index(size)
+  results = benchmark(lambda: index.top_k(ALL_QUERIES))
+  benchmark.extra_info["queries_per_round"] = len(ALL_QUERIES)
+  benchmark.extra_info["matched"] = sum(bool(r) for r in results)
+
+@pytest.mark.parametrize("size", EMBEDDING_SIZES, ids=lambda size: f"{size // 1000}k")
+def test_build_embeddings(benchmark, size):
+  items = synthetic_items(size)
+  index = benchmark.pedantic(MenuEmbeddingIndex.build, args=(items, "bench"), rounds=3, iterations=1)
+  assert len(index) == size
+  benchmark.extra_info["megabytes"] = round(sum(a.nbytes for a in index.arrays().values()) / 2 ** 20, 1)
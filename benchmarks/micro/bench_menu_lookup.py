@@ -0,0 +1,82 @@
+# benchmarks/micro/bench_menu_lookup.py
+"""
+Menu lookup helpers answered from the in-memory catalog, against synthetic
+menus of growing size, plus the cost of building a catalog snapshot and the
+recommendation sampler.
+"""
+import random
+
+from src.agent.tools import search_menu
+from src.utils.helpers import normalize_text
+from src.database.menu_catalog import MenuCatalog
+from src.database.menu_sampler import MenuSampler, get_menu_sampler
+from src.database.menu_items import (
+  getExactItem,
+  getMenuItemsByTitle,
+  getTopItemsFromMain,
+  getTopItemsFromSub
+)
+from .synthetic import synthetic_items
+
+def sample(values, count: int = 50) -> list:
+  """Evenly spaced values so every part of the catalog is looked up"""
+  step = max(1, len(values) // count)
+  return values[::step][:count]
+
+# ------------------------------------------------------------------------------
+def test_get_exact_item(benchmark, installed_catalog):
+  titles = sample([item.title for item in installed_catalog.items])
+  results = benchmark(lambda: [getExactItem(t) for t in titles])
+  assert all(r[0] == t for r, t in zip(results, titles))
+
+def test_get_exact_item_folded(benchmark, installed_catalog):
+  """Unaccented lowercase titles take the accent-folded fallback"""
+  titles = sample([normalize_text(item.title) for item in installed_catalog.items])
+  benchmark(lambda: [getExactItem(t) for t in titles])
+
+def test_get_menu_items_by_title(benchmark, installed_catalog):
+  titles = sample([item.title.upper() for item in installed_catalog.items])
+  benchmark(lambda: [getMenuItemsByTitle(t) for t in titles])
+
+def test_get_top_items(benchmark, installed_catalog):
+  mains = sample(list(installed_catalog.by_main_category))
+  subs = sample(list(installed_catalog.by_sub_category))
+  benchmark(lambda: (
+    [getTopItemsFromMain(m) for m in mains],
+    [getTopItemsFromSub(s) for s in subs]
+  ))
+
+def test_search_menu(benchmark, installed_catalog):
+  """Dispatch of a classification result, as hand_customer_query does"""
+  items = sample(installed_catalog.items, 20)
+  classifications = (
+    [{"type": "item", "keyword": item.title} for item in items]
+    + [{"type": "sub_category", "keyword": item.sub_category} for item in items]
+    + [{"type": "main_category", "keyword": item.main_category} for item in items]
+  )
+  benchmark(lambda: [search_menu(c) for c in classifications])
+
+def test_sampler_sample(benchmark, installed_catalog):
+  """Weighted draws of 5 from the largest sub category"""
+  sampler = get_menu_sampler()
+  key = max(sampler.pools, key=lambda key: len(sampler.pools[key]))
+  rng = random.Random(7)
+  benchmark(lambda: [sampler.sample(key, 5, rng) for _ in range(100)])
+  benchmark.extra_info["pool_size"] = len(sampler.pools[key])
+
+def test_sampler_add_popularity(benchmark, installed_catalog):
+  """Incremental refresh after a few orders"""
+  sampler = get_menu_sampler()
+  ordered = {item.id: 1 for item in sample(installed_catalog.items, 10)}
+  benchmark(lambda: sampler.add_popularity(ordered, 0))
+
+# ------------------------------------------------------------------------------
+def test_build_catalog(benchmark, menu_size):
+  items = synthetic_items(menu_size)
+  catalog = benchmark.pedantic(MenuCatalog, args=(items, "bench"), rounds=3, iterations=1)
+  assert len(catalog) == menu_size
+
+def test_build_sampler(benchmark, menu_size):
+  catalog = MenuCatalog(synthetic_items(menu_size), "bench")
+  sampler = benchmark.pedantic(MenuSampler, args=(catalog, {}), rounds=3, iterations=1)
+  assert len(sampler.pools) == len(catalog.by_main_category) + len(catalog.by_sub_category)
@@ -0,0 +1,25 @@
+# benchmarks/micro/bench_menu_search.py
+"""
+Fuzzy menu search (trigram + BM25 index) on the customer questions, against
+synthetic menus of growing size, plus the cost of building the index.
+"""
+from src.database.menu_search import MenuSearchIndex, get_menu_search_index
+from .queries import ALL_QUERIES, UNACCENTED
+from .synthetic import synthetic_items
+
+def test_search_queries(benchmark, installed_catalog):
+  index = get_menu_search_index()
+  results = benchmark(lambda: [index.search(q) for q in ALL_QUERIES])
+  benchmark.extra_info["queries_per_round"] = len(ALL_QUERIES)
+  benchmark.extra_info["matched"] = sum(bool(r) for r in results)
+
+def test_search_unaccented(benchmark, installed_catalog):
+  index = get_menu_search_index()
+  benchmark(lambda: [index.search(q) for q in UNACCENTED])
+  benchmark.extra_info["queries_per_round"] = len(UNACCENTED)
+
+# ------------------------------------------------------------------------------
+def test_build_search_index(benchmark, menu_size):
+  items = synthetic_items(menu_size)
+  index = benchmark.pedantic(MenuSearchIndex, args=(items, "bench"), rounds=3, iterations=1)
+  assert len(index) == menu_size
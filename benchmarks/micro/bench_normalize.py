@@ -0,0 +1,14 @@
+# benchmarks/micro/bench_normalize.py
+"""normalize_text throughput on customer questions and on menu titles"""
+from src.utils.helpers import normalize_text
+from .queries import ALL_QUERIES
+from .synthetic import synthetic_rows
+
+def test_normalize_queries(benchmark):
+  benchmark(lambda: [normalize_text(q) for q in ALL_QUERIES])
+  benchmark.extra_info["chars_per_round"] = sum(len(q) for q in ALL_QUERIES)
+
+def test_normalize_titles_10k(benchmark):
+  titles = [row["title"] for row in synthetic_rows(10_000)]
+  benchmark(lambda: [normalize_text(t) for t in titles])
+  benchmark.extra_info["chars_per_round"] = sum(len(t) for t in titles)
@@ -0,0 +1,45 @@
+# benchmarks/micro/conftest.py
+import functools
+
+import pytest
+
+from src.utils.helpers import QueryClassifier
+from src.database import menu_catalog, menu_sampler
+from src.database.menu_catalog import MenuCatalog
+from src.database.menu_sampler import MenuSampler
+from .synthetic import synthetic_items, synthetic_mappings
+
+MENU_SIZES = [1_000, 10_000, 100_000]
+
+@functools.lru_cache(maxsize=None)
+def build_classifier(size: int) -> QueryClassifier:
+  return QueryClassifier(synthetic_mappings(size))
+
+@functools.lru_cache(maxsize=None)
+def build_catalog(size: int) -> MenuCatalog:
+  return MenuCatalog(synthetic_items(size), version=f"synthetic:{size}")
+
+@functools.lru_cache(maxsize=None)
+def build_sampler(size: int) -> MenuSampler:
+  """Sampler with a skewed synthetic popularity (every 7th item ordered)"""
+  catalog = build_catalog(size)
+  popularity = {item.id: (item.id * 31) % 97 for item in catalog.items if item.id % 7 == 0}
+  return MenuSampler(catalog, popularity)
+
+# ------------------------------------------------------------------------------
+@pytest.fixture(params=MENU_SIZES, ids=lambda size: f"{size // 1000}k")
+def menu_size(request) -> int:
+  return request.param
+
+@pytest.fixture
+def installed_catalog(menu_size, monkeypatch) -> MenuCatalog:
+  """
+  Serve a synthetic catalog through get_menu_catalog(), standing in for the
+  menu_items table. The recommendation sampler is installed the same way;
+  the background refreshers never run here, so no lookup reaches the
+  database.
+  """
+  catalog = build_catalog(menu_size)
+  monkeypatch.setattr(menu_catalog, "_catalog", catalog)
+  monkeypatch.setattr(menu_sampler, "_sampler", build_sampler(menu_size))
+  return catalog
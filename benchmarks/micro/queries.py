@@ -0,0 +1,58 @@
+# benchmarks/micro/queries.py
+"""Customer menu questions as they reach hand_customer_query and the router"""
+
+ACCENTED = [
+  "Cho mình một ly Bạc Xỉu nhé",
+  "Quán có Cà Phê Sữa Đá không?",
+  "Bạc Xỉu Foam Dừa giá bao nhiêu vậy?",
+  "Mình muốn uống trà trái cây, có gợi ý gì không?",
+  "Có món Matcha nào ít ngọt không bạn?",
+  "Cho xem menu trà sữa với",
+  "Hi-Tea Đào còn không ạ?",
+  "Bánh mặn bên mình có những gì?",
+  "Lấy 2 Cold Brew Kim Quất size L ít đá",
+  "Mochi Kem Matcha có ngon không?",
+  "Cà phê phin có những món nào?",
+  "Tôi muốn đặt Frosty Trà Xanh và Mousse Tiramisu",
+  "Oolong Tứ Quý Sen nóng được không?",
+  "Đá xay có lớp whipping cream là món gì?",
+  "Hôm nay có bánh ngọt gì mới không?",
+]
+
+UNACCENTED = [
+  "cho minh mot ly bac xiu",
+  "quan co ca phe sua da khong",
+  "bac xiu foam dua gia bao nhieu",
+  "minh muon uong tra trai cay",
+  "co mon matcha nao it ngot khong",
+  "cho xem menu tra sua",
+  "hi-tea dao con khong",
+  "banh man co nhung gi",
+  "lay 2 cold brew kim quat size l",
+  "tra dao cam sa da con khong",
+  "a-me tuyet quat gia sao",
+  "ca phe may co latte khong",
+  "mousse gau chocolate con khong",
+  "bac siu nong 1 ly",
+  "capuchino da size m",
+]
+
+MIXED_ENGLISH = [
+  "Do you have iced Latte Hazelnut?",
+  "One Caramel Macchiato Đá please",
+  "What's in the Cold Brew menu?",
+  "Can I get a matcha latte less sugar",
+  "Any cheesecake today? Burnt Cheesecake maybe",
+  "I want Espresso Nóng and a Butter Croissant",
+  "recommend something with coconut",
+  "how much is the Americano Nóng",
+  "Frappe Choco Chip with extra whipping cream",
+  "is Hi Tea Vải sweet?",
+]
+
+CORPUS = {
+  "accented": ACCENTED,
+  "unaccented": UNACCENTED,
+  "mixed_english": MIXED_ENGLISH,
+}
+ALL_QUERIES = ACCENTED + UNACCENTED + MIXED_ENGLISH
@@ -0,0 +1,62 @@
+# benchmarks/micro/synthetic.py
+"""
+Deterministic synthetic menus for scaling benchmarks: a multi-brand catalog
+of `size` items in the shape of src/utils/settings.py mappings and of the
+menu_items table.
+"""
+import random
+import itertools
+from typing import Dict, List
+
+from src.database.connection import MenuItems
+
+BASES = {
+  "Cà phê": ["Cà Phê Sữa", "Cà Phê Đen", "Bạc Xỉu", "Latte", "Cold Brew", "Americano"],
+  "Trà trái cây": ["Trà Đào", "Trà Vải", "Oolong", "Hi-Tea", "Trà Xanh"],
+  "Trà sữa": ["Trà Sữa", "Hồng Trà Sữa", "Trà Sữa Oolong"],
+  "Đá xay": ["Frosty", "Frappe"],
+  "Bánh": ["Mochi", "Mousse", "Croissant", "Bánh Mì Que"]
+}
+FLAVORS = [
+  "Caramel", "Dừa", "Hạnh Nhân", "Kim Quất", "Đường Đen", "Matcha", "Sô Cô La", "Dâu",
+  "Việt Quất", "Mơ", "Yuzu", "Sen", "Bưởi", "Mận Muối", "Phô Mai", "Trân Châu", "Hazelnut",
+  "Vani", "Cam Sả", "Sương Sáo"
+]
+STYLES = ["Đá", "Nóng", "Tuyết", "Kem Muối", "Size Lớn", "Ít Ngọt"]
+SUB_STYLES = ["Truyền thống", "Đặc biệt", "Mùa hè"]
+
+# ------------------------------------------------------------------------------
+def synthetic_rows(size: int, seed: int = 7) -> List[dict]:
+  """`size` unique menu rows spread over as many brands as needed"""
+  combos = [
+    (main, base, flavor, style)
+    for main, bases in BASES.items()
+    for base, flavor, style in itertools.product(bases, FLAVORS, STYLES)
+  ]
+  rng = random.Random(seed)
+  rows = []
+  for brand in itertools.count(1):
+    for main, base, flavor, style in combos:
+      if len(rows) == size:
+        return rows
+      sub = f"{base} {SUB_STYLES[len(rows) % len(SUB_STYLES)]}"
+      rows.append({
+        "title": f"{base} {flavor} {style}" + (f" Brand {brand}" if brand > 1 else ""),
+        "price": float(rng.randrange(25, 80) * 1000),
+        "image_url": "",
+        "description": f"{base} vị {flavor.lower()}, phục vụ {style.lower()}",
+        "main_category": main if brand == 1 else f"{main} Brand {brand}",
+        "sub_category": sub if brand == 1 else f"{sub} Brand {brand}"
+      })
+  return rows
+
+# ------------------------------------------------------------------------------
+def synthetic_items(size: int) -> List[MenuItems]:
+  return [MenuItems(id=i + 1, **row) for i, row in enumerate(synthetic_rows(size))]
+
+def synthetic_mappings(size: int) -> Dict[str, Dict[str, List[str]]]:
+  """QueryClassifier mappings: main category -> sub category -> titles"""
+  mappings: Dict[str, Dict[str, List[str]]] = {}
+  for row in synthetic_rows(size):
+    mappings.setdefault(row["main_category"], {}).setdefault(row["sub_category"], []).append(row["title"])
+  return mappings
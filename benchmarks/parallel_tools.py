@@ -0,0 +1,97 @@
+# benchmarks/parallel_tools.py
+"""
+Wall-clock time of one tools step with several menu lookups in a turn,
+sequential (one call after another, as the old ToolNode behaved for blocking
+DB helpers) versus ParallelToolNode.
+
+Each lookup simulates a database round trip of --latency milliseconds, either
+as an async tool (awaited with asyncio.gather) or as a sync tool (run on the
+bounded thread pool).
+
+Usage:
+  python -m benchmarks.parallel_tools --calls 1 3 5 --latency 40 --repeat 20
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.tools import tool
+from langchain_core.messages import AIMessage
+
+from src.agent.tool_executor import ParallelToolNode
+
+# ================================ FAKE TOOLS ==================================
+def make_tools(latency: float):
+  @tool
+  async def lookup_async(name: str) -> str:
+    """Look up a drink (async database helper)"""
+    await asyncio.sleep(latency)
+    return f"{name}: 39,000 VND"
+
+  @tool
+  def lookup_sync(name: str) -> str:
+    """Look up a drink (blocking database helper)"""
+    time.sleep(latency)
+    return f"{name}: 39,000 VND"
+
+  return [lookup_async, lookup_sync]
+
+# ------------------------------------------------------------------------------
+def make_state(tool_name: str, calls: int) -> dict:
+  return {
+    "messages": [
+      AIMessage(
+        content="",
+        tool_calls=[
+          {"name": tool_name, "args": {"name": f"Drink {i}"}, "id": f"call_{i}"}
+          for i in range(calls)
+        ]
+      )
+    ]
+  }
+
+# ================================= RUNNERS ====================================
+async def run_sequential(node: ParallelToolNode, state: dict) -> list:
+  return [await node.run_call(call, {}) for call in state["messages"][-1].tool_calls]
+
+async def run_parallel(node: ParallelToolNode, state: dict) -> list:
+  return (await node(state, {}))["messages"]
+
+# ------------------------------------------------------------------------------
+async def measure(runner, node, state, repeat: int) -> float:
+  """Median wall-clock time in milliseconds"""
+  samples = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    messages = await runner(node, state)
+    samples.append((time.perf_counter() - start) * 1000)
+    assert [m.tool_call_id for m in messages] == [c["id"] for c in state["messages"][-1].tool_calls]
+  return statistics.median(samples)
+
+# ------------------------------------------------------------------------------
+async def main(args) -> None:
+  executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="tool")
+  node = ParallelToolNode(make_tools(args.latency / 1000), executor=executor)
+  print(f"latency per lookup: {args.latency}ms, thread pool: {args.workers} workers")
+  print(f"{'tool':<14}{'calls':>6}{'sequential ms':>16}{'parallel ms':>14}{'speedup':>10}")
+
+  for tool_name in ("lookup_async", "lookup_sync"):
+    for calls in args.calls:
+      state = make_state(tool_name, calls)
+      sequential = await measure(run_sequential, node, state, args.repeat)
+      parallel = await measure(run_parallel, node, state, args.repeat)
+      print(
+        f"{tool_name:<14}{calls:>6}{sequential:>16.1f}{parallel:>14.1f}"
+        f"{sequential / parallel:>9.1f}x"
+      )
+  executor.shutdown()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+  parser.add_argument("--calls", type=int, nargs="+", default=[1, 3, 5, 8])
+  parser.add_argument("--latency", type=float, default=40, help="simulated DB round trip (ms)")
+  parser.add_argument("--repeat", type=int, default=10)
+  parser.add_argument("--workers", type=int, default=4)
+  asyncio.run(main(parser.parse_args()))
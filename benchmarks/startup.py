@@ -0,0 +1,101 @@
+# benchmarks/startup.py
+"""
+Cold-start time of the API: how long a fresh process takes to import the
+app, to answer /health (process alive, accepting connections) and to answer
+/ready with 200 (warm-up done: menu ingestion, catalog, agent and LLM
+clients).
+
+Each run spawns a new uvicorn process, so nothing is warm except the OS
+file cache. Needs DATABASE_URL like the API itself.
+
+Usage:
+  python -m benchmarks.startup --repeat 5 --port 8765
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+# ================================ MEASUREMENTS ================================
+def measure_import(repeat: int) -> float:
+  """Median seconds to import backend.api.main in a fresh interpreter"""
+  code = (
+    "import time; start = time.perf_counter(); import backend.api.main; "
+    "print(time.perf_counter() - start)"
+  )
+  samples = []
+  for _ in range(repeat):
+    output = subprocess.run(
+      [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    samples.append(float(output.strip().splitlines()[-1]))
+  return statistics.median(samples)
+
+# ------------------------------------------------------------------------------
+def get_status(url: str):
+  """(status code, JSON body), (None, None) while nobody listens"""
+  try:
+    with urllib.request.urlopen(url, timeout=1) as response:
+      return response.status, json.loads(response.read())
+  except urllib.error.HTTPError as e:
+    return e.code, json.loads(e.read() or b"null")
+  except (urllib.error.URLError, ConnectionError, TimeoutError):
+    return None, None
+
+# ------------------------------------------------------------------------------
+def measure_server(port: int, timeout: float) -> dict:
+  """Seconds from spawning uvicorn until /health and /ready answer 200"""
+  base_url = f"http://127.0.0.1:{port}"
+  start = time.perf_counter()
+  server = subprocess.Popen(
+    [sys.executable, "-m", "uvicorn", "backend.api.main:app", "--port", str(port)],
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL
+  )
+  result = {"health_seconds": None, "ready_seconds": None, "steps": None}
+  try:
+    while time.perf_counter() - start < timeout:
+      if result["health_seconds"] is None:
+        code, _ = get_status(f"{base_url}/health")
+        if code == 200:
+          result["health_seconds"] = time.perf_counter() - start
+      if result["health_seconds"] is not None:
+        code, body = get_status(f"{base_url}/ready")
+        if code == 200:
+          result["ready_seconds"] = time.perf_counter() - start
+          result["steps"] = {name: step.get("seconds") for name, step in body["steps"].items()}
+          break
+      time.sleep(0.01)
+  finally:
+    server.terminate()
+    server.wait(timeout=30)
+  return result
+
+# ------------------------------------------------------------------------------
+def main(args) -> None:
+  if not os.getenv("DATABASE_URL"):
+    raise SystemExit("DATABASE_URL is not set")
+
+  import_seconds = measure_import(args.repeat)
+  runs = [measure_server(args.port, args.timeout) for _ in range(args.repeat)]
+  if any(run["ready_seconds"] is None for run in runs):
+    raise SystemExit(f"Server was not ready within {args.timeout}s: {runs}")
+
+  print(f"import backend.api.main  {import_seconds * 1000:>8.0f} ms (median of {args.repeat})")
+  print(f"spawn -> /health 200     {statistics.median(r['health_seconds'] for r in runs) * 1000:>8.0f} ms")
+  print(f"spawn -> /ready 200      {statistics.median(r['ready_seconds'] for r in runs) * 1000:>8.0f} ms")
+  print("warm-up steps (median ms):")
+  for name in runs[0]["steps"]:
+    print(f"  {name:<22}{statistics.median(r['steps'][name] for r in runs) * 1000:>8.0f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--port", type=int, default=8765)
+  parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for /ready")
+  main(parser.parse_args())
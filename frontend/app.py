@@ -1,4 +1,5 @@
 import os
+import json
 import requests
 import streamlit as st
 from datetime import datetime
@@ -34,6 +35,53 @@ def start_chat():
 if st.session_state.session_id is None:
   start_chat()
 
+# =============================== STREAM ANSWER ================================
+def iter_sse(res):
+  """Yield (event, data) pairs from a server-sent events response"""
+  event, data = "message", []
+  for line in res.iter_lines(decode_unicode=True):
+    if not line:
+      if data:
+        yield event, json.loads("\n".join(data))
+      event, data = "message", []
+    elif line.startswith("event:"):
+      event = line[len("event:"):].strip()
+    elif line.startswith("data:"):
+      data.append(line[len("data:"):].strip())
+
+def stream_answer(payload, placeholder):
+  """Render tokens as they arrive and return the final answer"""
+  answer = ""
+  with requests.post(
+    f"{API_BASE_URL}/chat/message/stream",
+    json=payload,
+    stream=True,
+  ) as res:
+    res.encoding = "utf-8"
+    if res.status_code != 200:
+      # e.g. 401 for an expired session: FastAPI sends {"detail": ...}
+      try:
+        detail = res.json().get("detail", res.text)
+      except ValueError:
+        detail = res.text
+      answer = f"Lỗi {res.status_code}: {detail}"
+      placeholder.error(answer)
+      return answer
+
+    for event, data in iter_sse(res):
+      if event == "token":
+        answer += data["text"]
+        placeholder.markdown(answer + "▌")
+      elif event == "tool_start" and not answer:
+        placeholder.markdown("Đang tra cứu...")
+      elif event == "final":
+        answer = data["message"]
+      elif event == "error":
+        answer = data["detail"]
+
+  placeholder.markdown(answer)
+  return answer
+
 # ================================ DISPLAY CHAT ================================
 for msg in st.session_state.messages:
   with st.chat_message(msg["role"]):
@@ -59,14 +107,9 @@ if user_input:
   }
 
   with st.chat_message("assistant"):
-    with st.spinner("Đang trả lời..."):
-      res = requests.post(
-        f"{API_BASE_URL}/chat/message",
-        json=payload,
-      )
-      data = res.json()
-      answer = data["message"]
-      st.markdown(answer)
+    placeholder = st.empty()
+    placeholder.markdown("Đang trả lời...")
+    answer = stream_answer(payload, placeholder)
 
   st.session_state.messages.append({
     "role": "assistant",
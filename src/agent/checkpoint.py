@@ -0,0 +1,121 @@
+# agent/checkpoint.py
+import os
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.database.connection import DSN, async_advisory_lock
+
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "memory")
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "5000"))
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")
+CHECKPOINT_POOL_MAX_SIZE = int(os.getenv("CHECKPOINT_POOL_MAX_SIZE", "10"))
+
+# ============================ BOUNDED MEMORY SAVER ============================
+class BoundedMemorySaver(InMemorySaver):
+  """
+  In-memory checkpointer that keeps at most `max_threads` conversations.
+
+  Threads are tracked in least-recently-used order; when a new thread would
+  exceed the bound, the coldest thread's checkpoints are dropped. Memory
+  therefore stays flat under sustained traffic instead of growing with every
+  conversation ever started.
+  """
+  def __init__(self, max_threads: int = 5000):
+    super().__init__()
+    self.max_threads = max_threads
+    self._recent = OrderedDict()
+    self._lru_lock = threading.Lock()
+
+  # ----------------------------------------------------------------------------
+  def _touch(self, config) -> None:
+    """Mark a thread as recently used and evict the coldest ones"""
+    thread_id = config["configurable"]["thread_id"]
+    evicted = []
+    with self._lru_lock:
+      self._recent[thread_id] = True
+      self._recent.move_to_end(thread_id)
+      while len(self._recent) > self.max_threads:
+        evicted.append(self._recent.popitem(last=False)[0])
+
+    for old_thread_id in evicted:
+      super().delete_thread(old_thread_id)
+
+  # ----------------------------------------------------------------------------
+  def get_tuple(self, config):
+    self._touch(config)
+    return super().get_tuple(config)
+
+  def put(self, config, checkpoint, metadata, new_versions):
+    self._touch(config)
+    return super().put(config, checkpoint, metadata, new_versions)
+
+  def put_writes(self, config, writes, task_id, task_path=""):
+    self._touch(config)
+    return super().put_writes(config, writes, task_id, task_path)
+
+  def delete_thread(self, thread_id: str) -> None:
+    with self._lru_lock:
+      self._recent.pop(thread_id, None)
+    super().delete_thread(thread_id)
+
+  # ----------------------------------------------------------------------------
+  @property
+  def thread_count(self) -> int:
+    return len(self._recent)
+
+# ============================= BACKEND SELECTION ==============================
+async def open_checkpointer(backend: str | None = None) -> BaseCheckpointSaver:
+  """
+  Build and connect the checkpointer selected by CHECKPOINT_BACKEND.
+
+  Backends:
+  - memory:   BoundedMemorySaver, LRU-bounded by CHECKPOINT_MAX_THREADS.
+  - sqlite:   AsyncSqliteSaver on CHECKPOINT_SQLITE_PATH (single host).
+  - postgres: AsyncPostgresSaver on DATABASE_URL, shared by every worker.
+
+  The async savers bind to the running event loop, so this must be awaited
+  from inside it (e.g. the FastAPI lifespan).
+  """
+  backend = (backend or CHECKPOINT_BACKEND).lower()
+
+  if backend == "memory":
+    return BoundedMemorySaver(max_threads=CHECKPOINT_MAX_THREADS)
+
+  if backend == "sqlite":
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    conn = await aiosqlite.connect(CHECKPOINT_SQLITE_PATH)
+    checkpointer = AsyncSqliteSaver(conn)
+    await checkpointer.setup()
+    return checkpointer
+
+  if backend == "postgres":
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+    pool = AsyncConnectionPool(
+      DSN or "",
+      max_size=CHECKPOINT_POOL_MAX_SIZE,
+      kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+      open=False
+    )
+    await pool.open()
+    checkpointer = AsyncPostgresSaver(pool)
+    # Every API worker runs this at startup, let one migrate at a time
+    async with async_advisory_lock("checkpoint_setup"):
+      await checkpointer.setup()
+    return checkpointer
+
+  raise ValueError(f"Invalid checkpoint backend: {backend}")
+
+# ------------------------------------------------------------------------------
+async def close_checkpointer(checkpointer: BaseCheckpointSaver) -> None:
+  """Release the connections held by a persistent checkpointer"""
+  conn = getattr(checkpointer, "conn", None)
+  if conn is not None and hasattr(conn, "close"):
+    await conn.close()
@@ -0,0 +1,22 @@
+# agent/classifier.py
+import threading
+from typing import Optional
+
+from src.utils.settings import mappings
+from src.utils.helpers import QueryClassifier
+
+_query_classifier: Optional[QueryClassifier] = None
+_query_classifier_lock = threading.Lock()
+
+def get_query_classifier() -> QueryClassifier:
+  """
+  Return the process-wide QueryClassifier, built on first use (the
+  start-up warm-up builds it): every menu name is pre-normalized into a
+  single automaton once.
+  """
+  global _query_classifier
+  if _query_classifier is None:
+    with _query_classifier_lock:
+      if _query_classifier is None:
+        _query_classifier = QueryClassifier(mappings)
+  return _query_classifier
@@ -0,0 +1,198 @@
+# agent/context.py
+import os
+import re
+import json
+import threading
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import (
+  AIMessage,
+  BaseMessage,
+  HumanMessage,
+  ToolMessage
+)
+
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "6"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_SUMMARY_CHARS = int(os.getenv("CONTEXT_SUMMARY_CHARS", "240"))
+
+# Restated orders look like "Bạc Xỉu x2 - 39,000 VND" or "1 ly ... size L"
+ORDER_DRAFT_PATTERN = re.compile(r"(\bx\s?\d+\b|\b\d+\s*(ly|phần|cái)\b|\bsize\b)", re.IGNORECASE)
+
+# ================================ TOKEN COUNTS ================================
+def message_text(message: BaseMessage) -> str:
+  """Flatten message content (str or list of blocks) into plain text"""
+  content = message.content
+  if isinstance(content, list):
+    content = " ".join(
+      block.get("text", "") if isinstance(block, dict) else str(block)
+      for block in content
+    )
+  return content or ""
+
+# ------------------------------------------------------------------------------
+def estimate_tokens(message: BaseMessage) -> int:
+  """
+  Cheap, provider-agnostic token estimate (~4 characters per token plus a
+  small per-message overhead). Good enough to enforce a budget without
+  loading a tokenizer on the request path.
+  """
+  size = len(message_text(message))
+  for call in getattr(message, "tool_calls", None) or []:
+    size += len(call.get("name", "")) + len(json.dumps(call.get("args", {}), ensure_ascii=False))
+  return size // 4 + 4
+
+# ------------------------------------------------------------------------------
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+  return sum(estimate_tokens(m) for m in messages)
+
+# ================================== METRICS ===================================
+class ContextMetrics:
+  """Process-wide counters of prompt tokens saved by history compaction"""
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.turns = 0
+    self.tokens_before = 0
+    self.tokens_after = 0
+    self.last_saved = 0
+
+  # ----------------------------------------------------------------------------
+  def record(self, tokens_before: int, tokens_after: int) -> None:
+    with self._lock:
+      self.turns += 1
+      self.tokens_before += tokens_before
+      self.tokens_after += tokens_after
+      self.last_saved = tokens_before - tokens_after
+
+  # ----------------------------------------------------------------------------
+  def snapshot(self) -> dict:
+    with self._lock:
+      saved = self.tokens_before - self.tokens_after
+      return {
+        "turns": self.turns,
+        "tokens_before": self.tokens_before,
+        "tokens_after": self.tokens_after,
+        "tokens_saved": saved,
+        "avg_tokens_saved_per_turn": round(saved / self.turns, 1) if self.turns else 0.0,
+        "last_tokens_saved": self.last_saved
+      }
+
+context_metrics = ContextMetrics()
+
+# ================================= COMPACTION =================================
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+  """Group messages into turns, each starting at a HumanMessage"""
+  turns: List[List[BaseMessage]] = []
+  for message in messages:
+    if isinstance(message, HumanMessage) or not turns:
+      turns.append([message])
+    else:
+      turns[-1].append(message)
+  return turns
+
+# ------------------------------------------------------------------------------
+def is_order_draft(message: BaseMessage) -> bool:
+  """An assistant message restating an order with prices"""
+  if not isinstance(message, AIMessage) or message.tool_calls:
+    return False
+  text = message_text(message)
+  return "VND" in text and bool(ORDER_DRAFT_PATTERN.search(text))
+
+# ------------------------------------------------------------------------------
+def shorten(text: str, limit: int) -> str:
+  text = " ".join(text.split())
+  return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+# ------------------------------------------------------------------------------
+def collapse_turn(turn: List[BaseMessage], summary_chars: int, pinned: bool) -> List[BaseMessage]:
+  """
+  Collapse an old turn into the human message plus one compact AI message.
+
+  Tool calls and their results become one-line summaries, so no dangling
+  tool_call ids are sent to the provider. A pinned turn keeps the full
+  text of its assistant replies.
+  """
+  human = turn[0] if isinstance(turn[0], HumanMessage) else None
+  names = {}
+  lines = []
+  for message in turn[1:] if human else turn:
+    if isinstance(message, AIMessage):
+      for call in message.tool_calls:
+        names[call["id"]] = call["name"]
+      text = message_text(message)
+      if text:
+        lines.append(text if pinned else shorten(text, summary_chars))
+    elif isinstance(message, ToolMessage):
+      name = names.get(message.tool_call_id, message.name or "tool")
+      lines.append(f"[{name}] {shorten(message_text(message), summary_chars)}")
+
+  collapsed = [human] if human else []
+  if lines:
+    collapsed.append(AIMessage(content="\n".join(lines)))
+  return collapsed
+
+# ------------------------------------------------------------------------------
+def compact_history(
+  messages: Sequence[BaseMessage],
+  max_turns: int = CONTEXT_MAX_TURNS,
+  token_budget: int = CONTEXT_TOKEN_BUDGET,
+  summary_chars: int = CONTEXT_SUMMARY_CHARS
+) -> Tuple[List[BaseMessage], dict]:
+  """
+  Build the message window sent to the LLM for one turn.
+
+  - The last `max_turns` turns are kept verbatim.
+  - Older turns are collapsed: tool outputs and long replies are summarized.
+  - The most recent order restatement (the current draft), wherever it is,
+    stays in full and its turn is never dropped; older drafts are summarized
+    like any other reply.
+  - If the window still exceeds `token_budget`, the oldest turns are dropped
+    first; the current turn is always kept.
+
+  Args:
+    messages(Sequence[BaseMessage]): Full thread history from the state.
+    max_turns(int): Number of most recent turns kept verbatim.
+    token_budget(int): Estimated token budget for the history window.
+    summary_chars(int): Max characters kept per summarized message.
+
+  Returns:
+    tuple: (messages to send, {"tokens_before", "tokens_after", "tokens_saved"})
+  """
+  tokens_before = count_tokens(messages)
+  turns = split_turns(messages)
+  max_turns = max(1, max_turns)
+  older, recent = turns[:-max_turns], turns[-max_turns:]
+
+  # Only the newest draft is current: older restatements are summarized
+  pinned_index = None
+  for index in range(len(turns) - 1, -1, -1):
+    if any(is_order_draft(m) for m in turns[index]):
+      pinned_index = index
+      break
+
+  window = [
+    (index == pinned_index, collapse_turn(turn, summary_chars, index == pinned_index))
+    for index, turn in enumerate(older)
+  ] + [
+    (len(older) + index == pinned_index, list(turn))
+    for index, turn in enumerate(recent)
+  ]
+
+  # Enforce the budget: drop oldest unpinned turns, never the current one
+  total = sum(count_tokens(turn) for _, turn in window)
+  index = 0
+  while total > token_budget and index < len(window) - 1:
+    pinned, turn = window[index]
+    if pinned:
+      index += 1
+      continue
+    total -= count_tokens(turn)
+    window.pop(index)
+
+  compacted = [m for _, turn in window for m in turn]
+  tokens_after = count_tokens(compacted)
+  return compacted, {
+    "tokens_before": tokens_before,
+    "tokens_after": tokens_after,
+    "tokens_saved": tokens_before - tokens_after
+  }
@@ -1,34 +1,67 @@
 # agent/graph.py
 from typing import Literal
 
-from .tools import tools
+from .tools import WRITE_TOOLS, tools
+from .tool_executor import ParallelToolNode
 from .state import OrderState
-from .prompt import SYSTEM_PROMPT, WELCOME_MSG
-from src.utils.llm_manager import LLMOrchestrator
+from .context import compact_history, context_metrics
+from .router import FAST_PATH_METADATA, ROUTER_ENABLED, route_message
+from .checkpoint import BoundedMemorySaver, CHECKPOINT_MAX_THREADS
+from .prompt import WELCOME_MSG, build_prompt
+from src.utils.llm_manager import get_llm_with_tools
+from src.utils.telemetry import STAGE_LATENCY, span
 
-from langgraph.prebuilt import ToolNode
 from langgraph.graph import START, END, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import SystemMessage, AIMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
-def create_agent():
+def last_tool_results(messages) -> list:
+  """ToolMessages produced for the most recent AI tool call"""
+  results = []
+  for message in reversed(messages):
+    if not isinstance(message, ToolMessage):
+      break
+    results.append(message)
+  return results[::-1]
+
+def create_agent(checkpointer: BaseCheckpointSaver | None = None):
   
   # ========================== INITIALIZE COMPONENTS ===========================
-  tool_node = ToolNode(tools)
-  llm_orchestrator = LLMOrchestrator()
-  llm_with_tools = llm_orchestrator.get_llm().bind_tools(tools)
+  tool_node = ParallelToolNode(tools, timeouts={name: None for name in WRITE_TOOLS})
+  llm_with_tools = get_llm_with_tools(tools)
   
   # ============================== NODE FUNCTIONS ==============================
-  def chat_node(state: OrderState) -> OrderState:
+  async def router_node(state: OrderState) -> OrderState:
+    """Answer simple intents (order status, cancel, menu lookup) without the LLM"""
+    messages = state["messages"]
+    if (
+      not ROUTER_ENABLED or not messages
+      or not isinstance(messages[-1], HumanMessage)
+      or not isinstance(messages[-1].content, str)
+    ):
+      return {"messages": []}
+    
+    with span("graph.router", stage="router", histogram=STAGE_LATENCY, labels={"stage": "router"}):
+      reply = await route_message(messages[-1].content)
+    if reply is None:
+      return {"messages": []}
+    
+    print("Message answered by the fast-path router")
+    return {"messages": [AIMessage(content=reply, response_metadata=dict(FAST_PATH_METADATA))]}
+  
+  async def chat_node(state: OrderState) -> OrderState:
     """Main chatbot node that processes messages and decides actions"""
     customer_id = state.get("customer_id", "unknown")
     
     if state["messages"]:
-      system_msg = SystemMessage(
-        content=SYSTEM_PROMPT.format(customer_id=customer_id)
-      )
-      msgs = [system_msg] + list(state["messages"])
-      output = llm_with_tools.invoke(msgs)
+      history, stats = compact_history(state["messages"])
+      context_metrics.record(stats["tokens_before"], stats["tokens_after"])
+      if stats["tokens_saved"]:
+        print(f"Context compaction saved {stats['tokens_saved']} tokens")
+      
+      msgs = build_prompt(customer_id, history)
+      with span("graph.chatbot", histogram=STAGE_LATENCY, labels={"stage": "chatbot"}, messages=len(msgs)):
+        output = await llm_with_tools.ainvoke(msgs)
       
       if hasattr(output, "tool_calls") and output.tool_calls:
         print(f"Tool calls: {len(output.tool_calls)}")
@@ -38,6 +71,18 @@ def create_agent():
       
     return {"messages": [output]}
   
+  def respond_node(state: OrderState) -> OrderState:
+    """Send user-ready tool outputs to the customer without another LLM call"""
+    results = last_tool_results(state["messages"])
+    return {"messages": [AIMessage(content="\n\n".join(m.content for m in results))]}
+  
+  def after_router(state: OrderState) -> Literal["chatbot", "end"]:
+    """Skip the LLM when the router already answered"""
+    messages = state["messages"]
+    if messages and isinstance(messages[-1], AIMessage):
+      return "end"
+    return "chatbot"
+  
   def should_continue(state: OrderState) -> Literal["tools", "end"]:
     """Decide next step based on last message"""
     last = state["messages"][-1]
@@ -48,14 +93,44 @@ def create_agent():
     else:
       return "end"
   
+  def after_tools(state: OrderState) -> Literal["respond", "chatbot"]:
+    """End the turn when every tool of the last call marked its output terminal"""
+    results = last_tool_results(state["messages"])
+    if results and all(
+      isinstance(m.artifact, dict) and m.artifact.get("terminal") and isinstance(m.content, str)
+      for m in results
+    ):
+      return "respond"
+    return "chatbot"
+  
   # =============================== BUILD GRAPH ================================  
   builder = StateGraph(OrderState)
   
+  builder.add_node("router", router_node)
   builder.add_node("chatbot", chat_node)
   builder.add_node("tools", tool_node)
+  builder.add_node("respond", respond_node)
   
-  builder.add_edge(START, "chatbot")
-  builder.add_edge("tools", "chatbot")
+  builder.add_edge(START, "router")
+  builder.add_edge("respond", END)
+  
+  builder.add_conditional_edges(
+    "tools",
+    after_tools,
+    {
+      "respond": "respond",
+      "chatbot": "chatbot"
+    },
+  )
+  
+  builder.add_conditional_edges(
+    "router",
+    after_router,
+    {
+      "chatbot": "chatbot",
+      "end": END
+    },
+  )
   
   builder.add_conditional_edges(
     "chatbot",
@@ -66,7 +141,8 @@ def create_agent():
     },
   ) 
   
-  checkpointer = MemorySaver()
+  if checkpointer is None:
+    checkpointer = BoundedMemorySaver(max_threads=CHECKPOINT_MAX_THREADS)
   
   agent = builder.compile(checkpointer=checkpointer)
   
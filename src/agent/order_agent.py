@@ -3,31 +3,31 @@ from typing import List, Literal
 
 from .tools import tools
 from .state import OrderState
-from .prompt import SYSTEM_PROMPT, WELCOME_MSG
-from src.utils.llm_manager import LLMOrchestrator
+from .context import compact_history, context_metrics
+from .prompt import WELCOME_MSG, build_prompt
+from src.utils.llm_manager import get_llm_with_tools
 
 from langgraph.prebuilt import ToolNode
 from langgraph.graph import START, END, StateGraph
-from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.messages import AIMessage
 
 class OrderAgent:
   def __init__(self, tools: List = tools):
     self.tools = tools
     self.tool_node = ToolNode(tools)
-    self.llm_orchestator = LLMOrchestrator()
-    self.llm_with_tools = self.llm_orchestator.get_llm()
+    self.llm_with_tools = get_llm_with_tools(tools)
     self.graph = self._build_graph()
     
   # ============================== NODE FUNCTIONS ==============================
-  def chat_node(self, state: OrderState) -> OrderState:
+  async def chat_node(self, state: OrderState) -> OrderState:
     customer_id = state.get("customer_id", "unknown")
     
     if state['messages']:
-      system_msg = SystemMessage(
-        content=SYSTEM_PROMPT.format(customer_id=customer_id)
-      )
-      msgs = [system_msg] + list(state['messages'])
-      output = self.llm_with_tools.invoke(msgs)
+      history, stats = compact_history(state['messages'])
+      context_metrics.record(stats["tokens_before"], stats["tokens_after"])
+      
+      msgs = build_prompt(customer_id, history)
+      output = await self.llm_with_tools.ainvoke(msgs)
       
     else:
       output = AIMessage(WELCOME_MSG)
@@ -1,4 +1,9 @@
 # agent/prompt.py
+from typing import List, Sequence
+from langchain_core.messages import BaseMessage, SystemMessage
+
+# Static and byte-identical on every call so providers can cache it as a
+# prompt prefix: never interpolate per-customer data into it
 SYSTEM_PROMPT = """
 You are a friendly, intelligent, and professional staff member at the most famous and luxurious coffee shop, MT Coffee Shop.
 
@@ -9,7 +14,7 @@ Your role is to:
 - Answer questions about the menu, pricing, or order status.
 - Skillfully use available tools to place, update, or cancel orders.
 
-The current customer ID is: {customer_id}. Always use this ID when required, especially with tools such as 'place_order'.
+The current customer ID is given in the customer context message that follows these instructions. Always use this ID when required, especially with tools such as 'place_order'.
 
 -------------------------
 ORDER HANDLING GUIDELINES
@@ -85,3 +90,13 @@ MENU RECOMMENDATIONS FORMAT
 """
 
 WELCOME_MSG = "Chào mừng bạn đã đến với của hàng MT Coffee của chúng tôi, không biết tôi có thể giúp gì được cho bạn nhỉ?"
+
+# Short per-customer message sent right after the static prefix
+CUSTOMER_CONTEXT = "Customer context: the current customer ID is {customer_id}."
+
+def build_prompt(customer_id: str, history: Sequence[BaseMessage]) -> List[BaseMessage]:
+  """Static system prompt, then the customer context, then the conversation"""
+  return [
+    SystemMessage(content=SYSTEM_PROMPT),
+    SystemMessage(content=CUSTOMER_CONTEXT.format(customer_id=customer_id))
+  ] + list(history)
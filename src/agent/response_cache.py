@@ -0,0 +1,127 @@
+# agent/response_cache.py
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.utils.helpers import normalize_text
+from src.database.menu_catalog import get_menu_catalog
+from .classifier import get_query_classifier
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+# Quantities, ordering / cancelling verbs and order references depend on the
+# conversation, so such messages are never answered from the cache
+ORDER_INTENT_PATTERN = re.compile(
+  r"(\d|\b([dđ]at|order|mua|lay|huy|cancel|[dđ]on|them|bot|[dđ]oi|size|ly|phan)\b)"
+)
+
+# =============================== RESPONSE CACHE ===============================
+class ResponseCache:
+  """
+  LRU + TTL cache of the router's replies to deterministic menu questions.
+
+  The key combines the normalized message, its QueryClassifier result and
+  the menu catalog version, so "giá Bạc Xỉu bao nhiêu" and "gia bac xiu bao
+  nhieu" share an entry and every entry is invalidated when the menu changes.
+  """
+  def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600):
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self.hits = 0
+    self.misses = 0
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  # ----------------------------------------------------------------------------
+  def key_for(self, query: str) -> Optional[str]:
+    """
+    Build the cache key of a customer message, or None if the message is not
+    a pure catalog question.
+    """
+    query_norm = " ".join(re.sub(r"[^\w\s]", " ", normalize_text(query)).split())
+    if not query_norm or ORDER_INTENT_PATTERN.search(query_norm):
+      return None
+
+    classification = get_query_classifier().classify_query(query)
+    if classification["type"] == "unknown":
+      return None
+
+    try:
+      version = get_menu_catalog().version
+    except Exception as e:
+      print(f"Response cache disabled, menu catalog unavailable: {e}")
+      return None
+    return f"{version}|{classification['type']}:{classification['keyword']}|{query_norm}"
+
+  # ----------------------------------------------------------------------------
+  def get(self, key: str) -> Optional[str]:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+        if entry is not None:
+          del self._entries[key]
+        self.misses += 1
+        return None
+
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry[0]
+
+  # ----------------------------------------------------------------------------
+  def put(self, key: str, response: str) -> None:
+    with self._lock:
+      self._entries[key] = (response, time.monotonic())
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  # ----------------------------------------------------------------------------
+  def remember_turn(self, key: Optional[str], messages: Sequence[BaseMessage]) -> None:
+    """
+    Store the reply of a finished turn if the fast-path router wrote it.
+
+    Router replies are rendered from the menu catalog alone. LLM replies are
+    never cached: they are written with the customer's conversation (names,
+    order draft, earlier turns) and must not be served to someone else.
+    """
+    if key is None:
+      return
+
+    turn = []
+    for message in reversed(messages):
+      if isinstance(message, HumanMessage):
+        break
+      turn.append(message)
+    if len(turn) != 1 or not isinstance(turn[0], AIMessage) or not turn[0].response_metadata.get("fast_path"):
+      return
+
+    content = turn[0].content
+    if isinstance(content, str) and content:
+      self.put(key, content)
+
+  # ----------------------------------------------------------------------------
+  def stats(self) -> dict:
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        "entries": len(self._entries),
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+      }
+
+  # ----------------------------------------------------------------------------
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+response_cache = ResponseCache(
+  max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+  ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,118 @@
+# agent/router.py
+import os
+import re
+from typing import Optional
+
+from src.utils.helpers import normalize_text
+from .classifier import get_query_classifier
+from .tools import search_menu, check_order_status, request_order_cancel
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+
+# response_metadata of the replies the router writes: templated from the
+# catalog or an order lookup, without the LLM
+FAST_PATH_METADATA = {"fast_path": True}
+
+# Patterns run on normalize_text() output: lowercase, accents stripped, "đ" kept
+ORDER_ID_PATTERN = re.compile(
+  r"(?:#\s*(\d+)|\b(?:[dđ]on(?:\s+hang)?|order|ma)\s*(?:so\s*)?#?\s*(\d+)\b)"
+)
+STATUS_PATTERN = re.compile(
+  r"\b(sao roi|the nao|ra sao|trang thai|toi [dđ]au|[dđ]en [dđ]au|xong chua|"
+  r"co chua|[dđ]uoc chua|kiem tra|check|status)\b"
+)
+CANCEL_PATTERN = re.compile(r"\b(huy|cancel)\b")
+NEGATION_PATTERN = re.compile(r"\b(khong|[dđ]ung|chua|khoi|nham)\b")
+ORDERING_PATTERN = re.compile(
+  r"\b([dđ]at|order|mua|lay|them|bot|[dđ]oi|size|ly|phan|cho (toi|minh|em|anh|chi))\b"
+)
+PRICE_PATTERN = re.compile(r"\b(gia|bao nhieu|bao tien|nhieu tien)\b")
+LISTING_PATTERN = re.compile(
+  r"\b(menu|thuc [dđ]on|co nhung|nhung mon|mon nao|loai nao|co gi|goi y|"
+  r"nhung loai|danh sach)\b"
+)
+
+# ================================ INTENT ROUTER ===============================
+def extract_order_ids(text_norm: str) -> set:
+  """All order ids referenced in a normalized message"""
+  return {int(a or b) for a, b in ORDER_ID_PATTERN.findall(text_norm)}
+
+# ------------------------------------------------------------------------------
+def render_menu_reply(classification: dict, result: list) -> Optional[str]:
+  """Turn a `search_menu` result into a templated reply, None if unusable"""
+  if not result:
+    return None
+  # Errors come back as "Error: ..." strings or as [("Error: ...", 0, "")]
+  first = result[0]
+  if isinstance(first, (list, tuple)):
+    first = first[0] if first else ""
+  if str(first).startswith("Error"):
+    return None
+  keyword = classification["keyword"]
+
+  if classification["type"] == "item":
+    title, price, description = result[0], result[1], result[2]
+    reply = f"Dạ, {title} size M có giá {price:,.0f} VND ạ (size S -10,000 VND, size L +10,000 VND)."
+    if description:
+      reply += f"\n{description}"
+    return reply + "\nBạn có muốn đặt món này không ạ?"
+
+  if all(isinstance(entry, str) for entry in result):
+    # Main category with sub categories
+    return (
+      f"Dạ, nhóm {keyword} bên mình gồm: {', '.join(result)}.\n"
+      "Bạn muốn xem thêm nhóm nào ạ?"
+    )
+
+  lines = "\n".join(f"- {entry[0]}: {entry[1]:,.0f} VND" for entry in result)
+  return f"Dạ, một số món {keyword} bên mình:\n{lines}\nBạn muốn thử món nào ạ?"
+
+# ------------------------------------------------------------------------------
+async def route_message(text: str) -> Optional[str]:
+  """
+  Answer simple intents without the LLM.
+
+  Handled:
+  - Order status: "đơn #42 sao rồi", "kiểm tra đơn 42".
+  - Cancellation: "hủy đơn 42" (never when negated, e.g. "đừng hủy đơn 42").
+  - Menu lookups: price of an item, or listing a (sub) category.
+
+  Anything ambiguous (no or several order ids, ordering verbs, unknown menu
+  keyword, mixed intents) returns None and falls through to the LLM.
+
+  Args:
+    text(str): Latest customer message.
+
+  Returns:
+    str | None: Templated reply, or None if the LLM should handle it.
+  """
+  text_norm = " ".join(re.sub(r"[^\w\s#]", " ", normalize_text(text)).split())
+  if not text_norm:
+    return None
+
+  order_ids = extract_order_ids(text_norm)
+  wants_cancel = bool(CANCEL_PATTERN.search(text_norm))
+  wants_status = bool(STATUS_PATTERN.search(text_norm))
+
+  if order_ids:
+    if len(order_ids) != 1 or (wants_cancel and NEGATION_PATTERN.search(text_norm)):
+      return None
+    order_id = order_ids.pop()
+    if wants_cancel and not wants_status:
+      return await request_order_cancel(order_id)
+    if wants_status and not wants_cancel:
+      return await check_order_status(order_id)
+    return None
+
+  if wants_cancel or ORDERING_PATTERN.search(text_norm) or re.search(r"\d", text_norm):
+    return None
+
+  classification = get_query_classifier().classify_query(text)
+  if classification["type"] == "unknown":
+    return None
+  if classification["type"] == "item" and not PRICE_PATTERN.search(text_norm):
+    return None
+  if classification["type"] != "item" and not LISTING_PATTERN.search(text_norm):
+    return None
+
+  return render_menu_reply(classification, search_menu(classification))
@@ -0,0 +1,150 @@
+# agent/tool_executor.py
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.tools import BaseTool
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from .state import OrderState
+from src.utils.telemetry import TOOL_LATENCY, record_queue_wait, span
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "4"))
+
+# ================================ THREAD POOL =================================
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_tool_executor() -> ThreadPoolExecutor:
+  """
+  Return the process-wide pool running sync tools, shared by every
+  ParallelToolNode so rebuilding the agent does not leak threads.
+  """
+  global _executor
+  with _executor_lock:
+    if _executor is None:
+      _executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+    return _executor
+
+def shutdown_tool_executor() -> None:
+  """Stop the shared pool (FastAPI lifespan), the next use creates a new one"""
+  global _executor
+  with _executor_lock:
+    executor, _executor = _executor, None
+  if executor is not None:
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# ============================== PARALLEL TOOL NODE ============================
+class ParallelToolNode:
+  """
+  Graph node running every tool call of the last AIMessage concurrently.
+
+  - Async tools are awaited together with asyncio.gather.
+  - Sync tools run on a bounded, shared thread pool so they never block
+    the loop.
+  - Each call has its own timeout; a slow or failing tool becomes an error
+    ToolMessage instead of failing the whole turn. Tools mapped to None in
+    `timeouts` (database writes) are never cut short.
+  - ToolMessages are returned in the order of the tool calls, whatever
+    order the tools finish in.
+  """
+  def __init__(
+    self,
+    tools: Sequence[BaseTool],
+    timeout: float = TOOL_TIMEOUT_SECONDS,
+    timeouts: Optional[Dict[str, Optional[float]]] = None,
+    executor: Optional[ThreadPoolExecutor] = None
+  ):
+    """
+    Args:
+      tools(Sequence[BaseTool]): Tools the model may call.
+      timeout(float): Default timeout in seconds for one tool call.
+      timeouts(dict): Per-tool overrides, tool name -> seconds, or None
+                      for no timeout.
+      executor(ThreadPoolExecutor): Pool for sync tools, owned by the
+                                    caller; the shared pool by default.
+    """
+    self.tools_by_name = {t.name: t for t in tools}
+    self.timeout = timeout
+    self.timeouts = timeouts or {}
+    self.executor = executor
+
+  # ----------------------------------------------------------------------------
+  async def run_call(self, call: dict, config: RunnableConfig) -> ToolMessage:
+    """Run one tool call and always return a ToolMessage for it"""
+    name = call["name"]
+    tool = self.tools_by_name.get(name)
+    if tool is None:
+      return ToolMessage(
+        content=f"Error: {name} is not a valid tool, try one of {list(self.tools_by_name)}.",
+        tool_call_id=call["id"],
+        name=name,
+        status="error"
+      )
+
+    tool_call = {**call, "type": "tool_call"}
+    timeout = self.timeouts.get(name, self.timeout)
+    start = time.perf_counter()
+    with span(f"tool.{name}", stage="tools", tool_call_id=call["id"]) as current:
+      message = await self.invoke(tool, tool_call, config, timeout)
+      if current is not None and current.is_recording():
+        current.set_attribute("tool.status", message.status)
+    TOOL_LATENCY.labels(tool=name, status=message.status).observe(time.perf_counter() - start)
+    return message
+
+  # ----------------------------------------------------------------------------
+  async def invoke(self, tool: BaseTool, tool_call: dict, config: RunnableConfig, timeout: Optional[float]) -> ToolMessage:
+    """Invoke a tool within `timeout`, turning failures into error ToolMessages"""
+    name = tool_call["name"]
+    try:
+      if tool.coroutine is not None:
+        output = await asyncio.wait_for(tool.ainvoke(tool_call, config), timeout)
+      else:
+        submitted = time.perf_counter()
+        def run():
+          record_queue_wait("tool_executor", time.perf_counter() - submitted)
+          return tool.invoke(tool_call, config)
+
+        # Copy the context so the tool's spans and DB timings join the turn
+        loop = asyncio.get_running_loop()
+        output = await asyncio.wait_for(
+          loop.run_in_executor(
+            self.executor or get_tool_executor(), contextvars.copy_context().run, run
+          ),
+          timeout
+        )
+    except asyncio.TimeoutError:
+      print(f"Tool {name} timed out after {timeout}s")
+      return ToolMessage(
+        content=f"Error: {name} did not answer within {timeout:g} seconds, please try again.",
+        tool_call_id=tool_call["id"],
+        name=name,
+        status="error"
+      )
+    except Exception as e:
+      print(f"Tool {name} failed: {e}")
+      return ToolMessage(
+        content=f"Error: {repr(e)}\n Please fix your mistakes.",
+        tool_call_id=tool_call["id"],
+        name=name,
+        status="error"
+      )
+
+    if isinstance(output, ToolMessage):
+      return output
+    return ToolMessage(content=str(output), tool_call_id=tool_call["id"], name=name)
+
+  # ----------------------------------------------------------------------------
+  async def __call__(self, state: OrderState, config: RunnableConfig) -> OrderState:
+    last = state["messages"][-1]
+    calls = last.tool_calls if isinstance(last, AIMessage) else []
+    results: List[ToolMessage] = await asyncio.gather(
+      *(self.run_call(call, config) for call in calls)
+    )
+    return {"messages": list(results)}
@@ -1,26 +1,62 @@
 # agent/tools.py
+import asyncio
 from datetime import datetime
-from typing import List, Dict
-from langchain.tools import tool
+from typing import List, Dict, Tuple
+from langchain_core.tools import tool
 
-from src.utils.settings import mappings
-from src.utils.helpers import QueryClassifier
+from src.utils.telemetry import STAGE_LATENCY, span
 from src.database.connection import Orders, OrderItems
-from src.database.order_items import insertOrderItem
-from src.database.orders import insertOrder, updateOrderStatus, getOrderStatus
-from src.database.menu_items import getExactItem, getTopItemsFromSub, getTopItemsFromMain, getMenuItemsByTitle
+from src.database.orders import insertOrderWithItemsAsync, updateOrderStatusAsync, getOrderStatusAsync
+from src.database.menu_items import getExactItem, getTopItemsFromSub, getTopItemsFromMain, findMenuItemsByTitles
+from src.database.menu_search import searchMenuItems
+from src.database.menu_embeddings import recommendMenuItems
+from .classifier import get_query_classifier
 
-# ================================ TOOLS USAGE =================================
-@tool
-def hand_customer_query(query: str) -> list[str]:
-  """
-  Search the menu to find drinks or food based on customer requests.
-  Use this tool when customers ask about what's available, want recommendations,
-  or ask about specific items.
-  """
-  qc = QueryClassifier(mappings)
-  classification = qc.classify_query(query)
+ORDER_STATUS_VN = {
+  "pending": "Đang chờ xử lý",
+  "preparing": "Đang chuẩn bị",
+  "ready": "Đã sẵn sàng",
+  "completed": "Đã hoàn thành",
+  "cancelled": "Đã hủy"
+}
+
+# Tool artifact marking the output as a finished reply for the customer: the
+# graph sends it as-is instead of asking the LLM to paraphrase it
+TERMINAL = {"terminal": True}
+
+# ============================== SHARED ACTIONS ================================
+# Used by the tools below and by the fast-path router (no LLM involved)
+async def check_order_status(order_id: int) -> str:
+  """Return a Vietnamese status summary of an order"""
+  order = await getOrderStatusAsync(order_id)
+  if not order:
+    return f"Không tìm thấy đơn hàng #{order_id}"
+    
+  status_vn = ORDER_STATUS_VN.get(order["status"], order["status"])
+  return f"""**Đơn hàng #{order['id']}**
+               Trạng thái: {status_vn}
+               Tổng tiền: {order['total_price']:,.0f} VND"""
+
+# ------------------------------------------------------------------------------
+async def request_order_cancel(order_id: int) -> str:
+  """Cancel an order unless it is already completed or cancelled"""
+  order = await getOrderStatusAsync(order_id)
+  if not order:
+    return f"Không tìm thấy đơn hàng #{order_id}"
   
+  status = order["status"].lower()
+  if status in ["completed", "cancelled"]:
+    return f"Không thể hủy đơn hàng #{order_id} (Trạng thái: {status})"
+
+  try:
+    await updateOrderStatusAsync(order_id, "cancelled")
+    return f"Đơn hàng #{order_id} đã được hủy thành công."
+  except Exception as e:
+    return f"Lỗi khi hủy đơn: {str(e)}"
+
+# ------------------------------------------------------------------------------
+def search_menu(classification: dict) -> list:
+  """Look up the menu for a QueryClassifier result"""
   if classification["type"] == "item":
     return getExactItem(classification["keyword"])
 
@@ -33,9 +69,43 @@ def hand_customer_query(query: str) -> list[str]:
   else:
     return ["Tôi chưa hiểu bạn muốn uống gì. Bạn có thể mô tả rõ hơn không?"]
 
+# ================================ TOOLS USAGE =================================
+@tool
+async def hand_customer_query(query: str) -> list[str]:
+  """
+  Search the menu to find drinks or food based on customer requests.
+  Use this tool when customers ask about what's available, want recommendations,
+  or ask about specific items. Misspelled or unaccented names and descriptive
+  requests ("trà trái cây ít ngọt") are matched too, so pass the customer's
+  wording as-is.
+  """
+  with span("classifier.classify_query", stage="classifier", histogram=STAGE_LATENCY, labels={"stage": "classifier"}):
+    classification = get_query_classifier().classify_query(query)
+
+  if classification["type"] == "unknown":
+    # No exact name in the query: rank fuzzy matches instead of making the
+    # LLM guess another phrasing, then items whose description fits.
+    # The pg_trgm backend queries Postgres, so search off the event loop
+    with span("menu_search.search", stage="search", histogram=STAGE_LATENCY, labels={"stage": "search"}):
+      matches = await asyncio.to_thread(searchMenuItems, query)
+    if not matches:
+      with span("menu_embeddings.recommend", stage="search", histogram=STAGE_LATENCY, labels={"stage": "recommend"}):
+        matches = await asyncio.to_thread(recommendMenuItems, query)
+    if matches:
+      return matches
+
+  elif classification["type"] in ("sub_category", "main_category"):
+    # "trà trái cây ít ngọt": rank the category on the rest of the request,
+    # a bare category name falls through to the usual listing
+    with span("menu_embeddings.recommend", stage="search", histogram=STAGE_LATENCY, labels={"stage": "recommend"}):
+      matches = await asyncio.to_thread(recommendMenuItems, query, classification)
+    if matches:
+      return matches
+  return search_menu(classification)
+
 # ------------------------------------------------------------------------------ 
-@tool 
-def place_order(customer_id: str, items: List[Dict]) -> str:
+@tool(response_format="content_and_artifact")
+async def place_order(customer_id: str, items: List[Dict]) -> Tuple[str, Dict | None]:
   """
   Place a new order after customer confirms all details.
   ONLY use this tool when the customer explicitly confirms the order.
@@ -60,20 +130,20 @@ def place_order(customer_id: str, items: List[Dict]) -> str:
     Confirmation message with order ID and total price
   """
   try:
-    # Step 1: Validate and calculate total
+    # Step 1: Validate and calculate total (titles from the menu catalog)
     total_price = 0
     validated_items = []
+    menu_items = await findMenuItemsByTitles([item["item_name"] for item in items])
     
     for item in items:
       item_name = item["item_name"]
       quantity = item.get("quantity", 1)
       customizations = item.get("customizations", {})
       
-      menu_items = getMenuItemsByTitle(item_name)
-      if not menu_items:
-        return f"Dạ vâng quán mình không có món '{item_name}' này ạ. Bạn có thể order món khác không?"
+      menu_item = menu_items.get(item_name)
+      if not menu_item:
+        return f"Dạ vâng quán mình không có món '{item_name}' này ạ. Bạn có thể order món khác không?", None
 
-      menu_item = menu_items[0]
       base_price = float(menu_item["price"])
       
       # Adjust price based on size
@@ -95,24 +165,22 @@ def place_order(customer_id: str, items: List[Dict]) -> str:
         "price": final_price
       })
       
-    # Step 2: Create order
+    # Step 2: Create order and its items atomically
     new_order = Orders(
       customer_id = customer_id,
       status = "pending",
       total_price = total_price,
       order_time = datetime.now()
     )
-    order_id = insertOrder(new_order)
-    
-    # Step 3: Insert order items
-    for v in validated_items:
-      order_item = OrderItems(
-        order_id=order_id,
+    order_items = [
+      OrderItems(
         item_id=v["item_id"],
         quantity=v["quantity"],
         customizations=str(v["customizations"])
       )
-      insertOrderItem(order_item)
+      for v in validated_items
+    ]
+    order_id = await insertOrderWithItemsAsync(new_order, order_items)
       
     # Format confirmation
     items_summary = "\n".join([
@@ -127,16 +195,16 @@ def place_order(customer_id: str, items: List[Dict]) -> str:
               **Chi tiết:**
               {items_summary}
 
-              Cảm ơn quý khách! Đơn hàng sẽ sớm được chuẩn bị."""
+              Cảm ơn quý khách! Đơn hàng sẽ sớm được chuẩn bị.""", TERMINAL
   except Exception as e:
     print(f"Error placing order: {e}")
     import traceback
     traceback.print_exc()
-    return f"Có lỗi xảy ra khi đặt hàng: {str(e)}"
+    return f"Có lỗi xảy ra khi đặt hàng: {str(e)}", None
 
 # ------------------------------------------------------------------------------ 
-@tool
-def get_order_status(order_id: int) -> str:
+@tool(response_format="content_and_artifact")
+async def get_order_status(order_id: int) -> Tuple[str, Dict]:
   """
   Check the status of an existing order.
   Use this when customer asks about their order status.
@@ -147,26 +215,11 @@ def get_order_status(order_id: int) -> str:
   Returns:
     Order status information
   """
-  order = getOrderStatus(order_id)
-  if not order:
-    return f"Không tìm thấy đơn hàng #{order_id}"
-  
-  status_map = {
-      "pending": "Đang chờ xử lý",
-      "preparing": "Đang chuẩn bị",
-      "ready": "Đã sẵn sàng",
-      "completed": "Đã hoàn thành",
-      "cancelled": "Đã hủy"
-    }
-    
-  status_vn = status_map.get(order["status"], order["status"])
-  return f"""**Đơn hàng #{order['id']}**
-               Trạng thái: {status_vn}
-               Tổng tiền: {order['total_price']:,.0f} VND"""
+  return await check_order_status(order_id), TERMINAL
 
 # ------------------------------------------------------------------------------ 
-@tool
-def cancel_order(order_id: int) -> str:
+@tool(response_format="content_and_artifact")
+async def cancel_order(order_id: int) -> Tuple[str, Dict]:
   """
   Cancel an existing order.
   Only use this when customer explicitly requests to cancel.
@@ -178,21 +231,13 @@ def cancel_order(order_id: int) -> str:
   Returns:
     Confirmation or error message
   """
-  order = getOrderStatus(order_id)
-  if not order:
-    return f"Không tìm thấy đơn hàng #{order_id}"
-  
-  status = order["status"].lower()
-  if status in ["completed", "cancelled"]:
-    return f"Không thể hủy đơn hàng #{order_id} (Trạng thái: {status})"
-
-  try:
-    updateOrderStatus(order_id, "cancelled")
-    return f"Đơn hàng #{order_id} đã được hủy thành công."
-  except Exception as e:
-    return f"Lỗi khi hủy đơn: {str(e)}"
+  return await request_order_cancel(order_id), TERMINAL
   
 # =============================== TOOLS PACKAGE ================================
 tools = [hand_customer_query, place_order, get_order_status, cancel_order]
+
+# A timeout could cancel these after their transaction committed: the agent
+# would report a failure and a retry would write twice, so they run untimed
+WRITE_TOOLS = {"place_order", "cancel_order"}
   
 
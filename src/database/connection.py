@@ -1,24 +1,328 @@
 # database/connection.py
 import os
+import time
+import asyncio
 import psycopg2
+import threading
 from typing import Optional
+from collections import deque
 from datetime import datetime
 from dotenv import load_dotenv
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from pydantic import BaseModel, Field
+from psycopg2.pool import PoolError
+from psycopg_pool import AsyncConnectionPool
+from psycopg2.extensions import (
+  TRANSACTION_STATUS_IDLE,
+  TRANSACTION_STATUS_UNKNOWN
+)
+from src.utils.telemetry import record_queue_wait
 
 load_dotenv()
 
 # ============================= Connect to Database ============================
 DSN = os.getenv("DATABASE_URL")
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_CHECK_SECONDS = float(os.getenv("DB_POOL_CHECK_SECONDS", "30"))
+
+class ConnectionPool:
+  """
+  Thread-safe pool of psycopg2 connections shared by all database helpers.
+
+  Connections are handed out LIFO so the hottest ones stay warm, and the
+  number of connections checked out at once is capped by `max_size`. When
+  every slot is busy, callers wait up to `timeout` seconds for one to be
+  returned instead of opening yet another Postgres backend.
+  """
+  def __init__(
+    self,
+    dsn: str,
+    min_size: int = 1,
+    max_size: int = 10,
+    timeout: float = 30.0,
+    check_seconds: float = 30.0
+  ):
+    """
+    Initialize the pool without connecting yet.
+
+    Args:
+      dsn(str): Postgres connection string.
+      min_size(int): Connections opened eagerly by `open()` and kept idle.
+      max_size(int): Upper bound of connections checked out at once.
+      timeout(float): Seconds to wait for a free connection on checkout.
+      check_seconds(float): A connection idle for longer than this is pinged
+                            with `SELECT 1` before being handed out.
+    """
+    if min_size < 0 or max_size < 1 or min_size > max_size:
+      raise ValueError("Invalid pool size: need 0 <= min_size <= max_size")
+
+    self.dsn = dsn
+    self.min_size = min_size
+    self.max_size = max_size
+    self.timeout = timeout
+    self.check_seconds = check_seconds
+    self.closed = False
+
+    self._idle = deque()
+    self._lock = threading.Lock()
+    self._slots = threading.BoundedSemaphore(max_size)
+
+  # ----------------------------------------------------------------------------
+  def open(self) -> None:
+    """Open `min_size` connections up front so the first requests are warm"""
+    with self._lock:
+      missing = self.min_size - len(self._idle)
+    for _ in range(missing):
+      conn = psycopg2.connect(self.dsn)
+      with self._lock:
+        self._idle.append((conn, time.monotonic()))
+
+  # ----------------------------------------------------------------------------
+  def getconn(self):
+    """
+    Check out a healthy connection, reusing an idle one when possible.
+
+    Raises:
+      PoolError: If the pool is closed or no connection frees up in time.
+    """
+    if self.closed:
+      raise PoolError("connection pool is closed")
+    if not self._slots.acquire(timeout=self.timeout):
+      raise PoolError(
+        f"connection pool exhausted (max_size={self.max_size})"
+      )
+
+    try:
+      while True:
+        with self._lock:
+          item = self._idle.pop() if self._idle else None
+        if item is None:
+          return psycopg2.connect(self.dsn)
+
+        conn, last_used = item
+        if self._is_healthy(conn, last_used):
+          return conn
+        self._discard(conn)
+    except BaseException:
+      self._slots.release()
+      raise
+
+  # ----------------------------------------------------------------------------
+  def putconn(self, conn, discard: bool = False) -> None:
+    """
+    Return a connection to the pool, rolling back any open transaction.
+
+    Args:
+      conn: Connection previously obtained from `getconn()`.
+      discard(bool): Close the connection instead of keeping it idle.
+    """
+    try:
+      if self.closed or discard or conn.closed:
+        self._discard(conn)
+        return
+
+      status = conn.info.transaction_status
+      if status == TRANSACTION_STATUS_UNKNOWN:
+        # Server connection lost
+        self._discard(conn)
+        return
+      if status != TRANSACTION_STATUS_IDLE:
+        # Caller left a transaction open or in error -> reset it
+        try:
+          conn.rollback()
+        except psycopg2.Error:
+          self._discard(conn)
+          return
+
+      with self._lock:
+        self._idle.append((conn, time.monotonic()))
+    finally:
+      self._slots.release()
+
+  # ----------------------------------------------------------------------------
+  def close(self, timeout: Optional[float] = None) -> None:
+    """
+    Drain the pool: refuse new checkouts, wait for the connections still in
+    use to come back (up to `timeout` seconds), then close every connection.
+    """
+    self.closed = True
+    deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+
+    drained = 0
+    while drained < self.max_size:
+      remaining = max(0.0, deadline - time.monotonic())
+      if not self._slots.acquire(timeout=remaining):
+        print(
+          f"Closing pool with {self.max_size - drained} connections in use"
+        )
+        break
+      drained += 1
+
+    with self._lock:
+      idle, self._idle = list(self._idle), deque()
+    for conn, _ in idle:
+      self._discard(conn)
+
+    for _ in range(drained):
+      self._slots.release()
+
+  # ----------------------------------------------------------------------------
+  def stats(self) -> dict:
+    """Return a snapshot of the pool usage"""
+    with self._lock:
+      idle = len(self._idle)
+    return {
+      "min_size": self.min_size,
+      "max_size": self.max_size,
+      "idle": idle,
+      "closed": self.closed
+    }
+
+  # ----------------------------------------------------------------------------
+  def _is_healthy(self, conn, last_used: float) -> bool:
+    """Validate an idle connection before handing it out"""
+    if conn.closed:
+      return False
+    if time.monotonic() - last_used < self.check_seconds:
+      return True
+
+    try:
+      with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+      conn.rollback()
+      return True
+    except psycopg2.Error:
+      return False
+
+  # ----------------------------------------------------------------------------
+  def _discard(self, conn) -> None:
+    try:
+      conn.close()
+    except psycopg2.Error:
+      pass
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_db_pool() -> ConnectionPool:
+  """Return the process-wide connection pool, creating it on first use"""
+  global _pool
+  if _pool is None:
+    with _pool_lock:
+      if _pool is None:
+        _pool = ConnectionPool(
+          DSN,
+          min_size=DB_POOL_MIN_SIZE,
+          max_size=DB_POOL_MAX_SIZE,
+          timeout=DB_POOL_TIMEOUT,
+          check_seconds=DB_POOL_CHECK_SECONDS
+        )
+  return _pool
+
+def close_db_pool(timeout: Optional[float] = None) -> None:
+  """Drain and close the process-wide connection pool (app shutdown)"""
+  global _pool
+  with _pool_lock:
+    pool, _pool = _pool, None
+  if pool is not None:
+    pool.close(timeout)
+
 @contextmanager
 def get_db_connection():
-  conn = psycopg2.connect(DSN)
+  pool = get_db_pool()
+  start = time.perf_counter()
+  conn = pool.getconn()
+  record_queue_wait("db_sync", time.perf_counter() - start)
+  broken = False
   try:
     yield conn
+  except (psycopg2.OperationalError, psycopg2.InterfaceError):
+    broken = True
+    raise
   finally:
-    conn.close()
+    pool.putconn(conn, discard=broken)
+
+# ========================== Async Database Access =============================
+_async_pool: Optional[AsyncConnectionPool] = None
+
+def get_async_db_pool() -> AsyncConnectionPool:
+  """
+  Return the process-wide psycopg 3 async pool used by the request path.
+
+  It is created closed; it is opened by the FastAPI lifespan or lazily by
+  the first `get_async_db_connection()`.
+  """
+  global _async_pool
+  if _async_pool is None:
+    _async_pool = AsyncConnectionPool(
+      DSN or "",
+      min_size=DB_POOL_MIN_SIZE,
+      max_size=DB_POOL_MAX_SIZE,
+      timeout=DB_POOL_TIMEOUT,
+      max_idle=DB_POOL_CHECK_SECONDS * 10,
+      open=False
+    )
+  return _async_pool
+
+async def open_async_db_pool() -> None:
+  """Open the async pool and wait for its `min_size` connections"""
+  pool = get_async_db_pool()
+  if pool.closed:
+    await pool.open(wait=True, timeout=DB_POOL_TIMEOUT)
+
+async def close_async_db_pool() -> None:
+  """Drain and close the async pool (app shutdown)"""
+  global _async_pool
+  pool, _async_pool = _async_pool, None
+  if pool is not None and not pool.closed:
+    await pool.close(timeout=DB_POOL_TIMEOUT)
+
+@asynccontextmanager
+async def get_async_db_connection():
+  pool = get_async_db_pool()
+  if pool.closed:
+    await pool.open()
+  start = time.perf_counter()
+  async with pool.connection() as conn:
+    record_queue_wait("db_async", time.perf_counter() - start)
+    yield conn
+
+@asynccontextmanager
+async def async_advisory_lock(name: str, wait: bool = True):
+  """
+  Hold a Postgres advisory lock named `name` for the duration of the block,
+  e.g. so only one API worker at a time runs startup DDL.
+
+  Args:
+    name(str): Lock name, hashed to the advisory lock key.
+    wait(bool): Wait until the lock is free. With False the block runs at
+                once and receives False if another session holds the lock.
+
+  Yields:
+    bool: Whether the lock is held.
+  """
+  async with get_async_db_connection() as conn:
+    # Poll in autocommit instead of blocking in pg_advisory_lock: a waiting
+    # statement would hold a snapshot and stall CREATE INDEX CONCURRENTLY
+    # run by the lock holder
+    await conn.set_autocommit(True)
+    try:
+      while True:
+        cur = await conn.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+        acquired = (await cur.fetchone())[0]
+        if acquired or not wait:
+          break
+        await asyncio.sleep(0.2)
+      try:
+        yield acquired
+      finally:
+        if acquired:
+          await conn.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+    finally:
+      await conn.set_autocommit(False)
 
 # ============================== Setup ORM types ===============================
 class MenuItems(BaseModel):
@@ -39,7 +343,7 @@ class Orders(BaseModel):
 
 class OrderItems(BaseModel):
   id:                  Optional[int] = None 
-  order_id:            int
+  order_id:            Optional[int] = None
   item_id:             int
   quantity:            int
   customizations:      str
@@ -1,8 +1,26 @@
 # database/ingestion.py
+import os
+import asyncio
 from .menu_items import insertItems
+from .connection import async_advisory_lock
 
-def run_ingestion():
-  
-  csv_path = "/app/data/coffee_house_data.csv" 
-  insertItems(csv_path)
-    
\ No newline at end of file
+MENU_CSV_PATH = os.getenv("MENU_CSV_PATH", "/app/data/coffee_house_data.csv")
+
+def run_ingestion(csv_path: str = MENU_CSV_PATH):
+  """Upsert the menu CSV into menu_items and report what changed, raises on failure"""
+  return insertItems(csv_path)
+
+async def run_ingestion_once(csv_path: str = MENU_CSV_PATH):
+  """
+  Run the ingestion from a single API worker: workers start together and the
+  ones that find it already running skip it (the upsert is one transaction,
+  they keep serving the previous menu until it commits).
+
+  A failed ingestion raises, so the warm-up step is reported as failed
+  rather than as an unchanged menu.
+  """
+  async with async_advisory_lock("menu_ingestion", wait=False) as acquired:
+    if not acquired:
+      print("Menu ingestion is running in another worker, skipped")
+      return None
+    return await asyncio.to_thread(run_ingestion, csv_path)
@@ -0,0 +1,200 @@
+# database/menu_catalog.py
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+from src.utils.helpers import normalize_text
+from src.utils.telemetry import db_timed
+from .connection import MenuItems, get_db_connection
+
+# A background task compares the table fingerprint with the snapshot version
+# every CHECK seconds, so changes made by another process are picked up
+MENU_CATALOG_CHECK_SECONDS = float(os.getenv("MENU_CATALOG_CHECK_SECONDS", "60"))
+
+# ============================== Menu Catalog ==================================
+class MenuCatalog:
+  """
+  Immutable in-memory snapshot of the `menu_items` table.
+
+  The menu is small and changes only when ingestion runs, so every menu
+  lookup is answered from the indexes below instead of a SQL round trip.
+  A new snapshot is built on reload; readers never see a half-built one.
+  """
+  def __init__(self, items: List[MenuItems], version: str):
+    """
+    Build the lookup indexes for a list of menu items.
+
+    Args:
+      items(List[MenuItems]): All rows of `menu_items`, ordered by id.
+      version(str): Fingerprint of the table content the items came from.
+    """
+    self.items = items
+    self.version = version
+    self.loaded_at = time.monotonic()
+
+    self.by_title: Dict[str, MenuItems] = {}
+    self.by_lower_title: Dict[str, List[MenuItems]] = {}
+    self.by_folded_title: Dict[str, List[MenuItems]] = {}
+    self.by_main_category: Dict[str, List[MenuItems]] = {}
+    self.by_sub_category: Dict[str, List[MenuItems]] = {}
+    self.sub_categories: Dict[str, List[str]] = {}
+
+    for item in items:
+      self.by_title.setdefault(item.title, item)
+      self.by_lower_title.setdefault(item.title.lower(), []).append(item)
+      self.by_folded_title.setdefault(normalize_text(item.title), []).append(item)
+      self.by_main_category.setdefault(item.main_category, []).append(item)
+
+      subs = self.sub_categories.setdefault(item.main_category, [])
+      if item.sub_category is not None:
+        self.by_sub_category.setdefault(item.sub_category, []).append(item)
+        if item.sub_category not in subs:
+          subs.append(item.sub_category)
+
+  # ----------------------------------------------------------------------------
+  def find_item(self, title: str) -> Optional[MenuItems]:
+    """Find an item by exact title, falling back to an accent-folded match"""
+    item = self.by_title.get(title)
+    if item is not None:
+      return item
+
+    matches = self.by_folded_title.get(normalize_text(title))
+    return matches[0] if matches else None
+
+  # ----------------------------------------------------------------------------
+  def __len__(self):
+    return len(self.items)
+
+# ============================== Catalog Loading ===============================
+_catalog: Optional[MenuCatalog] = None
+_catalog_lock = threading.Lock()
+_refresher: Optional[asyncio.Task] = None
+
+def _read_version(cur) -> str:
+  """Fingerprint the menu_items content so stale snapshots can be detected"""
+  cur.execute(
+    """
+    SELECT
+      COUNT(*),
+      COALESCE(md5(string_agg(
+        concat_ws('|', id, title, price, image_url, description,
+                  main_category, sub_category),
+        ',' ORDER BY id
+      )), '')
+    FROM menu_items
+    """
+  )
+  count, digest = cur.fetchone()
+  return f"{count}:{digest}"
+
+# ------------------------------------------------------------------------------
+def _clean_sub_category(value):
+  # Rows ingested from pandas store missing sub categories as 'NaN'
+  if value is None or value == "NaN" or value == "":
+    return None
+  return value
+
+# ------------------------------------------------------------------------------
+@db_timed
+def loadMenuCatalog() -> MenuCatalog:
+  """Read the whole menu_items table and build a fresh catalog snapshot"""
+  with get_db_connection() as conn:
+    with conn.cursor() as cur:
+      version = _read_version(cur)
+      cur.execute(
+        """
+        SELECT
+          id, title, price, image_url, description, main_category, sub_category
+        FROM menu_items
+        ORDER BY id
+        """
+      )
+      rows = cur.fetchall()
+
+  items = [
+    MenuItems(
+      id=row[0],
+      title=row[1],
+      price=float(row[2]),
+      image_url=row[3] or "",
+      description=row[4] or "",
+      main_category=row[5],
+      sub_category=_clean_sub_category(row[6])
+    )
+    for row in rows
+  ]
+  print(f"Loaded menu catalog: {len(items)} items (version {version})")
+  return MenuCatalog(items, version)
+
+# ------------------------------------------------------------------------------
+def get_menu_catalog() -> MenuCatalog:
+  """
+  Return the current menu catalog, loading it on first use.
+
+  Once a snapshot exists no database check is made: the server loads it
+  during warm-up and `refreshMenuCatalog` swaps in new snapshots from the
+  background.
+  """
+  global _catalog
+  catalog = _catalog
+  if catalog is not None:
+    return catalog
+
+  with _catalog_lock:
+    if _catalog is None:
+      _catalog = loadMenuCatalog()
+    return _catalog
+
+# ------------------------------------------------------------------------------
+def refreshMenuCatalog() -> MenuCatalog:
+  """
+  Reload the catalog when the menu_items fingerprint no longer matches the
+  snapshot version.
+
+  Blocking (Postgres), run it off the event loop. When the database is
+  unavailable it raises and the old snapshot keeps being served.
+  """
+  global _catalog
+  catalog = _catalog
+  if catalog is None:
+    return get_menu_catalog()
+
+  with get_db_connection() as conn:
+    with conn.cursor() as cur:
+      version = _read_version(cur)
+  if version == catalog.version:
+    return catalog
+  return reloadMenuCatalog()
+
+# ------------------------------------------------------------------------------
+def reloadMenuCatalog() -> MenuCatalog:
+  """Build a new snapshot from Postgres and swap it in (after ingestion)"""
+  global _catalog
+  catalog = loadMenuCatalog()
+  with _catalog_lock:
+    _catalog = catalog
+  return catalog
+
+# ------------------------------------------------------------------------------
+def start_catalog_refresher(interval_seconds: float = MENU_CATALOG_CHECK_SECONDS) -> None:
+  """Run refreshMenuCatalog every `interval_seconds` in a worker thread"""
+  global _refresher
+  async def refresh():
+    while True:
+      await asyncio.sleep(interval_seconds)
+      try:
+        await asyncio.to_thread(refreshMenuCatalog)
+      except Exception as e:
+        print(f"Cannot check menu catalog version, reason: {e}")
+
+  if _refresher is None or _refresher.done():
+    _refresher = asyncio.get_running_loop().create_task(refresh())
+
+async def stop_catalog_refresher() -> None:
+  global _refresher
+  if _refresher is not None:
+    _refresher.cancel()
+    await asyncio.gather(_refresher, return_exceptions=True)
+    _refresher = None
@@ -0,0 +1,410 @@
+# database/menu_embeddings.py
+import os
+import json
+import math
+import zlib
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.helpers import fold_text
+from .connection import MenuItems
+from .menu_catalog import MenuCatalog, get_menu_catalog
+from .menu_search import tokenize
+
+# Built offline by src/scripts/build_menu_embeddings.py: <path>.*.npy + <path>.json
+MENU_EMBEDDINGS_PATH = os.getenv("MENU_EMBEDDINGS_PATH", "/app/data/menu_embeddings")
+MENU_EMBEDDING_DIM = int(os.getenv("MENU_EMBEDDING_DIM", str(2 ** 18)))
+# Share of the request (IDF-weighted words) an item must satisfy
+MENU_RECOMMEND_MIN_COVERAGE = float(os.getenv("MENU_RECOMMEND_MIN_COVERAGE", "0.5"))
+
+# English words customers mix in, mapped to the folded words of the menu
+QUERY_GLOSSARY = {
+  "sweet": "ngot", "less": "it", "little": "it", "bitter": "dang", "sour": "chua",
+  "salty": "man", "creamy": "beo", "strong": "dam", "light": "nhe",
+  "fresh": "tuoi", "refreshing": "sang khoai", "hot": "nong", "iced": "da",
+  "ice": "da", "cold": "da", "coffee": "ca phe", "tea": "tra", "milk": "sua",
+  "coconut": "dua", "peach": "dao", "lychee": "vai", "strawberry": "dau",
+  "orange": "cam", "lemongrass": "sa", "kumquat": "quat", "apricot": "mo",
+  "cheese": "pho mai", "cake": "banh", "fruit": "trai cay", "fruity": "trai cay",
+  "pearl": "tran chau", "pearls": "tran chau", "boba": "tran chau",
+  "butter": "bo", "black": "den", "green": "xanh", "sugar": "duong",
+  "not": "khong", "without": "khong", "no": "khong"
+}
+# Words of the request itself ("tôi muốn uống gì đó..."), not of the drink
+QUERY_STOPWORDS = {
+  "toi", "minh", "ban", "em", "anh", "chi", "muon", "can", "thich", "goi", "y",
+  "cho", "xin", "gi", "do", "nao", "co", "mon", "uong", "an", "thu", "loai",
+  "vi", "ly", "coc", "mot", "cai", "la", "thi", "va", "voi", "nhe", "nha",
+  "a", "vay", "duoc", "hon", "nhat", "hay", "qua", "lam", "hoi", "too", "very",
+  "so", "something", "anything", "with",
+  "want", "like", "would", "please", "drink", "drinks", "some", "any", "the",
+  "i", "me", "for", "and", "or", "of", "is", "are"
+}
+# "ít ngọt", "không đường": the next word is what the customer avoids
+NEGATIONS = {"it", "khong"}
+# Weight of an avoided word relative to a wanted one
+NEGATION_WEIGHT = 1.0
+
+def embedding_tokens(text: str) -> List[str]:
+  """Folded words of `text`, glossary words replaced by their Vietnamese"""
+  tokens = []
+  for token in tokenize(text):
+    tokens.extend(QUERY_GLOSSARY.get(token, token).split())
+  return tokens
+
+def embedding_features(text: str) -> Tuple[List[str], List[str], List[str]]:
+  """
+  Split `text` into what it asks for and what it avoids.
+
+  The word after a negation is avoided and left out of the features, so
+  "ít ngọt" in a description does not make an item sweet. Stopwords are
+  dropped.
+
+  Returns:
+    tuple: (words, words and word pairs, negated words).
+  """
+  words, negated = [], []
+  pending = False
+  for token in embedding_tokens(text):
+    if token in NEGATIONS:
+      pending = True
+    elif token in QUERY_STOPWORDS:
+      continue
+    elif pending:
+      negated.append(token)
+      pending = False
+    else:
+      words.append(token)
+  return words, words + [f"{a} {b}" for a, b in zip(words, words[1:])], negated
+
+def feature_slot(feature: str, dim: int) -> Tuple[int, float]:
+  """
+  Signed hashing slot of a feature. crc32 is stable across processes
+  (unlike `hash`), so vectors built offline match the queries at runtime.
+  """
+  code = zlib.crc32(feature.encode("utf-8"))
+  return code % dim, 1.0 if code & 0x80000000 else -1.0
+
+def hashed_counts(features: Sequence[str], dim: int) -> Counter:
+  """(slot, sign) -> count of the features"""
+  return Counter(feature_slot(feature, dim) for feature in features)
+
+def item_text(item: MenuItems) -> str:
+  """Text embedded for an item, the title counts twice"""
+  return " ".join([
+    item.title, item.title, item.main_category, item.sub_category or "", item.description
+  ])
+
+# ============================ Menu Embedding Index ============================
+class MenuEmbeddingIndex:
+  """
+  Hashed TF-IDF vectors of the menu items, L2-normalized, stored sparse.
+
+  An item has a few dozen non-zero slots out of MENU_EMBEDDING_DIM, so the
+  vectors are kept slot-major: for every slot, the rows using it and their
+  values (`slot_ptr`, `slot_rows`, `slot_values`). A query then only reads
+  the slots of its own words, and 100k items take tens of MB instead of a
+  dense rows x dim matrix.
+
+  Items are ranked by how much of the request they satisfy (coverage):
+  the IDF-weighted share of the wanted words they contain plus of the
+  avoided words ("ít ngọt") they do not. Cosine similarity orders items
+  of equal coverage.
+  """
+  def __init__(
+    self,
+    slot_ptr: np.ndarray,
+    slot_rows: np.ndarray,
+    slot_values: np.ndarray,
+    idf: np.ndarray,
+    items: List[MenuItems],
+    version: str
+  ):
+    """
+    Args:
+      slot_ptr(np.ndarray): (dim + 1,) offsets of each slot in slot_rows.
+      slot_rows(np.ndarray): Rows having a value in the slot, per slot.
+      slot_values(np.ndarray): float32 values matching slot_rows.
+      idf(np.ndarray): (dim,) inverse document frequency of each slot.
+      items(List[MenuItems]): Item of each row.
+      version(str): Version of the catalog the rows were computed from.
+    """
+    self.slot_ptr = slot_ptr
+    self.slot_rows = slot_rows
+    self.slot_values = slot_values
+    self.idf = idf
+    self.items = items
+    self.version = version
+    self.dim = len(idf)
+
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for row, item in enumerate(items):
+      groups.setdefault(("main_category", item.main_category), []).append(row)
+      if item.sub_category is not None:
+        groups.setdefault(("sub_category", item.sub_category), []).append(row)
+    self.category_rows = {key: np.array(rows) for key, rows in groups.items()}
+
+  # ----------------------------------------------------------------------------
+  @classmethod
+  def build(cls, items: List[MenuItems], version: str, dim: int = MENU_EMBEDDING_DIM) -> "MenuEmbeddingIndex":
+    """Compute the vectors of `items` (sublinear tf, smoothed idf)"""
+    counts = [hashed_counts(embedding_features(item_text(item))[1], dim) for item in items]
+
+    doc_freq = np.zeros(dim, dtype=np.float32)
+    for item_counts in counts:
+      for slot in {slot for slot, _ in item_counts}:
+        doc_freq[slot] += 1
+    # Words no item contains say nothing about the menu, they get no weight
+    idf = np.where(doc_freq > 0, np.log((1 + len(items)) / (1 + doc_freq)) + 1, 0).astype(np.float32)
+
+    slots, rows, values = [], [], []
+    for row, item_counts in enumerate(counts):
+      vector: Dict[int, float] = {}
+      for (slot, sign), tf in item_counts.items():
+        vector[slot] = vector.get(slot, 0.0) + sign * (1 + math.log(tf)) * float(idf[slot])
+      norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+      for slot, value in vector.items():
+        if value:
+          slots.append(slot)
+          rows.append(row)
+          values.append(value / norm)
+
+    slots = np.array(slots, dtype=np.int64)
+    order = np.argsort(slots, kind="stable")
+    slot_ptr = np.zeros(dim + 1, dtype=np.int64)
+    np.cumsum(np.bincount(slots, minlength=dim), out=slot_ptr[1:])
+    return cls(
+      slot_ptr,
+      np.array(rows, dtype=np.int32)[order],
+      np.array(values, dtype=np.float32)[order],
+      idf, items, version
+    )
+
+  # ----------------------------------------------------------------------------
+  def save(self, path: str) -> None:
+    """Write `<path>.{ptr,rows,values,idf}.npy` and `<path>.json` (metadata)"""
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    for name, array in self.arrays().items():
+      np.save(f"{path}.{name}.npy", np.ascontiguousarray(array))
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+      json.dump({
+        "version": self.version,
+        "dim": self.dim,
+        "item_ids": [item.id for item in self.items]
+      }, f)
+
+  def arrays(self) -> Dict[str, np.ndarray]:
+    return {"ptr": self.slot_ptr, "rows": self.slot_rows, "values": self.slot_values, "idf": self.idf}
+
+  # ----------------------------------------------------------------------------
+  @classmethod
+  def load(cls, path: str, catalog: MenuCatalog) -> Optional["MenuEmbeddingIndex"]:
+    """
+    Memory-map the vectors written by `save`.
+
+    Returns:
+      MenuEmbeddingIndex | None: None when the files are missing or were
+      computed from another version of the menu.
+    """
+    files = [f"{path}.{name}.npy" for name in ("ptr", "rows", "values", "idf")]
+    if not all(os.path.exists(file) for file in files + [f"{path}.json"]):
+      return None
+
+    with open(f"{path}.json", encoding="utf-8") as f:
+      meta = json.load(f)
+    if meta["version"] != catalog.version or meta["item_ids"] != [item.id for item in catalog.items]:
+      print(f"Menu embeddings at {path} are stale (version {meta['version']})")
+      return None
+
+    slot_ptr, slot_rows, slot_values, idf = (np.load(file, mmap_mode="r") for file in files)
+    return cls(slot_ptr, slot_rows, slot_values, idf, catalog.items, catalog.version)
+
+  # ----------------------------------------------------------------------------
+  def embed(self, text: str) -> Tuple[Dict[int, float], Dict[int, float], Dict[int, float]]:
+    """
+    Sparse query vectors of a request, slot -> value:
+
+    - vector: unit TF-IDF vector of its features, avoided words negative.
+    - wanted: IDF of each word asked for; a word no item contains gets the
+      highest IDF, so "cam on ban" is not covered by "cam" alone.
+    - avoided: IDF of each negated word.
+    """
+    words, features, negated = embedding_features(text)
+    unknown_idf = math.log(1 + len(self.items)) + 1
+
+    vector: Dict[int, float] = {}
+    for (slot, sign), tf in hashed_counts(features, self.dim).items():
+      if self.idf[slot]:
+        vector[slot] = vector.get(slot, 0.0) + sign * (1 + math.log(tf)) * float(self.idf[slot])
+    avoided: Dict[int, float] = {}
+    for slot, sign in {feature_slot(word, self.dim) for word in negated}:
+      if self.idf[slot]:
+        avoided[slot] = NEGATION_WEIGHT * float(self.idf[slot])
+        vector[slot] = vector.get(slot, 0.0) - sign * avoided[slot]
+    wanted = {
+      slot: float(self.idf[slot]) or unknown_idf
+      for slot, _ in {feature_slot(word, self.dim) for word in words}
+    }
+
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {slot: value / norm for slot, value in vector.items()}, wanted, avoided
+
+  def score(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (coverage, cosine similarity) of every item for a batch of requests,
+    as (queries, items) matrices. Coverage is the IDF share of the wanted
+    words an item contains plus of the avoided words it does not; zero for
+    a request without any known word.
+
+    The query vectors are stacked into one sparse matrix and multiplied
+    with the slot-major item vectors in a single pass.
+    """
+    n_queries, n_items = len(queries), len(self.items)
+    # (query, slot, vector value, coverage weight) of every non-zero slot
+    entries = []
+    totals = np.ones(n_queries)
+    avoided_totals = np.zeros(n_queries)
+    for query, text in enumerate(queries):
+      vector, wanted, avoided = self.embed(text)
+      total = sum(wanted.values()) + sum(avoided.values())
+      if not vector or not total:
+        continue
+      totals[query], avoided_totals[query] = total, sum(avoided.values())
+      for slot in vector.keys() | wanted.keys() | avoided.keys():
+        entries.append((query, slot, vector.get(slot, 0.0), wanted.get(slot, 0.0) - avoided.get(slot, 0.0)))
+
+    similarity = np.zeros(n_queries * n_items)
+    coverage = np.zeros(n_queries * n_items)
+    if entries:
+      query_ids, slots, values, weights = (np.array(column) for column in zip(*entries))
+      starts = self.slot_ptr[slots]
+      lengths = self.slot_ptr[slots + 1] - starts
+      # Every entry expanded to the positions of its slot in slot_rows
+      positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+      cells = np.repeat(query_ids * n_items, lengths) + self.slot_rows[positions]
+      similarity = np.bincount(cells, np.repeat(values, lengths) * self.slot_values[positions], n_queries * n_items)
+      coverage = np.bincount(cells, np.repeat(weights, lengths), n_queries * n_items)
+
+    coverage = coverage.reshape(n_queries, n_items)
+    coverage += avoided_totals[:, None]
+    coverage /= totals[:, None]
+    return coverage, similarity.reshape(n_queries, n_items)
+
+  # ----------------------------------------------------------------------------
+  def top_k(
+    self,
+    queries: Sequence[str],
+    k: int = 5,
+    rows: Optional[np.ndarray] = None,
+    min_coverage: float = MENU_RECOMMEND_MIN_COVERAGE
+  ) -> List[List[Tuple[MenuItems, float]]]:
+    """
+    Rank items for a batch of queries, by coverage then cosine similarity.
+
+    All queries are scored in one sparse product, then `argpartition`
+    picks the best `k` of every row.
+
+    Args:
+      queries(Sequence[str]): Customer requests.
+      k(int): Results per query.
+      rows(np.ndarray): Restrict the ranking to these rows (e.g. a category).
+      min_coverage(float): Drop items satisfying less of the request.
+
+    Returns:
+      List[List[Tuple[MenuItems, float]]]: Best items first with their
+      score (coverage + similarity), per query.
+    """
+    coverage, similarity = self.score(queries)
+    if rows is None:
+      rows = np.arange(len(self.items))
+    else:
+      rows = np.asarray(rows)
+      coverage, similarity = coverage[:, rows], similarity[:, rows]
+    # Negated scores, in place: the matrices are queries x items
+    ranks = np.negative(similarity, out=similarity)
+    ranks -= coverage
+    ranks[coverage < min_coverage - 1e-6] = np.inf
+
+    if len(rows) > k:
+      best = np.argpartition(ranks, k - 1, axis=1)[:, :k]
+    else:
+      best = np.broadcast_to(np.arange(len(rows)), (len(queries), len(rows)))
+
+    results = []
+    for query, candidates in enumerate(best):
+      candidates = candidates[np.isfinite(ranks[query, candidates])]
+      # Best score first, lowest row (catalog order) on ties
+      candidates = candidates[np.lexsort((candidates, ranks[query, candidates]))]
+      results.append([(self.items[rows[i]], -float(ranks[query, i])) for i in candidates])
+    return results
+
+  # ----------------------------------------------------------------------------
+  def __len__(self):
+    return len(self.items)
+
+# ------------------------------------------------------------------------------
+_index: Optional[MenuEmbeddingIndex] = None
+_index_lock = threading.Lock()
+
+def get_menu_embedding_index() -> MenuEmbeddingIndex:
+  """
+  Return the embeddings of the current catalog: the offline files when they
+  match the catalog version, otherwise vectors built in memory.
+  """
+  global _index
+  catalog = get_menu_catalog()
+  index = _index
+  if index is not None and index.version == catalog.version:
+    return index
+
+  with _index_lock:
+    if _index is None or _index.version != catalog.version:
+      index = MenuEmbeddingIndex.load(MENU_EMBEDDINGS_PATH, catalog)
+      if index is None:
+        index = MenuEmbeddingIndex.build(catalog.items, catalog.version)
+        print(f"Menu embeddings built in memory for {len(index)} items")
+      _index = index
+    return _index
+
+# ================================ Recommending =================================
+def recommendMenuItems(query: str, category: Optional[Dict] = None, limit: int = 5) -> List[List]:
+  """
+  Recommend items whose description is closest to a free-text request.
+
+  Args:
+    query(str): Customer request, e.g. "trà trái cây ít ngọt".
+    category(dict): QueryClassifier result to rank within that category.
+    limit(int): Maximum number of results.
+
+  Returns:
+    list: [title, price, description, image_url] rows, best match first.
+  """
+  try:
+    index = get_menu_embedding_index()
+    rows = None
+    if category is not None:
+      rows = index.category_rows.get((category["type"], category["keyword"]))
+      if rows is None:
+        return []
+      # Rank on what the customer said besides the category name
+      query = fold_text(query).replace(fold_text(category["keyword"]), " ")
+    matches = index.top_k([query], limit, rows)[0]
+  except Exception as e:
+    print(f"Cannot recommend menu items, reason: {e}")
+    return []
+
+  return [
+    [item.title, item.price, item.description, item.image_url]
+    for item, _ in matches
+  ]
+
+# ------------------------------------------------------------------------------
+def prepareMenuEmbeddings() -> None:
+  """Load (or build) the embeddings of the current menu ahead of requests"""
+  index = get_menu_embedding_index()
+  print(f"Menu embeddings: {len(index)} items, {len(index.slot_rows)} non-zero slots")
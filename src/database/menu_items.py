@@ -1,43 +1,206 @@
 # database/menu_items.py
-import pandas as pd
+import csv
 from typing import List, Dict
-from .connection import get_db_connection
+from src.utils.telemetry import db_timed
+from .connection import get_db_connection, get_async_db_connection
+from .menu_catalog import get_menu_catalog, reloadMenuCatalog
+from .menu_sampler import get_menu_sampler
 
 # ============================== CRUD: Menu Items ==============================
-def insertItems(data_path: str):
+MENU_COLUMNS = ["title", "price", "image_url", "description", "main_category", "sub_category"]
+
+def ensureMenuSchema(cur) -> None:
+  """
+  Upgrade menu_items created by older versions of init_db.sql: add the
+  content_hash column and make title unique so rows can be upserted.
+  Duplicate titles are merged into the lowest id first, re-pointing any
+  order_items that referenced the duplicates.
+  """
+  # ALTER TABLE locks menu_items exclusively, only run it when needed
+  cur.execute(
+    """
+    SELECT
+      EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'menu_items' AND column_name = 'content_hash'
+      ),
+      to_regclass('menu_items_title_key') IS NOT NULL
+    """
+  )
+  has_hash, has_title_key = cur.fetchone()
+  if not has_hash:
+    cur.execute("ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS content_hash CHAR(32)")
+  if has_title_key:
+    return
+
+  cur.execute(
+    """
+    CREATE TEMP TABLE menu_items_duplicates ON COMMIT DROP AS
+    SELECT id, MIN(id) OVER (PARTITION BY title) AS keep_id
+    FROM menu_items
+    """
+  )
+  cur.execute(
+    """
+    UPDATE order_items oi SET item_id = d.keep_id
+    FROM menu_items_duplicates d
+    WHERE oi.item_id = d.id AND d.id <> d.keep_id
+    """
+  )
+  cur.execute(
+    """
+    DELETE FROM menu_items m
+    USING menu_items_duplicates d
+    WHERE m.id = d.id AND d.id <> d.keep_id
+    """
+  )
+  cur.execute("CREATE UNIQUE INDEX menu_items_title_key ON menu_items (title)")
+
+# ------------------------------------------------------------------------------
+@db_timed
+def insertItems(data_path: str, delete_missing: bool = True) -> Dict[str, int]:
+  """
+  Bulk-ingest a menu CSV: stream it into a staging table with COPY, then
+  upsert into menu_items by title.
+
+  A content hash is computed per row so unchanged rows are not rewritten.
+  Items missing from the CSV are deleted unless an order references them
+  (those are kept and counted as `retained`).
+
+  Args:
+    data_path(str): CSV with the columns of MENU_COLUMNS (any order).
+    delete_missing(bool): Remove items that are no longer in the CSV.
+
+  Returns:
+    dict: Counts of inserted, updated, unchanged, deleted and retained rows.
+
+  Raises:
+    Exception: The ingestion failed and was rolled back; the menu is unchanged.
+  """
+  counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "retained": 0}
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        # Check data existed or not
-        cur.execute("SELECT COUNT(*) FROM menu_items")
-        if cur.fetchone()[0] > 0:
-          print("Data already exists in menu_items. Skipping ingestion.")
-          return
-        
-        # If data not existed -> ingest data into db
-        df = pd.read_csv(data_path)
-        for _, row in df.iterrows():
+    with open(data_path, encoding="utf-8", newline="") as f:
+      header = next(csv.reader(f))
+      missing = set(MENU_COLUMNS) - set(header)
+      if missing:
+        raise ValueError(f"CSV is missing columns: {sorted(missing)}")
+      f.seek(0)
+
+      with get_db_connection() as conn:
+        with conn.cursor() as cur:
+          ensureMenuSchema(cur)
+
+          # Stream the raw CSV into a staging table, extra columns are ignored
+          copy_columns = [
+            column if column in MENU_COLUMNS else f"extra_{index}"
+            for index, column in enumerate(header)
+          ]
+          extra_columns = "".join(
+            f", {column} TEXT" for column in copy_columns if column not in MENU_COLUMNS
+          )
           cur.execute(
+            f"""
+            CREATE TEMP TABLE menu_items_staging (
+              seq             BIGSERIAL,
+              title           TEXT,
+              price           NUMERIC(10, 2),
+              image_url       TEXT,
+              description     TEXT,
+              main_category   TEXT,
+              sub_category    TEXT{extra_columns}
+            ) ON COMMIT DROP
             """
-            INSERT INTO menu_items (
-              title, price, image_url, description, main_category, sub_category
-            ) VALUES (%s, %s, %s, %s, %s, %s)
+          )
+          cur.copy_expert(
+            f"""
+            COPY menu_items_staging ({", ".join(copy_columns)})
+            FROM STDIN WITH (FORMAT csv, HEADER true)
             """,
-            (
-              row["title"],
-              row["price"], 
-              row["image_url"],
-              row["description"],
-              row["main_category"],
-              row["sub_category"]
+            f
+          )
+
+          # Last occurrence of a title wins, hash the content of each row
+          cur.execute(
+            """
+            CREATE TEMP TABLE menu_items_incoming ON COMMIT DROP AS
+            SELECT
+              title, price, image_url, description, main_category, sub_category,
+              md5(concat_ws('|', title, price, image_url, description,
+                            main_category, sub_category)) AS content_hash
+            FROM (
+              SELECT DISTINCT ON (title)
+                title, price, image_url, description, main_category,
+                NULLIF(NULLIF(sub_category, ''), 'NaN') AS sub_category
+              FROM menu_items_staging
+              WHERE title IS NOT NULL
+              ORDER BY title, seq DESC
+            ) latest
+            """
+          )
+          cur.execute("SELECT COUNT(*) FROM menu_items_incoming")
+          incoming = cur.fetchone()[0]
+
+          # Upsert only the rows whose content changed
+          cur.execute(
+            """
+            INSERT INTO menu_items (
+              title, price, image_url, description, main_category, sub_category,
+              content_hash
             )
+            SELECT
+              title, price, image_url, description, main_category, sub_category,
+              content_hash
+            FROM menu_items_incoming
+            ON CONFLICT (title) DO UPDATE SET
+              price = EXCLUDED.price,
+              image_url = EXCLUDED.image_url,
+              description = EXCLUDED.description,
+              main_category = EXCLUDED.main_category,
+              sub_category = EXCLUDED.sub_category,
+              content_hash = EXCLUDED.content_hash
+            WHERE menu_items.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            RETURNING (xmax = 0) AS inserted
+            """
           )
-      conn.commit()
-    print("Insert values successfully!")
+          for (inserted,) in cur.fetchall():
+            counts["inserted" if inserted else "updated"] += 1
+          counts["unchanged"] = incoming - counts["inserted"] - counts["updated"]
+
+          if delete_missing:
+            cur.execute(
+              """
+              DELETE FROM menu_items m
+              WHERE NOT EXISTS (
+                SELECT 1 FROM menu_items_incoming i WHERE i.title = m.title
+              )
+              AND NOT EXISTS (
+                SELECT 1 FROM order_items oi WHERE oi.item_id = m.id
+              )
+              """
+            )
+            counts["deleted"] = cur.rowcount
+            cur.execute(
+              """
+              SELECT COUNT(*) FROM menu_items m
+              WHERE NOT EXISTS (
+                SELECT 1 FROM menu_items_incoming i WHERE i.title = m.title
+              )
+              """
+            )
+            counts["retained"] = cur.fetchone()[0]
+        conn.commit()
+
+    if counts["inserted"] or counts["updated"] or counts["deleted"]:
+      reloadMenuCatalog()
+    print(f"Menu ingestion finished: {counts}")
+    return counts
   except Exception as e:
     print(f"Cannot insert values, reason: {e}")
+    raise
     
 # ------------------------------------------------------------------------------
+@db_timed
 def fetchMenuItems():
   try:
     with get_db_connection() as conn:
@@ -62,122 +225,112 @@ def fetchMenuItems():
 def getExactItem(item_name):
   """Return exact information of an item by its name"""
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
-          """
-          SELECT
-            title, price, description, image_url
-          FROM menu_items
-          WHERE title = %s
-          """, (item_name,)
-        )
-        row = cur.fetchone()
-        return list(row)
+    item = get_menu_catalog().find_item(item_name)
+    if item is None:
+      raise LookupError(f"'{item_name}' is not on the menu")
+    return [item.title, item.price, item.description, item.image_url]
   except Exception as e:
     return [f"Error: {e}", 0, ""]
 
 # ---------------------------------------------------------------------------- 
 def getSubCategories(main_cat):
-  """Return exact information of an item by its name"""
+  """Return the sub categories of a main category"""
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
-          """
-          SELECT 
-            DISTINCT sub_category
-          FROM menu_items
-          WHERE main_category = %s
-          """, (main_cat,)
-        )
-        rows = cur.fetchall()
-        return [r[0] for r in rows if r[0] is not None]
+    return list(get_menu_catalog().sub_categories.get(main_cat, []))
   except Exception as e:
     return [f"Error: {e}"]
 
 # ------------------------------------------------------------------------------  
 def getTopItemsFromMain(main_cat):
-  """Recommend top 5 items from main category if it has no subcategories"""
+  """Recommend 5 items (popular ones more often) from a main category without subcategories"""
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        # Check if has subcategories
-        cur.execute(
-          """
-          SELECT 
-            COUNT(DISTINCT sub_category)
-          FROM menu_items
-          WHERE main_category = %s
-          AND sub_category != 'NaN'
-          """, (main_cat,)
-        )
-        count = cur.fetchone()[0]
-        if count == 0:
-          # No subcategories, return items directly
-          cur.execute(
-            """
-            SELECT 
-              title, price, description, image_url
-            FROM menu_items
-            WHERE main_category = %s
-            ORDER BY RANDOM()
-            LIMIT 5
-            """, (main_cat,)
-          )
-          rows = cur.fetchall()
-          rows = [list(r) for r in rows]
-          return rows
-        else:
-          # Has subcategories, return them
-          return getSubCategories(main_cat)
+    catalog = get_menu_catalog()
+    if catalog.sub_categories.get(main_cat):
+      # Has subcategories, return them
+      return list(catalog.sub_categories[main_cat])
+
+    # No subcategories, return items directly
+    return [
+      [item.title, item.price, item.description, item.image_url]
+      for item in get_menu_sampler().sample(("main_category", main_cat), 5)
+    ]
   except Exception as e:
     return [(f"Error: {e}", 0, "")]
 
 # ------------------------------------------------------------------------------
 def getTopItemsFromSub(sub_cat):
-  """Recommend top 5 items from sub category"""
+  """Recommend 5 items (popular ones more often) from a sub category"""
   try:
-      with get_db_connection() as conn:
-        with conn.cursor() as cur:
-          cur.execute(
-            """
-            SELECT title, price, description, image_url
-            FROM menu_items
-            WHERE sub_category = %s
-            ORDER BY RANDOM()
-            LIMIT 5
-            """, (sub_cat,)
-          )
-          rows = cur.fetchall()
-          rows = [list(r) for r in rows]
-          return rows
+    return [
+      [item.title, item.price, item.description, item.image_url]
+      for item in get_menu_sampler().sample(("sub_category", sub_cat), 5)
+    ]
   except Exception as e:
     return [(f"Error: {e}", 0, "")]
 
 # ------------------------------------------------------------------------------ 
 def getMenuItemsByTitle(item_name: str) -> List[Dict]:
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
+    items = get_menu_catalog().by_lower_title.get(item_name.lower(), [])
+    return [
+      {
+        "id": item.id,
+        "title": item.title,
+        "price": item.price
+      }
+      for item in items
+    ]
+  except Exception as e:
+    print(f"Error fetching item by title: {e}")
+    return []
+
+# ------------------------------------------------------------------------------
+async def findMenuItemsByTitles(item_names: List[str]) -> Dict[str, Dict]:
+  """
+  Resolve many titles (case-insensitive) from the menu catalog, asking
+  Postgres only for names the catalog does not know (e.g. an item added
+  since the last snapshot).
+
+  Returns:
+    dict: Requested name -> {"id", "title", "price"} for names on the menu.
+  """
+  found = {}
+  try:
+    catalog = get_menu_catalog()
+    for name in item_names:
+      items = catalog.by_lower_title.get(name.lower())
+      if items:
+        found[name] = {"id": items[0].id, "title": items[0].title, "price": items[0].price}
+  except Exception as e:
+    print(f"Menu catalog unavailable, resolving titles in Postgres: {e}")
+
+  missing = [name for name in item_names if name not in found]
+  if missing:
+    found.update(await getMenuItemsByTitlesAsync(missing))
+  return found
+
+# ------------------------------------------------------------------------------
+@db_timed
+async def getMenuItemsByTitlesAsync(item_names: List[str]) -> Dict[str, Dict]:
+  """Resolve many titles (case-insensitive) in a single query"""
+  try:
+    async with get_async_db_connection() as conn:
+      async with conn.cursor() as cur:
+        await cur.execute(
           """
-          SELECT 
-            id, title, price 
-          FROM menu_items
-          WHERE LOWER(title) = LOWER(%s)
-          """, (item_name,)
+          SELECT
+            requested.name, m.id, m.title, m.price
+          FROM unnest(%s::text[]) AS requested(name)
+          JOIN menu_items m ON LOWER(m.title) = LOWER(requested.name)
+          ORDER BY m.id
+          """, (list(item_names),)
         )
-        rows = cur.fetchall()
-        
-        return [
-          {
-            "id": row[0],
-            "title": row[1],
-            "price": row[2]
-          }
-          for row in rows
-        ]
+        rows = await cur.fetchall()
   except Exception as e:
-    print(f"Error fetching item by title: {e}")
-    return []
\ No newline at end of file
+    print(f"Error fetching items by titles: {e}")
+    return {}
+
+  found = {}
+  for name, item_id, title, price in rows:
+    found.setdefault(name, {"id": item_id, "title": title, "price": price})
+  return found
@@ -0,0 +1,233 @@
+# database/menu_sampler.py
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .connection import MenuItems
+from .menu_catalog import MenuCatalog, get_menu_catalog
+from .order_items import getItemPopularity
+
+# Weight of an item = prior + ordered quantity, so new items still show up
+MENU_POPULARITY_PRIOR = float(os.getenv("MENU_POPULARITY_PRIOR", "3"))
+# A background task adds new order_items rows every REFRESH seconds and
+# recounts everything every FULL_REFRESH seconds (cancellations, late commits)
+MENU_POPULARITY_REFRESH_SECONDS = float(os.getenv("MENU_POPULARITY_REFRESH_SECONDS", "60"))
+MENU_POPULARITY_FULL_REFRESH_SECONDS = float(os.getenv("MENU_POPULARITY_FULL_REFRESH_SECONDS", "3600"))
+
+PoolKey = Tuple[str, str]
+
+# ================================ Alias Table =================================
+class AliasTable:
+  """
+  Walker/Vose alias table: draws an index with probability proportional to
+  its weight in O(1), after an O(n) build.
+  """
+  def __init__(self, weights: List[float]):
+    count = len(weights)
+    total = sum(weights)
+    self.prob = [1.0] * count
+    self.alias = list(range(count))
+    if not count or total <= 0:
+      return
+
+    scaled = [weight * count / total for weight in weights]
+    small = [index for index, value in enumerate(scaled) if value < 1.0]
+    large = [index for index, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+      lower, upper = small.pop(), large.pop()
+      self.prob[lower] = scaled[lower]
+      self.alias[lower] = upper
+      scaled[upper] -= 1.0 - scaled[lower]
+      (small if scaled[upper] < 1.0 else large).append(upper)
+    # Leftovers are 1.0 up to rounding errors
+    for index in small + large:
+      self.prob[index] = 1.0
+
+  # ----------------------------------------------------------------------------
+  def draw(self, rng: random.Random) -> int:
+    index = int(rng.random() * len(self.prob))
+    return index if rng.random() < self.prob[index] else self.alias[index]
+
+# ================================ Menu Sampler ================================
+class MenuSampler:
+  """
+  Popularity-weighted recommendations per main and sub category.
+
+  Every category keeps its items and an alias table over their weights,
+  so a recommendation costs O(k) draws whatever the category size. When
+  new orders come in, only the tables of the categories holding the
+  ordered items are rebuilt.
+  """
+  def __init__(
+    self,
+    catalog: MenuCatalog,
+    popularity: Dict[int, int],
+    last_order_item_id: int = 0,
+    counted_at: Optional[float] = None
+  ):
+    """
+    Args:
+      catalog(MenuCatalog): Menu snapshot the pools are built from.
+      popularity(Dict[int, int]): Ordered quantity per item id.
+      last_order_item_id(int): Highest order_items id counted in `popularity`.
+      counted_at(float): time.monotonic() of the full count `popularity`
+                         comes from, None if order_items was never counted.
+    """
+    self.version = catalog.version
+    self.popularity = dict(popularity)
+    self.last_order_item_id = last_order_item_id
+    self.counted_at = counted_at
+
+    self.pools: Dict[PoolKey, List[MenuItems]] = {}
+    self.pool_keys: Dict[int, List[PoolKey]] = {}
+    for name, items in catalog.by_main_category.items():
+      self.pools[("main_category", name)] = items
+    for name, items in catalog.by_sub_category.items():
+      self.pools[("sub_category", name)] = items
+    for key, items in self.pools.items():
+      for item in items:
+        self.pool_keys.setdefault(item.id, []).append(key)
+
+    self.tables: Dict[PoolKey, AliasTable] = {key: self.build_table(key) for key in self.pools}
+
+  # ----------------------------------------------------------------------------
+  def weight(self, item: MenuItems) -> float:
+    return MENU_POPULARITY_PRIOR + self.popularity.get(item.id, 0)
+
+  def build_table(self, key: PoolKey) -> AliasTable:
+    return AliasTable([self.weight(item) for item in self.pools[key]])
+
+  # ----------------------------------------------------------------------------
+  def add_popularity(self, counts: Dict[int, int], last_order_item_id: int) -> int:
+    """
+    Add newly ordered quantities and rebuild the affected tables only.
+
+    Returns:
+      int: Number of rebuilt category tables.
+    """
+    self.last_order_item_id = max(self.last_order_item_id, last_order_item_id)
+    touched = set()
+    for item_id, quantity in counts.items():
+      self.popularity[item_id] = self.popularity.get(item_id, 0) + quantity
+      touched.update(self.pool_keys.get(item_id, ()))
+
+    # Swap in new tables: concurrent readers keep using the old ones
+    for key in touched:
+      self.tables[key] = self.build_table(key)
+    return len(touched)
+
+  # ----------------------------------------------------------------------------
+  def sample(self, key: PoolKey, k: int = 5, rng: Optional[random.Random] = None) -> List[MenuItems]:
+    """
+    Draw up to `k` distinct items of a category, popular ones more often.
+
+    Args:
+      key(PoolKey): ("main_category" | "sub_category", name).
+      k(int): Number of items.
+      rng(random.Random): Source of randomness, the `random` module by default.
+
+    Returns:
+      List[MenuItems]: Distinct items, empty for an unknown category.
+    """
+    rng = rng or random
+    items = self.pools.get(key, [])
+    if len(items) <= k:
+      return rng.sample(items, len(items))
+
+    table = self.tables[key]
+    chosen, picked = [], set()
+    # Duplicates are redrawn; the attempt cap keeps heavily skewed pools O(k)
+    for _ in range(8 * k):
+      index = table.draw(rng)
+      if index not in picked:
+        picked.add(index)
+        chosen.append(items[index])
+        if len(chosen) == k:
+          return chosen
+
+    rest = [index for index in range(len(items)) if index not in picked]
+    rest.sort(key=lambda index: self.weight(items[index]), reverse=True)
+    return chosen + [items[index] for index in rest[:k - len(chosen)]]
+
+# ============================== Sampler Loading ===============================
+_sampler: Optional[MenuSampler] = None
+_sampler_lock = threading.Lock()
+_refresher: Optional[asyncio.Task] = None
+
+def get_menu_sampler() -> MenuSampler:
+  """
+  Return the sampler of the current catalog, without reading order data.
+
+  When the menu changes, the pools are rebuilt with the popularity counted
+  so far; `refreshMenuPopularity` keeps the weights current in the
+  background.
+  """
+  global _sampler
+  catalog = get_menu_catalog()
+  sampler = _sampler
+  if sampler is not None and sampler.version == catalog.version:
+    return sampler
+
+  with _sampler_lock:
+    sampler = _sampler
+    if sampler is None:
+      _sampler = MenuSampler(catalog, {})
+    elif sampler.version != catalog.version:
+      _sampler = MenuSampler(catalog, sampler.popularity, sampler.last_order_item_id, sampler.counted_at)
+    return _sampler
+
+# ------------------------------------------------------------------------------
+def refreshMenuPopularity() -> MenuSampler:
+  """
+  Count order_items into the sampler: a full recount on the first run and
+  every MENU_POPULARITY_FULL_REFRESH_SECONDS, otherwise only the rows added
+  since the last refresh (none at all while nobody has ordered).
+
+  Blocking (Postgres), run it off the event loop. When order data is
+  unavailable it raises and the known weights are kept.
+  """
+  global _sampler
+  sampler = get_menu_sampler()
+  full = (
+    sampler.counted_at is None
+    or time.monotonic() - sampler.counted_at >= MENU_POPULARITY_FULL_REFRESH_SECONDS
+  )
+  if full:
+    counted_at = time.monotonic()
+    popularity, last_id = getItemPopularity()
+    refreshed = MenuSampler(get_menu_catalog(), popularity, last_id, counted_at)
+    with _sampler_lock:
+      _sampler = refreshed
+    print(f"Menu sampler: {len(refreshed.pools)} pools, {sum(popularity.values())} ordered items")
+    return refreshed
+
+  counts, last_id = getItemPopularity(sampler.last_order_item_id)
+  if counts:
+    rebuilt = sampler.add_popularity(counts, last_id)
+    print(f"Menu sampler: {sum(counts.values())} new ordered items, {rebuilt} pools rebuilt")
+  return sampler
+
+# ------------------------------------------------------------------------------
+def start_popularity_refresher(interval_seconds: float = MENU_POPULARITY_REFRESH_SECONDS) -> None:
+  """Run refreshMenuPopularity every `interval_seconds` in a worker thread"""
+  global _refresher
+  async def refresh():
+    while True:
+      await asyncio.sleep(interval_seconds)
+      try:
+        await asyncio.to_thread(refreshMenuPopularity)
+      except Exception as e:
+        print(f"Menu popularity refresh failed, reason: {e}")
+
+  if _refresher is None or _refresher.done():
+    _refresher = asyncio.get_running_loop().create_task(refresh())
+
+async def stop_popularity_refresher() -> None:
+  global _refresher
+  if _refresher is not None:
+    _refresher.cancel()
+    await asyncio.gather(_refresher, return_exceptions=True)
+    _refresher = None
@@ -0,0 +1,385 @@
+# database/menu_search.py
+import os
+import re
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.helpers import fold_text
+from src.utils.telemetry import db_timed
+from .connection import MenuItems, get_db_connection
+from .menu_catalog import get_menu_catalog, _clean_sub_category
+
+# "memory" searches the catalog snapshot, "pg_trgm" asks Postgres (large menus)
+MENU_SEARCH_BACKEND = os.getenv("MENU_SEARCH_BACKEND", "memory").lower()
+# Share of a title (IDF-weighted words) the query must name to match it
+MENU_SEARCH_MIN_TITLE_COVERAGE = float(os.getenv("MENU_SEARCH_MIN_TITLE_COVERAGE", "0.5"))
+MENU_SEARCH_TRGM_THRESHOLD = float(os.getenv("MENU_SEARCH_TRGM_THRESHOLD", "0.4"))
+
+# BM25 parameters, term frequencies are weighted per field
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"title": 3.0, "category": 2.0, "description": 1.0}
+# Rare or unknown query words stand for vocabulary terms at least this
+# similar (half of their trigrams in common); words in more than
+# FUZZY_MAX_DOC_SHARE of the items are common words, never expanded
+FUZZY_TERM_SIMILARITY = 0.34
+FUZZY_MIN_WORD_LENGTH = 3
+FUZZY_MAX_DOC_SHARE = 0.1
+# Weights of the title coverage and of the share of title trigrams in the query
+TITLE_COVERAGE_WEIGHT = 3.0
+TITLE_TRIGRAM_WEIGHT = 3.0
+# A misspelled title (e.g. "bac siu") matches on this share of its trigrams
+TITLE_TRIGRAM_MIN_SHARE = 0.6
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+  """Accent-folded lowercase words of `text`"""
+  return TOKEN_PATTERN.findall(fold_text(text or ""))
+
+def word_trigrams(word: str) -> set:
+  """Trigrams of a word padded with one space on each side"""
+  padded = f" {word} "
+  return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ============================== Menu Search Index =============================
+class MenuSearchIndex:
+  """
+  Accent-insensitive fuzzy search over titles, categories and descriptions.
+
+  Scores combine BM25 over folded words with how much of a title the query
+  names, so "bac siu" still finds "Bạc Xỉu" and "capuchino" finds
+  "Cappuccino". Every posting carries its precomputed BM25 weight: a query
+  only adds up the postings of its words.
+
+  Descriptions and categories only help ranking. An item is returned when
+  the query names its title: words (or close spellings) covering at least
+  MENU_SEARCH_MIN_TITLE_COVERAGE of the title, every query word found in
+  the title, or most of the title trigrams. One shared word is not enough,
+  so "cam on ban" does not return "Trà Đào Cam Sả".
+  """
+  def __init__(self, items: List[MenuItems], version: str = ""):
+    """
+    Build the postings for a list of menu items.
+
+    Args:
+      items(List[MenuItems]): Items to search, usually a catalog snapshot.
+      version(str): Version of the catalog the items came from.
+    """
+    self.items = items
+    self.version = version
+
+    # Catalogs repeat texts (shared descriptions, categories), fold each once
+    token_cache: Dict[str, List[str]] = {}
+    def tokens_of(text: str) -> List[str]:
+      tokens = token_cache.get(text)
+      if tokens is None:
+        tokens = token_cache[text] = tokenize(text)
+      return tokens
+
+    frequencies = []
+    for item in items:
+      weighted = Counter()
+      for token in tokens_of(item.title):
+        weighted[token] += FIELD_WEIGHTS["title"]
+      for token in tokens_of(f"{item.main_category} {item.sub_category or ''}"):
+        weighted[token] += FIELD_WEIGHTS["category"]
+      for token in tokens_of(item.description):
+        weighted[token] += FIELD_WEIGHTS["description"]
+      frequencies.append(weighted)
+
+    lengths = [sum(weighted.values()) for weighted in frequencies]
+    avg_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+    doc_freq = Counter(term for weighted in frequencies for term in weighted)
+
+    # term -> (item indexes, BM25 weights)
+    postings: Dict[str, Tuple[list, list]] = {}
+    for index, weighted in enumerate(frequencies):
+      norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[index] / (avg_length or 1.0))
+      for term, tf in weighted.items():
+        df = doc_freq[term]
+        idf = math.log(1 + (len(items) - df + 0.5) / (df + 0.5))
+        indexes, weights = postings.setdefault(term, ([], []))
+        indexes.append(index)
+        weights.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+    self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+      term: (np.array(indexes, dtype=np.int32), np.array(weights, dtype=np.float32))
+      for term, (indexes, weights) in postings.items()
+    }
+    self.common_doc_freq = max(1.0, FUZZY_MAX_DOC_SHARE * len(items))
+
+    # title word -> item indexes; a title's coverage adds up the IDF of the
+    # words the query names, over the IDF of all its words
+    title_items: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+      for term in set(tokens_of(item.title)):
+        title_items.setdefault(term, []).append(index)
+    self.title_postings: Dict[str, np.ndarray] = {
+      term: np.array(indexes, dtype=np.int32) for term, indexes in title_items.items()
+    }
+    self.title_idf: Dict[str, float] = {
+      term: math.log(1 + (len(items) - len(indexes) + 0.5) / (len(indexes) + 0.5))
+      for term, indexes in title_items.items()
+    }
+    title_idf_totals = np.zeros(len(items), dtype=np.float32)
+    for term, indexes in self.title_postings.items():
+      title_idf_totals[indexes] += self.title_idf[term]
+    self.title_idf_totals = np.where(title_idf_totals > 0, title_idf_totals, 1)
+
+    # trigram -> vocabulary terms, to map misspelled words onto known ones
+    self.term_trigram_counts: Dict[str, int] = {}
+    self.trigram_terms: Dict[str, List[str]] = {}
+    for term in self.postings:
+      grams = word_trigrams(term)
+      self.term_trigram_counts[term] = len(grams)
+      for gram in grams:
+        self.trigram_terms.setdefault(gram, []).append(term)
+
+    # trigram -> item indexes, over titles only
+    title_trigram_counts = []
+    trigram_titles: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+      grams = set()
+      for word in tokens_of(item.title):
+        grams |= word_trigrams(word)
+      title_trigram_counts.append(len(grams) or 1)
+      for gram in grams:
+        trigram_titles.setdefault(gram, []).append(index)
+
+    self.title_trigram_counts = np.array(title_trigram_counts, dtype=np.float32)
+    self.trigram_titles: Dict[str, np.ndarray] = {
+      gram: np.array(indexes, dtype=np.int32)
+      for gram, indexes in trigram_titles.items()
+    }
+
+  # ----------------------------------------------------------------------------
+  def similar_terms(self, word: str) -> List[Tuple[str, float]]:
+    """Vocabulary terms whose trigram similarity to `word` is high enough"""
+    grams = word_trigrams(word)
+    shared = Counter()
+    for gram in grams:
+      shared.update(self.trigram_terms.get(gram, ()))
+
+    similar = []
+    for term, count in shared.items():
+      similarity = count / (len(grams) + self.term_trigram_counts[term] - count)
+      if similarity >= FUZZY_TERM_SIMILARITY:
+        similar.append((term, similarity))
+    return similar
+
+  def expand(self, word: str) -> List[Tuple[str, float]]:
+    """
+    Vocabulary terms a query word stands for. Title words and common words
+    (e.g. "khong", which would otherwise match "hong") stand for themselves,
+    rare or unknown words also for their close spellings.
+    """
+    exact = [(word, 1.0)] if word in self.postings else []
+    if (
+      len(word) < FUZZY_MIN_WORD_LENGTH
+      or word in self.title_postings
+      or (exact and len(self.postings[word][0]) > self.common_doc_freq)
+    ):
+      return exact
+    return self.similar_terms(word)
+
+  # ----------------------------------------------------------------------------
+  def search(self, query: str, limit: int = 5) -> List[Tuple[MenuItems, float]]:
+    """
+    Rank the items matching a free-text query.
+
+    Args:
+      query(str): Customer wording, with or without accents.
+      limit(int): Maximum number of results.
+
+    Returns:
+      List[Tuple[MenuItems, float]]: Best items first, with their score.
+    """
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words:
+      return []
+
+    scores = np.zeros(len(self.items), dtype=np.float32)
+    # Per item: words of the query found in the title, and title words named
+    query_coverage = np.zeros(len(self.items), dtype=np.float32)
+    named_terms = set()
+    for word in words:
+      in_title = np.zeros(len(self.items), dtype=bool)
+      for term, similarity in self.expand(word):
+        indexes, weights = self.postings[term]
+        scores[indexes] += similarity * weights
+        if term in self.title_postings:
+          in_title[self.title_postings[term]] = True
+          named_terms.add(term)
+      query_coverage += in_title
+    query_coverage /= len(words)
+
+    title_coverage = np.zeros(len(self.items), dtype=np.float32)
+    for term in named_terms:
+      title_coverage[self.title_postings[term]] += self.title_idf[term]
+    title_coverage /= self.title_idf_totals
+    scores += TITLE_COVERAGE_WEIGHT * (title_coverage + query_coverage) / 2
+
+    query_grams = set()
+    for word in words:
+      query_grams |= word_trigrams(word)
+    shared = np.zeros(len(self.items), dtype=np.float32)
+    for gram in query_grams:
+      indexes = self.trigram_titles.get(gram)
+      if indexes is not None:
+        shared[indexes] += 1
+    share = shared / self.title_trigram_counts
+    scores += TITLE_TRIGRAM_WEIGHT * share
+
+    named = (
+      (title_coverage >= MENU_SEARCH_MIN_TITLE_COVERAGE)
+      | (query_coverage >= 1)
+      | (share >= TITLE_TRIGRAM_MIN_SHARE)
+    )
+    candidates = np.flatnonzero(named)
+    if len(candidates) > limit:
+      candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    # Best score first, lowest index (catalog order) on ties
+    candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return [(self.items[index], float(scores[index])) for index in candidates]
+
+  # ----------------------------------------------------------------------------
+  def __len__(self):
+    return len(self.items)
+
+# ------------------------------------------------------------------------------
+_index: Optional[MenuSearchIndex] = None
+_index_lock = threading.Lock()
+
+def get_menu_search_index() -> MenuSearchIndex:
+  """Return the search index of the current catalog, rebuilt when it changes"""
+  global _index
+  catalog = get_menu_catalog()
+  index = _index
+  if index is not None and index.version == catalog.version:
+    return index
+
+  with _index_lock:
+    if _index is None or _index.version != catalog.version:
+      _index = MenuSearchIndex(catalog.items, catalog.version)
+    return _index
+
+# ============================== pg_trgm Search ================================
+# translate() table matching fold_text, usable in an immutable index expression.
+# Upper case letters are listed too: lower() leaves them alone on SQL_ASCII
+# databases
+_FOLDED = {
+  ch: fold_text(ch)
+  for ch in map(chr, range(0xC0, 0x1F00))
+  if ch.isalpha() and len(fold_text(ch)) == 1 and fold_text(ch).isascii()
+}
+FOLD_FROM = "".join(_FOLDED)
+FOLD_TO = "".join(_FOLDED.values())
+
+SEARCH_DOCUMENT = "menu_search_fold(title || ' ' || main_category || ' ' || COALESCE(sub_category, ''))"
+
+def ensureMenuSearchSchema(cur) -> None:
+  """Install pg_trgm, the folding function and the trigram index"""
+  cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+  cur.execute(
+    """
+    CREATE OR REPLACE FUNCTION menu_search_fold(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT translate(lower($1), %s, %s) $$
+    """, (FOLD_FROM, FOLD_TO)
+  )
+  cur.execute(
+    f"""
+    CREATE INDEX IF NOT EXISTS menu_items_search_trgm_idx
+    ON menu_items USING gin ({SEARCH_DOCUMENT} gin_trgm_ops)
+    """
+  )
+
+# ------------------------------------------------------------------------------
+@db_timed
+def searchMenuItemsTrgm(query: str, limit: int = 5) -> List[Tuple[MenuItems, float]]:
+  """
+  Rank menu items with pg_trgm word similarity on folded titles and
+  categories. The GIN index keeps this cheap on large catalogs.
+  """
+  with get_db_connection() as conn:
+    with conn.cursor() as cur:
+      cur.execute(
+        "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+        (str(MENU_SEARCH_TRGM_THRESHOLD),)
+      )
+      cur.execute(
+        f"""
+        SELECT
+          id, title, price, image_url, description, main_category, sub_category,
+          word_similarity(menu_search_fold(%(query)s), {SEARCH_DOCUMENT}) AS score
+        FROM menu_items
+        WHERE menu_search_fold(%(query)s) <%% {SEARCH_DOCUMENT}
+        ORDER BY
+          score DESC,
+          word_similarity(menu_search_fold(%(query)s), menu_search_fold(title)) DESC,
+          id
+        LIMIT %(limit)s
+        """, {"query": query, "limit": limit}
+      )
+      rows = cur.fetchall()
+    conn.commit()
+
+  return [
+    (
+      MenuItems(
+        id=row[0],
+        title=row[1],
+        price=float(row[2]),
+        image_url=row[3] or "",
+        description=row[4] or "",
+        main_category=row[5],
+        sub_category=_clean_sub_category(row[6])
+      ),
+      float(row[7])
+    )
+    for row in rows
+  ]
+
+# ================================= Searching ==================================
+def searchMenuItems(query: str, limit: int = 5) -> List[List]:
+  """
+  Fuzzy menu search for queries the classifier could not place.
+
+  Returns:
+    list: [title, price, description, image_url] rows, best match first.
+  """
+  try:
+    if MENU_SEARCH_BACKEND == "pg_trgm":
+      try:
+        matches = searchMenuItemsTrgm(query, limit)
+      except Exception as e:
+        print(f"pg_trgm menu search failed, using the in-memory index: {e}")
+        matches = get_menu_search_index().search(query, limit)
+    else:
+      matches = get_menu_search_index().search(query, limit)
+  except Exception as e:
+    print(f"Cannot search the menu, reason: {e}")
+    return []
+
+  return [
+    [item.title, item.price, item.description, item.image_url]
+    for item, _ in matches
+  ]
+
+# ------------------------------------------------------------------------------
+def prepareMenuSearch() -> None:
+  """Build the in-memory index, or the pg_trgm index in Postgres"""
+  if MENU_SEARCH_BACKEND == "pg_trgm":
+    with get_db_connection() as conn:
+      with conn.cursor() as cur:
+        ensureMenuSearchSchema(cur)
+      conn.commit()
+    print("Menu search: pg_trgm index ready")
+  else:
+    index = get_menu_search_index()
+    print(f"Menu search: in-memory index over {len(index)} items")
@@ -1,26 +1,39 @@
 # database/order_items.py
-from .connection import OrderItems
+from typing import Dict, Tuple
+from src.utils.telemetry import db_timed
 from .connection import get_db_connection
 
 # ============================== CRUD: Order Items =============================
-def insertOrderItem(item: OrderItems) -> None:
+@db_timed
+def getItemPopularity(after_id: int = 0) -> Tuple[Dict[int, int], int]:
+  """
+  Ordered quantity per menu item, over the order_items rows added after
+  `after_id` (cancelled orders are skipped).
+
+  Args:
+    after_id(int): Highest order_items id already counted, 0 for all rows.
+
+  Returns:
+    tuple: ({item_id: quantity}, highest order_items id counted so far).
+  """
   try:
     with get_db_connection() as conn:
       with conn.cursor() as cur:
         cur.execute(
           """
-          INSERT INTO order_items (
-            order_id, item_id, quantity, customizations
-          ) VALUES (%s, %s, %s, %s)
-          """,
-          (
-            item.order_id,
-            item.item_id,
-            item.quantity,
-            item.customizations
-          )
+          SELECT
+            oi.item_id, SUM(oi.quantity), MAX(oi.id)
+          FROM order_items oi
+          JOIN orders o ON o.id = oi.order_id
+          WHERE oi.id > %s AND o.status <> 'cancelled'
+          GROUP BY oi.item_id
+          """, (after_id,)
         )
-        conn.commit()
+        rows = cur.fetchall()
   except Exception as e:
-    print(f"Cannot insert order item, reason: {e}")
-    raise
\ No newline at end of file
+    print(f"Cannot read item popularity, reason: {e}")
+    raise
+
+  counts = {item_id: int(quantity) for item_id, quantity, _ in rows}
+  last_id = max([after_id] + [max_id for _, _, max_id in rows])
+  return counts, last_id
@@ -1,63 +1,89 @@
 # database/orders.py
-from .connection import Orders
-from .connection import get_db_connection
+from typing import List
+from src.utils.telemetry import db_timed
+from .connection import Orders, OrderItems
+from .connection import get_async_db_connection
 
 # ================================ CRUD: Order =================================
-def insertOrder(orders: Orders) -> int:
+@db_timed
+async def insertOrderWithItemsAsync(orders: Orders, items: List[OrderItems]) -> int:
+  """
+  Insert an order and all of its items in one transaction.
+
+  Either the whole order lands or nothing does; the `order_id` of the items
+  is filled in from the new order, and all items go in one round trip via a
+  pipelined executemany.
+
+  Returns:
+    int: Id of the new order.
+  """
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
-          """
-          INSERT INTO orders (
-            customer_id, status, total_price, order_time
-          ) VALUES (%s, %s, %s, %s)
-          RETURNING id
-          """,
-          (
-            orders.customer_id,
-            orders.status,
-            orders.total_price,
-            orders.order_time
+    async with get_async_db_connection() as conn:
+      async with conn.transaction():
+        async with conn.cursor() as cur:
+          await cur.execute(
+            """
+            INSERT INTO orders (
+              customer_id, status, total_price, order_time
+            ) VALUES (%s, %s, %s, %s)
+            RETURNING id
+            """,
+            (
+              orders.customer_id,
+              orders.status,
+              orders.total_price,
+              orders.order_time
+            )
           )
-        )
-        order_id = cur.fetchone()[0]
-        conn.commit()
-        print(f"Insert order {order_id} successfully!")
-        return order_id
+          order_id = (await cur.fetchone())[0]
+          await cur.executemany(
+            """
+            INSERT INTO order_items (
+              order_id, item_id, quantity, customizations
+            ) VALUES (%s, %s, %s, %s)
+            """,
+            [
+              (order_id, item.item_id, item.quantity, item.customizations)
+              for item in items
+            ]
+          )
+      print(f"Insert order {order_id} with {len(items)} items successfully!")
+      return order_id
   except Exception as e:
-    print(f"Cannot insert order {id}, reason: {e}")
+    print(f"Cannot insert order for {orders.customer_id}, reason: {e}")
     raise
 
-# ------------------------------------------------------------------------------  
-def updateOrderStatus(order_id: int, new_status: str) -> None:
+# ------------------------------------------------------------------------------
+@db_timed
+async def updateOrderStatusAsync(order_id: int, new_status: str) -> None:
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
+    async with get_async_db_connection() as conn:
+      async with conn.cursor() as cur:
+        await cur.execute(
           """
-          UPDATE order SET status = %s WHERE id = order_id
+          UPDATE orders SET status = %s WHERE id = %s
           """, (new_status, order_id)
         )
-        conn.commit()
+        await conn.commit()
   except Exception as e:
     print(f"Cannot update order status, reason: {e}")
     raise
 
-# ------------------------------------------------------------------------------ 
-def getOrderStatus(order_id: int) -> dict | None:
+# ------------------------------------------------------------------------------
+@db_timed
+async def getOrderStatusAsync(order_id: int) -> dict | None:
   try:
-    with get_db_connection() as conn:
-      with conn.cursor() as cur:
-        cur.execute(
+    async with get_async_db_connection() as conn:
+      async with conn.cursor() as cur:
+        await cur.execute(
           """
           SELECT
             id, status, total_price
-          FROM order
+          FROM orders
           WHERE id = %s
           """, (order_id,)
         )
-        row = cur.fetchone()
+        row = await cur.fetchone()
         if row:
           return {
             "id": row[0],
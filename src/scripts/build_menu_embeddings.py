@@ -0,0 +1,33 @@
+# scripts/build_menu_embeddings.py
+"""
+Compute the menu embeddings offline from the current menu_items table.
+
+The API memory-maps <output>.{ptr,rows,values,idf}.npy when <output>.json
+matches the menu version, and builds the vectors in memory otherwise.
+
+Usage:
+  python -m src.scripts.build_menu_embeddings [--output PATH] [--dim N]
+"""
+import time
+import argparse
+
+from src.database.menu_catalog import loadMenuCatalog
+from src.database.menu_embeddings import MENU_EMBEDDINGS_PATH, MENU_EMBEDDING_DIM, MenuEmbeddingIndex
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Build the menu embeddings")
+  parser.add_argument("--output", default=MENU_EMBEDDINGS_PATH, help="Path without extension")
+  parser.add_argument("--dim", type=int, default=MENU_EMBEDDING_DIM, help="Hashed feature slots")
+  args = parser.parse_args()
+
+  catalog = loadMenuCatalog()
+  start = time.perf_counter()
+  index = MenuEmbeddingIndex.build(catalog.items, catalog.version, args.dim)
+  index.save(args.output)
+  print(
+    f"Saved {len(index)} embeddings ({len(index.slot_rows)} non-zero slots) to {args.output}.* "
+    f"in {time.perf_counter() - start:.2f}s (menu version {catalog.version})"
+  )
+
+if __name__ == "__main__":
+  main()
@@ -6,9 +6,12 @@ CREATE TABLE IF NOT EXISTS menu_items (
   image_url       TEXT,
   description     TEXT,
   main_category   VARCHAR(100) NOT NULL,
-  sub_category    VARCHAR(100)
+  sub_category    VARCHAR(100),
+  content_hash    CHAR(32)
 );
 
+CREATE UNIQUE INDEX IF NOT EXISTS menu_items_title_key ON menu_items (title);
+
 -- Orders table
 CREATE TABLE IF NOT EXISTS orders (
   id                SERIAL PRIMARY KEY,
@@ -27,3 +30,12 @@ CREATE TABLE IF NOT EXISTS order_items (
   customizations    TEXT
 );
 
+-- Chat sessions table (shared by every API worker)
+CREATE TABLE IF NOT EXISTS chat_sessions (
+  session_id        VARCHAR(64) PRIMARY KEY,
+  customer_id       VARCHAR(255) NOT NULL,
+  created_at        TIMESTAMP NOT NULL DEFAULT NOW(),
+  last_activity     TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS chat_sessions_last_activity_idx ON chat_sessions (last_activity);
@@ -0,0 +1,136 @@
+# utils/gemini_cache.py
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from pydantic import PrivateAttr
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import HumanMessage, SystemMessage
+
+GEMINI_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600"))
+
+# ============================ PROMPT PREFIX CACHING ===========================
+class CachedPrefixGemini(ChatGoogleGenerativeAI):
+  """
+  Gemini chat model that serves the static system prompt and the tool
+  declarations from an explicit context cache (CachedContent).
+
+  The first SystemMessage of a request is the cacheable prefix. Its cache is
+  created once per prefix + tool set and renewed before the TTL expires.
+  Requests then only send the conversation; later system messages (the
+  short customer context) are sent as user content, because a request on
+  cached content cannot carry its own system instruction.
+
+  If the cache cannot be created (e.g. the prefix is below the model's
+  minimum cacheable size) the request is sent unchanged and Gemini's
+  implicit prefix caching still applies to the byte-identical prefix.
+
+  The blocking CreateCachedContent call runs once per prefix, outside the
+  lock. On the event loop (ainvoke / astream) it runs in a worker thread and
+  the request goes out without the new cache instead of waiting for it.
+  """
+  prompt_cache_ttl: int = GEMINI_CACHE_TTL_SECONDS
+  _prompt_caches: Dict[str, tuple] = PrivateAttr(default_factory=dict)
+  _prompt_cache_pending: Dict[str, Future] = PrivateAttr(default_factory=dict)
+  _prompt_cache_lock: Any = PrivateAttr(default_factory=threading.Lock)
+  _cache_client: Any = PrivateAttr(default=None)
+
+  # ----------------------------------------------------------------------------
+  def _prepare_request(self, messages, **kwargs):
+    if (
+      not messages or not isinstance(messages[0], SystemMessage)
+      or kwargs.get("cached_content") or self.cached_content
+    ):
+      return super()._prepare_request(messages, **kwargs)
+
+    conversation = [
+      HumanMessage(content=m.content) if isinstance(m, SystemMessage) else m
+      for m in messages[1:]
+    ]
+    request = super()._prepare_request([messages[0]] + conversation, **kwargs)
+    cache_name = self.prompt_cache_for(request)
+    if cache_name is None:
+      return request
+
+    pb = type(request).pb(request)
+    for field in ("system_instruction", "tools", "tool_config"):
+      pb.ClearField(field)
+    request.cached_content = cache_name
+    return request
+
+  # ----------------------------------------------------------------------------
+  def prompt_cache_for(self, request) -> Optional[str]:
+    """Name of the CachedContent holding this request's prefix, None if unavailable"""
+    from google.ai.generativelanguage_v1beta import CachedContent
+
+    pb = type(request).pb(request)
+    digest = hashlib.sha256(
+      pb.system_instruction.SerializeToString(deterministic=True)
+      + b"".join(t.SerializeToString(deterministic=True) for t in pb.tools)
+      + pb.tool_config.SerializeToString(deterministic=True)
+    ).hexdigest()
+
+    with self._prompt_cache_lock:
+      now = time.time()
+      cached = self._prompt_caches.get(digest)
+      # Renew a minute early so a request never races the expiry
+      if cached is not None and cached[1] - 60 > now:
+        return cached[0]
+      future = self._prompt_cache_pending.get(digest)
+      creating = future is None
+      if creating:
+        future = self._prompt_cache_pending[digest] = Future()
+
+    if creating:
+      # Copied now: the caller strips the prefix from the request afterwards
+      content = CachedContent(
+        model=self.model,
+        system_instruction=request.system_instruction,
+        tools=list(request.tools),
+        tool_config=request.tool_config if pb.HasField("tool_config") else None,
+        ttl=timedelta(seconds=self.prompt_cache_ttl)
+      )
+
+    try:
+      loop = asyncio.get_running_loop()
+    except RuntimeError:
+      loop = None
+    if loop is None:
+      if creating:
+        self.create_prompt_cache(digest, content, future)
+      return future.result()
+
+    if creating:
+      loop.run_in_executor(None, self.create_prompt_cache, digest, content, future)
+    # Never block the loop: keep the old cache while it lasts, else send the
+    # full prefix this time
+    return cached[0] if cached is not None and cached[1] > now else None
+
+  # ----------------------------------------------------------------------------
+  def create_prompt_cache(self, digest: str, content, future: Future) -> None:
+    """Create the CachedContent of a prefix (blocking gRPC call)"""
+    from google.ai.generativelanguage_v1beta import CacheServiceClient
+
+    try:
+      with self._prompt_cache_lock:
+        if self._cache_client is None:
+          api_key = self.google_api_key.get_secret_value() if self.google_api_key else None
+          self._cache_client = CacheServiceClient(client_options={"api_key": api_key})
+        client = self._cache_client
+      cache = client.create_cached_content(cached_content=content)
+      print(f"Created Gemini prompt cache {cache.name}")
+      entry = (cache.name, time.time() + self.prompt_cache_ttl)
+    except Exception as e:
+      # Do not retry on every request, wait for the next TTL window
+      print(f"Cannot create Gemini prompt cache, reason: {e}")
+      entry = (None, time.time() + self.prompt_cache_ttl)
+
+    with self._prompt_cache_lock:
+      self._prompt_caches[digest] = entry
+      del self._prompt_cache_pending[digest]
+    future.set_result(entry[0])
@@ -1,7 +1,117 @@
 # utils/helpers.py
-import re
 import unicodedata
+from collections import deque
 
+def normalize_text(text):
+  """
+  Normalize text by removing Vietnamese accents, converting to lowercase,
+  and trimming whitespace.
+
+  This enables accent-insensitive and case-insensitive matching.
+
+  Args: 
+    text(str): Input text to normalize.
+
+  Returns:
+    str: Normalized text.
+  """
+  # Convert Vietnamese to accent-free + lowercase for robust matching
+  text = unicodedata.normalize('NFD', text)
+  text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+  return text.lower().strip()
+
+# ------------------------------------------------------------------------------
+def fold_text(text):
+  """
+  `normalize_text` that also folds "đ" to "d".
+
+  "đ" has no combining mark to strip, so "duong den" does not equal the
+  normalized "Đường Đen"; search code folds it as customers type it.
+  """
+  return normalize_text(text).replace("đ", "d")
+
+# ------------------------------------------------------------------------------
+class AhoCorasick:
+  """
+  Multi-pattern string matcher (Aho-Corasick automaton).
+
+  All patterns are compiled into one trie with failure links, so every
+  occurrence of every pattern in a text is found in a single left-to-right
+  pass, independent of how many patterns there are.
+  """
+  def __init__(self):
+    self.goto = [{}]
+    self.fail = [0]
+    self.output = [[]]
+    self.built = True
+
+  # ----------------------------------------------------------------------------
+  def add(self, pattern, value):
+    """
+    Register a pattern and the value reported when it matches.
+
+    Args:
+      pattern(str): Non-empty string to search for.
+      value: Payload yielded by `iter_matches` for this pattern.
+    """
+    if not pattern:
+      raise ValueError("Pattern must be a non-empty string")
+
+    state = 0
+    for ch in pattern:
+      nxt = self.goto[state].get(ch)
+      if nxt is None:
+        nxt = len(self.goto)
+        self.goto[state][ch] = nxt
+        self.goto.append({})
+        self.fail.append(0)
+        self.output.append([])
+      state = nxt
+    self.output[state].append((len(pattern), value))
+    self.built = False
+
+  # ----------------------------------------------------------------------------
+  def build(self):
+    """Compute failure links (breadth-first) and merge outputs along them"""
+    queue = deque()
+    for nxt in self.goto[0].values():
+      self.fail[nxt] = 0
+      queue.append(nxt)
+
+    while queue:
+      state = queue.popleft()
+      for ch, nxt in self.goto[state].items():
+        queue.append(nxt)
+        fallback = self.fail[state]
+        while fallback and ch not in self.goto[fallback]:
+          fallback = self.fail[fallback]
+        self.fail[nxt] = self.goto[fallback].get(ch, 0)
+        if self.fail[nxt] == nxt:
+          self.fail[nxt] = 0
+        self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+    self.built = True
+
+  # ----------------------------------------------------------------------------
+  def iter_matches(self, text):
+    """
+    Yield every (start, end, value) match in `text`, overlapping included.
+
+    `start` is inclusive and `end` exclusive, so `text[start:end]` is the
+    matched pattern.
+    """
+    if not self.built:
+      self.build()
+
+    goto, fail, output = self.goto, self.fail, self.output
+    state = 0
+    for i, ch in enumerate(text):
+      while state and ch not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(ch, 0)
+      for length, value in output[state]:
+        yield i + 1 - length, i + 1, value
+
+# ------------------------------------------------------------------------------
 class QueryClassifier:
   """
   Classifies customer queries into menu-related intents for a coffee shop
@@ -30,25 +140,12 @@ class QueryClassifier:
     """
     self.mappings = mappings
     self.main_cats, self.sub_cats, self.items = self.build_lookup_tables()
+    self.matcher = self.build_matcher()
   
   # ----------------------------------------------------------------------------
   def normalize_text(self, text):
-    """
-    Normalize text by removing Vietnamese accents, converting to lowercase,
-    and trimming whitespace.
-
-    This enables accent-insensitive and case-insensitive matching.
-
-    Args: 
-      text(str): Input text to normalize.
-
-    Returns:
-      str: Normalized text.
-    """
-    # Convert Vietnamese to accent-free + lowercase for robust matching
-    text = unicodedata.normalize('NFD', text)
-    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
-    return text.lower().strip()
+    """Accent-free, lowercase form of `text` (see module `normalize_text`)"""
+    return normalize_text(text)
 
   # ----------------------------------------------------------------------------
   def build_lookup_tables(self):
@@ -69,6 +166,41 @@ class QueryClassifier:
           items.add(drink)
     return main_cats, sub_cats, items
 
+  # ----------------------------------------------------------------------------
+  def build_matcher(self):
+    """
+    Pre-normalize every menu name once and compile them all into a single
+    Aho-Corasick automaton.
+
+    Items match as plain substrings, while sub and main categories must sit
+    on word boundaries (a short category name like "Bánh" should not match
+    inside another word).
+
+    Returns:
+      AhoCorasick: Automaton whose values are (priority, keyword, bounded).
+    """
+    matcher = AhoCorasick()
+    tiers = [
+      (0, self.items, False),
+      (1, self.sub_cats, True),
+      (2, self.main_cats, True)
+    ]
+    for priority, names, bounded in tiers:
+      for name in sorted(names):
+        norm_name = normalize_text(name)
+        if norm_name:
+          matcher.add(norm_name, (priority, name, bounded))
+    matcher.build()
+    return matcher
+
+  # ----------------------------------------------------------------------------
+  @staticmethod
+  def is_word_boundary(text, index):
+    """Mirror regex `\\b`: a word char on exactly one side of `index`"""
+    before = index > 0 and (text[index - 1].isalnum() or text[index - 1] == "_")
+    after = index < len(text) and (text[index].isalnum() or text[index] == "_")
+    return before != after
+
   # ----------------------------------------------------------------------------
   def classify_query(self, query):
     """
@@ -79,6 +211,8 @@ class QueryClassifier:
     2. Sub-category
     3. Main category
 
+    Within the same priority the longest match wins, then the leftmost.
+
     Args:
       query(str): User input query.
 
@@ -89,31 +223,22 @@ class QueryClassifier:
               "keyword": str | None
             }
     """
-    query_norm = self.normalize_text(query)
-
-    # Normalize all names for comparison
-    norm_main = {self.normalize_text(c): c for c in self.main_cats}
-    norm_sub = {self.normalize_text(c): c for c in self.sub_cats}
-    norm_items = {self.normalize_text(i): i for i in self.items}
-
-    # Exact beverage (title) match
-    for norm_name, original in norm_items.items():
-      if norm_name in query_norm:
-        return {"type": "item", "keyword": original}
-
-    # Sub-category match
-    for norm_name, original in norm_sub.items():
-      if re.search(rf"\b{re.escape(norm_name)}\b", query_norm):
-        return {"type": "sub_category", "keyword": original}
-
-    # Main category match
-    for norm_name, original in norm_main.items():
-      if re.search(rf"\b{re.escape(norm_name)}\b", query_norm):
-        return {"type": "main_category", "keyword": original}
-
-    return {"type": "unknown", "keyword": None}
-
-# # TODO: Implement rotate key mechanism and check status code to have key to use when exhausted
-# class APIKeyManager:
-#   def __init__(self):
-#     pass
\ No newline at end of file
+    query_norm = normalize_text(query)
+
+    best_rank, best_keyword = None, None
+    for start, end, (priority, keyword, bounded) in self.matcher.iter_matches(query_norm):
+      if bounded and not (
+        self.is_word_boundary(query_norm, start)
+        and self.is_word_boundary(query_norm, end)
+      ):
+        continue
+
+      rank = (priority, start - end, start)
+      if best_rank is None or rank < best_rank:
+        best_rank, best_keyword = rank, keyword
+
+    if best_rank is None:
+      return {"type": "unknown", "keyword": None}
+
+    match_type = ("item", "sub_category", "main_category")[best_rank[0]]
+    return {"type": match_type, "keyword": best_keyword}
@@ -1,45 +1,534 @@
 import os
-from langchain_ollama import ChatOllama
-from langchain_google_genai import ChatGoogleGenerativeAI
+import re
+import json
+import time
+import asyncio
+import threading
+import httpx
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
 
+from pydantic import ConfigDict, Field
+from langchain_core.messages import (
+  AIMessageChunk,
+  BaseMessage,
+  BaseMessageChunk
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from .telemetry import record_llm_call, span
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "0"))
+LLM_STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "100"))
+LLM_COOLDOWN_SECONDS = float(os.getenv("LLM_COOLDOWN_SECONDS", "30"))
+LLM_QUOTA_COOLDOWN_SECONDS = float(os.getenv("LLM_QUOTA_COOLDOWN_SECONDS", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "120"))
+GEMINI_PROMPT_CACHE = os.getenv("GEMINI_PROMPT_CACHE", "true").lower() == "true"
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Backends run detached from the router's callbacks: the router reports the
+# run itself, so astream_events would otherwise see every token twice
+BACKEND_CONFIG = {"callbacks": []}
+
+QUOTA_PATTERN = re.compile(r"(quota|resource.?exhausted|exceeded your current)", re.IGNORECASE)
+STATUS_PATTERN = re.compile(r"\b(429|5\d\d)\b")
+
+# ================================ ERROR HANDLING ==============================
+class LLMUnavailableError(RuntimeError):
+  """Every backend failed (or is cooling down) for a request"""
+
+def classify_error(error: BaseException) -> str:
+  """
+  Classify a provider error.
+
+  Returns:
+    str: "quota" (429 with exhausted quota: rotate the API key),
+         "rate_limit" (other 429), "server" (5xx, timeout, connection error)
+         or "client" (anything else: retrying elsewhere will not help).
+  """
+  if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, LLMUnavailableError)):
+    return "server"
+
+  status = None
+  for candidate in (
+    getattr(error, "status_code", None),
+    getattr(error, "code", None),
+    getattr(getattr(error, "response", None), "status_code", None)
+  ):
+    if isinstance(candidate, int) and candidate > 0:
+      status = candidate
+      break
+
+  message = str(error)
+  if status is None:
+    match = STATUS_PATTERN.search(message)
+    if match:
+      status = int(match.group(1))
+
+  if status == 429 or QUOTA_PATTERN.search(message):
+    return "quota" if QUOTA_PATTERN.search(message) else "rate_limit"
+  if status is not None and status >= 500:
+    return "server"
+  if type(error).__name__ in ("ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError"):
+    return "server"
+  return "client"
+
+# ------------------------------------------------------------------------------
+def as_chunk(message: BaseMessage) -> BaseMessageChunk:
+  """Models without native streaming yield whole messages from astream"""
+  if isinstance(message, BaseMessageChunk):
+    return message
+  return AIMessageChunk(
+    content=message.content,
+    id=message.id,
+    additional_kwargs=message.additional_kwargs,
+    response_metadata=message.response_metadata,
+    usage_metadata=getattr(message, "usage_metadata", None),
+    tool_call_chunks=[
+      {
+        "name": call["name"],
+        "args": json.dumps(call["args"], ensure_ascii=False),
+        "id": call["id"],
+        "index": index
+      }
+      for index, call in enumerate(getattr(message, "tool_calls", None) or [])
+    ]
+  )
+
+# ================================ BACKEND STATS ===============================
+class LatencyStats:
+  """Rolling latency percentiles and error rate of one backend"""
+  def __init__(self, window: int = 100):
+    self.latencies = deque(maxlen=window)
+    self.outcomes = deque(maxlen=window)
+    self.cooldown_until = 0.0
+    self._lock = threading.Lock()
+
+  # ----------------------------------------------------------------------------
+  def record(self, latency_ms: Optional[float], ok: bool) -> None:
+    with self._lock:
+      if ok and latency_ms is not None:
+        self.latencies.append(latency_ms)
+      self.outcomes.append(ok)
+
+  # ----------------------------------------------------------------------------
+  def percentile(self, q: float) -> Optional[float]:
+    with self._lock:
+      if not self.latencies:
+        return None
+      ordered = sorted(self.latencies)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+  # ----------------------------------------------------------------------------
+  @property
+  def error_rate(self) -> float:
+    with self._lock:
+      if not self.outcomes:
+        return 0.0
+      return 1 - sum(self.outcomes) / len(self.outcomes)
+
+  # ----------------------------------------------------------------------------
+  def cool_down(self, seconds: float) -> None:
+    self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+  @property
+  def cooling_down(self) -> bool:
+    return time.monotonic() < self.cooldown_until
+
+# ================================== BACKENDS ==================================
+class LLMBackend:
+  """
+  One provider/model with its API keys.
+
+  `factory(api_key)` builds the chat model for a key; models are built once
+  per key. When a key hits its quota it is parked for
+  LLM_QUOTA_COOLDOWN_SECONDS and the next key is used.
+  """
+  def __init__(
+    self,
+    name: str,
+    factory: Callable[[Optional[str]], BaseChatModel],
+    api_keys: Optional[Sequence[Optional[str]]] = None,
+    window: int = LLM_STATS_WINDOW
+  ):
+    self.name = name
+    self.factory = factory
+    self.api_keys = list(api_keys) if api_keys else [None]
+    self.key_index = 0
+    self.key_exhausted_until = [0.0] * len(self.api_keys)
+    self.stats = LatencyStats(window)
+    self._models: Dict[int, BaseChatModel] = {}
+    self._bound: Dict[tuple, Any] = {}
+    self._lock = threading.Lock()
+
+  # ----------------------------------------------------------------------------
+  def model(self, tools: Optional[list] = None, tool_kwargs: Optional[dict] = None):
+    """Chat model (with tools bound, if any) for the current API key"""
+    with self._lock:
+      index = self.key_index
+      if index not in self._models:
+        self._models[index] = self.factory(self.api_keys[index])
+      model = self._models[index]
+      if not tools:
+        return model
+
+      cache_key = (
+        index,
+        tuple(getattr(t, "name", None) or repr(t) for t in tools),
+        repr(sorted((tool_kwargs or {}).items()))
+      )
+      if cache_key not in self._bound:
+        self._bound[cache_key] = model.bind_tools(tools, **(tool_kwargs or {}))
+      return self._bound[cache_key]
+
+  # ----------------------------------------------------------------------------
+  def rotate_key(self) -> bool:
+    """Park the current key and switch to the next usable one"""
+    with self._lock:
+      now = time.monotonic()
+      self.key_exhausted_until[self.key_index] = now + LLM_QUOTA_COOLDOWN_SECONDS
+      for step in range(1, len(self.api_keys)):
+        index = (self.key_index + step) % len(self.api_keys)
+        if self.key_exhausted_until[index] <= now:
+          self.key_index = index
+          print(f"LLM backend {self.name}: switched to API key #{index}")
+          return True
+      return False
+
+  # ----------------------------------------------------------------------------
+  def summary(self) -> dict:
+    return {
+      "name": self.name,
+      "keys": len(self.api_keys),
+      "active_key": self.key_index,
+      "p50_ms": self.stats.percentile(0.5),
+      "p95_ms": self.stats.percentile(0.95),
+      "error_rate": round(self.stats.error_rate, 3),
+      "cooling_down": self.stats.cooling_down
+    }
+
+# ================================== ROUTER ====================================
+class LLMRouter(BaseChatModel):
+  """
+  Chat model that spreads requests over several backends.
+
+  - Backends are tried healthiest first: not cooling down, error rate under
+    50%, then lowest rolling p95 latency; backends without samples follow
+    in their configured order.
+  - 429 / 5xx / timeouts fail over to the next backend; quota errors rotate
+    the backend's API key first.
+  - With `hedge_delay` set, a request still running after that delay is
+    also sent to the next backend and the first answer wins.
+  - Streaming fails over only until the first token is sent.
+  """
+  model_config = ConfigDict(arbitrary_types_allowed=True)
+
+  backends: List[Any]
+  timeout: float = LLM_TIMEOUT
+  hedge_delay: Optional[float] = None
+  cooldown_seconds: float = LLM_COOLDOWN_SECONDS
+  bound_tools: Optional[List[Any]] = None
+  tool_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+  @property
+  def _llm_type(self) -> str:
+    return "llm_router"
+
+  # ----------------------------------------------------------------------------
+  def bind_tools(self, tools, **kwargs) -> "LLMRouter":
+    """Bind tools on every backend; stats and keys stay shared"""
+    return self.model_copy(update={"bound_tools": list(tools), "tool_kwargs": kwargs})
+
+  # ----------------------------------------------------------------------------
+  def ranked_backends(self) -> List[LLMBackend]:
+    def rank(item):
+      index, backend = item
+      p95 = backend.stats.percentile(0.95)
+      return (
+        backend.stats.cooling_down,
+        backend.stats.error_rate >= 0.5,
+        p95 if p95 is not None else float("inf"),
+        index
+      )
+    return [backend for _, backend in sorted(enumerate(self.backends), key=rank)]
+
+  # ----------------------------------------------------------------------------
+  def handle_failure(self, backend: LLMBackend, error: BaseException) -> str:
+    """Update backend state after an error and return its kind"""
+    kind = classify_error(error)
+    backend.stats.record(None, ok=False)
+    if kind in ("rate_limit", "server"):
+      backend.stats.cool_down(self.cooldown_seconds)
+    elif kind == "quota" and not backend.rotate_key():
+      backend.stats.cool_down(LLM_QUOTA_COOLDOWN_SECONDS)
+    print(f"LLM backend {backend.name} failed ({kind}): {error or type(error).__name__}")
+    return kind
+
+  # ----------------------------------------------------------------------------
+  async def call_backend(self, backend: LLMBackend, messages, stop, **kwargs) -> BaseMessage:
+    """Call one backend, rotating keys on quota errors"""
+    for _ in range(len(backend.api_keys)):
+      model = backend.model(self.bound_tools, self.tool_kwargs)
+      start = time.perf_counter()
+      with span(f"llm.{backend.name}"):
+        try:
+          output = await asyncio.wait_for(model.ainvoke(messages, BACKEND_CONFIG, stop=stop, **kwargs), self.timeout)
+        except asyncio.CancelledError:
+          record_llm_call(backend.name, time.perf_counter() - start, "cancelled")
+          raise
+        except Exception as e:
+          kind = self.handle_failure(backend, e)
+          record_llm_call(backend.name, time.perf_counter() - start, kind)
+          if kind == "quota" and not backend.stats.cooling_down:
+            continue
+          raise
+        backend.stats.record((time.perf_counter() - start) * 1000, ok=True)
+        record_llm_call(backend.name, time.perf_counter() - start, "ok", output.usage_metadata)
+      output.response_metadata["llm_backend"] = backend.name
+      return output
+    raise LLMUnavailableError(f"All API keys of {backend.name} are exhausted")
+
+  # ----------------------------------------------------------------------------
+  async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    candidates = self.ranked_backends()
+    errors = []
+    pending = {}
+
+    def launch():
+      backend = candidates.pop(0)
+      task = asyncio.ensure_future(self.call_backend(backend, messages, stop, **kwargs))
+      pending[task] = backend
+
+    launch()
+    try:
+      while pending or candidates:
+        if not pending:
+          launch()
+        can_hedge = bool(self.hedge_delay) and bool(candidates) and len(pending) < 2
+        done, _ = await asyncio.wait(
+          set(pending),
+          timeout=self.hedge_delay if can_hedge else None,
+          return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+          print(f"Hedging slow request to {candidates[0].name}")
+          launch()
+          continue
+
+        for task in done:
+          backend = pending.pop(task)
+          if task.exception() is None:
+            return ChatResult(generations=[ChatGeneration(message=task.result())])
+          errors.append(f"{backend.name}: {task.exception()}")
+          if classify_error(task.exception()) == "client":
+            raise task.exception()
+    finally:
+      for task in pending:
+        task.cancel()
+
+    raise LLMUnavailableError(f"No LLM backend could answer: {errors}")
+
+  # ----------------------------------------------------------------------------
+  def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    """Sync path: sequential failover, no hedging"""
+    errors = []
+    for backend in self.ranked_backends():
+      for _ in range(len(backend.api_keys)):
+        model = backend.model(self.bound_tools, self.tool_kwargs)
+        start = time.perf_counter()
+        try:
+          with span(f"llm.{backend.name}"):
+            output = model.invoke(messages, BACKEND_CONFIG, stop=stop, **kwargs)
+        except Exception as e:
+          kind = self.handle_failure(backend, e)
+          record_llm_call(backend.name, time.perf_counter() - start, kind)
+          if kind == "client":
+            raise
+          errors.append(f"{backend.name}: {e}")
+          if kind == "quota" and not backend.stats.cooling_down:
+            continue
+          break
+        backend.stats.record((time.perf_counter() - start) * 1000, ok=True)
+        record_llm_call(backend.name, time.perf_counter() - start, "ok", output.usage_metadata)
+        output.response_metadata["llm_backend"] = backend.name
+        return ChatResult(generations=[ChatGeneration(message=output)])
+
+    raise LLMUnavailableError(f"No LLM backend could answer: {errors}")
+
+  # ----------------------------------------------------------------------------
+  async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+    errors = []
+    for backend in self.ranked_backends():
+      model = backend.model(self.bound_tools, self.tool_kwargs)
+      start = time.perf_counter()
+      started = False
+      usage = {"input_tokens": 0, "output_tokens": 0}
+      try:
+        stream = model.astream(messages, BACKEND_CONFIG, stop=stop, **kwargs).__aiter__()
+        while True:
+          try:
+            # The timeout bounds the wait for each chunk, not the whole answer
+            chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+          except StopAsyncIteration:
+            break
+          started = True
+          for key in usage:
+            usage[key] += (getattr(chunk, "usage_metadata", None) or {}).get(key, 0)
+          yield ChatGenerationChunk(message=as_chunk(chunk))
+      except asyncio.CancelledError:
+        record_llm_call(backend.name, time.perf_counter() - start, "cancelled", usage)
+        raise
+      except Exception as e:
+        kind = self.handle_failure(backend, e)
+        record_llm_call(backend.name, time.perf_counter() - start, kind, usage)
+        if started or kind == "client":
+          raise
+        errors.append(f"{backend.name}: {e}")
+        continue
+      backend.stats.record((time.perf_counter() - start) * 1000, ok=True)
+      record_llm_call(backend.name, time.perf_counter() - start, "ok", usage)
+      return
+
+    raise LLMUnavailableError(f"No LLM backend could answer: {errors}")
+
+  # ----------------------------------------------------------------------------
+  def stats(self) -> List[dict]:
+    return [backend.summary() for backend in self.backends]
+
+# ================================ ORCHESTRATOR ================================
 class LLMOrchestrator:
   def __init__(self):
     self.env = os.getenv("ENV", "dev")
-    
-  # ----------------------------------------------------------------------------  
-  
-  def _init_ollama_model(self):
+
+  # ----------------------------------------------------------------------------
+
+  def _init_ollama_model(self, api_key: Optional[str] = None):
+    # Provider SDKs are imported on first use, they dominate import time
+    from langchain_ollama import ChatOllama
+
     try:
       model = ChatOllama(
-        model="qwen2.5:3b",
-        base_url="http://localhost:11434",
-        temperature=0.5
+        model=os.getenv("OLLAMA_MODEL", "qwen2.5:3b"),
+        base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+        temperature=0.5,
+        # Keep the model and its prompt-prefix KV cache loaded between requests
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        # Pooled keep-alive connections shared by every request of the process
+        client_kwargs={
+          "limits": httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+          ),
+          "timeout": LLM_TIMEOUT
+        }
       )
       return model
     except Exception as e:
       raise RuntimeError(f"Cannot connect Ollama model: {e}")
 
   # ----------------------------------------------------------------------------
-  def _init_gemini_model(self):
-    API_KEY = os.getenv("GOOGLE_API_KEY")
-    if not API_KEY:
+  def _init_gemini_model(self, api_key: Optional[str] = None):
+    if not api_key:
       raise RuntimeError(f"GOOGLE_API_KEY is not set")
-    
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from .gemini_cache import CachedPrefixGemini
+
     try:
-      model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=API_KEY
+      model_class = CachedPrefixGemini if GEMINI_PROMPT_CACHE else ChatGoogleGenerativeAI
+      model = model_class(
+        model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+        google_api_key=api_key,
+        # Failover is handled by the router, do not retry inside the client
+        max_retries=1
       )
       return model
     except Exception as e:
       raise RuntimeError(f"Cannot connect Gemini model: {e}")
-    
+
   # ----------------------------------------------------------------------------
-  def get_llm(self):
+  def _google_api_keys(self) -> List[str]:
+    keys = [k.strip() for k in os.getenv("GOOGLE_API_KEYS", "").split(",") if k.strip()]
+    if not keys and os.getenv("GOOGLE_API_KEY"):
+      keys = [os.getenv("GOOGLE_API_KEY")]
+    return keys
+
+  # ----------------------------------------------------------------------------
+  def _backend_names(self) -> List[str]:
+    configured = os.getenv("LLM_BACKENDS")
+    if configured:
+      return [name.strip().lower() for name in configured.split(",") if name.strip()]
+
     if self.env == "dev":
-      return self._init_ollama_model()
-    
+      return ["ollama"]
+
     if self.env == "prod":
-      return self._init_gemini_model()
-    
-    raise ValueError("Invalid Environment Type")
\ No newline at end of file
+      return ["gemini"]
+
+    raise ValueError("Invalid Environment Type")
+
+  # ----------------------------------------------------------------------------
+  def get_llm(self):
+    """
+    Build the LLM router over the backends listed in LLM_BACKENDS (in
+    priority order, e.g. "gemini,ollama"); defaults to Ollama in dev and
+    Gemini in prod.
+    """
+    backends = []
+    for name in self._backend_names():
+      if name == "ollama":
+        backends.append(LLMBackend("ollama", self._init_ollama_model))
+      elif name == "gemini":
+        keys = self._google_api_keys()
+        if not keys:
+          raise RuntimeError(f"GOOGLE_API_KEY is not set")
+        backends.append(LLMBackend("gemini", self._init_gemini_model, keys))
+      else:
+        raise ValueError(f"Invalid LLM backend: {name}")
+
+    return LLMRouter(
+      backends=backends,
+      timeout=LLM_TIMEOUT,
+      hedge_delay=LLM_HEDGE_DELAY or None
+    )
+
+# =========================== SHARED CLIENT REGISTRY ===========================
+# One router (and therefore one HTTP/gRPC client per backend and key) for the
+# whole process, with tools bound once per tool set
+_shared_llm: Optional[BaseChatModel] = None
+_bound_llms: Dict[tuple, Any] = {}
+_registry_lock = threading.Lock()
+
+def get_shared_llm() -> BaseChatModel:
+  """Return the process-wide LLM, building it on first use"""
+  global _shared_llm
+  with _registry_lock:
+    if _shared_llm is None:
+      _shared_llm = LLMOrchestrator().get_llm()
+    return _shared_llm
+
+# ------------------------------------------------------------------------------
+def get_llm_with_tools(tools: Sequence[Any]):
+  """
+  Return the shared LLM with `tools` bound. The tool schemas are converted
+  once per tool set and every agent built with the same tools reuses them.
+  """
+  llm = get_shared_llm()
+  key = (id(llm), tuple(getattr(t, "name", None) or repr(t) for t in tools))
+  with _registry_lock:
+    if key not in _bound_llms:
+      _bound_llms[key] = llm.bind_tools(list(tools))
+    return _bound_llms[key]
+
+# ------------------------------------------------------------------------------
+def set_shared_llm(llm: Optional[BaseChatModel]) -> None:
+  """Replace the shared LLM (e.g. a fake chat model in tests and benchmarks)"""
+  global _shared_llm
+  with _registry_lock:
+    _shared_llm = llm
+    _bound_llms.clear()
@@ -0,0 +1,301 @@
+# utils/telemetry.py
+import os
+import time
+import inspect
+import functools
+from collections import defaultdict
+from contextvars import ContextVar
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+try:
+  from opentelemetry import trace
+except ImportError:
+  trace = None
+
+try:
+  import prometheus_client
+  from prometheus_client import Counter, Histogram
+except ImportError:
+  prometheus_client = None
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() == "true"
+TELEMETRY_TURN_LOG = os.getenv("TELEMETRY_TURN_LOG", "true").lower() == "true"
+# Standard OpenTelemetry variables: "console" or "otlp" installs an SDK provider
+OTEL_TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "none").lower()
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "mt-coffee-api")
+
+LATENCY_BUCKETS = (
+  0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+# ================================== METRICS ===================================
+class _NoopMetric:
+  """Stand-in when prometheus_client is missing or telemetry is disabled"""
+  def labels(self, *args, **kwargs):
+    return self
+
+  def observe(self, value: float) -> None:
+    pass
+
+  def inc(self, value: float = 1) -> None:
+    pass
+
+def _metric(kind: str, name: str, documentation: str, labels: tuple):
+  if prometheus_client is None or not TELEMETRY_ENABLED:
+    return _NoopMetric()
+  if kind == "histogram":
+    return Histogram(name, documentation, labels, buckets=LATENCY_BUCKETS)
+  return Counter(name, documentation, labels)
+
+REQUEST_LATENCY = _metric(
+  "histogram", "mt_http_request_duration_seconds",
+  "HTTP request latency until the response headers", ("method", "route", "status")
+)
+TURN_LATENCY = _metric(
+  "histogram", "mt_chat_turn_duration_seconds",
+  "Chat turn latency including streamed bodies", ("route",)
+)
+LLM_LATENCY = _metric(
+  "histogram", "mt_llm_request_duration_seconds",
+  "LLM call latency per backend", ("backend", "outcome")
+)
+LLM_TOKENS = _metric(
+  "counter", "mt_llm_tokens_total",
+  "LLM tokens per backend", ("backend", "kind")
+)
+TOOL_LATENCY = _metric(
+  "histogram", "mt_tool_duration_seconds",
+  "Tool call latency", ("tool", "status")
+)
+DB_QUERY_LATENCY = _metric(
+  "histogram", "mt_db_query_duration_seconds",
+  "Database helper latency (connection held)", ("query",)
+)
+QUEUE_WAIT = _metric(
+  "histogram", "mt_queue_wait_seconds",
+  "Time waiting for a pooled resource", ("queue",)
+)
+STAGE_LATENCY = _metric(
+  "histogram", "mt_stage_duration_seconds",
+  "Latency of graph nodes, the query classifier and menu search", ("stage",)
+)
+
+# ------------------------------------------------------------------------------
+def metrics_payload() -> tuple[bytes, str]:
+  """
+  Prometheus exposition of this process, or of every uvicorn worker when
+  PROMETHEUS_MULTIPROC_DIR is set (see backend/run_api.py).
+
+  Returns:
+    (body, content_type)
+  """
+  if prometheus_client is None:
+    return b"# prometheus_client is not installed\n", "text/plain; charset=utf-8"
+
+  from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+  registry = REGISTRY
+  if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+  return generate_latest(registry), CONTENT_TYPE_LATEST
+
+# =================================== TRACING ==================================
+tracer = trace.get_tracer("mt_coffee") if trace is not None else None
+
+def configure_tracing() -> None:
+  """
+  Install an OpenTelemetry SDK tracer provider when OTEL_TRACES_EXPORTER is
+  "console" or "otlp" (OTLP endpoint from the usual OTEL_EXPORTER_OTLP_*
+  variables). Without it spans are no-ops, unless the process already has a
+  provider, e.g. when started through `opentelemetry-instrument`.
+  """
+  if trace is None or not TELEMETRY_ENABLED or OTEL_TRACES_EXPORTER in ("", "none"):
+    return
+  if not isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+    return
+
+  try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    if OTEL_TRACES_EXPORTER == "console":
+      exporter = ConsoleSpanExporter()
+    elif OTEL_TRACES_EXPORTER == "otlp":
+      from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+      exporter = OTLPSpanExporter()
+    else:
+      raise ValueError(f"Invalid trace exporter: {OTEL_TRACES_EXPORTER}")
+  except Exception as e:
+    print(f"Cannot configure tracing, reason: {e}")
+    return
+
+  provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+  provider.add_span_processor(BatchSpanProcessor(exporter))
+  trace.set_tracer_provider(provider)
+
+# ------------------------------------------------------------------------------
+class TurnTimings:
+  """Time spent per stage (llm, tools, db, queue, ...) during one chat turn"""
+  def __init__(self, route: str):
+    self.route = route
+    self.start = time.perf_counter()
+    self.seconds: Dict[str, float] = defaultdict(float)
+    self.counts: Dict[str, int] = defaultdict(int)
+    self.tokens = {"input": 0, "output": 0}
+
+  def add(self, stage: str, seconds: float) -> None:
+    self.seconds[stage] += seconds
+    self.counts[stage] += 1
+
+  def summary(self) -> str:
+    parts = [f"Turn {self.route} {time.perf_counter() - self.start:.3f}s"]
+    for stage, seconds in self.seconds.items():
+      parts.append(f"{stage} {seconds:.3f}s x{self.counts[stage]}")
+    if self.counts.get("llm"):
+      parts.append(f"tokens {self.tokens['input']}/{self.tokens['output']}")
+    return " | ".join(parts)
+
+_current_turn: ContextVar[Optional[TurnTimings]] = ContextVar("current_turn", default=None)
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def span(
+  name: str,
+  stage: Optional[str] = None,
+  histogram=None,
+  labels: Optional[Dict[str, str]] = None,
+  **attributes
+):
+  """
+  Trace a block as an OpenTelemetry span.
+
+  Args:
+    name(str): Span name, e.g. "tool.place_order".
+    stage(str): Add the duration to this stage of the current turn.
+    histogram: Prometheus histogram observed with the duration.
+    labels(dict): Labels of the histogram.
+    **attributes: Span attributes (None values are dropped).
+
+  Yields:
+    The span, None when tracing is unavailable.
+  """
+  if not TELEMETRY_ENABLED:
+    yield None
+    return
+
+  start = time.perf_counter()
+  attributes = {key: value for key, value in attributes.items() if value is not None}
+  context = tracer.start_as_current_span(name, attributes=attributes) if tracer else nullcontext()
+  try:
+    with context as current:
+      yield current
+  finally:
+    elapsed = time.perf_counter() - start
+    if histogram is not None:
+      histogram.labels(**(labels or {})).observe(elapsed)
+    turn = _current_turn.get()
+    if stage and turn is not None:
+      turn.add(stage, elapsed)
+
+# ------------------------------------------------------------------------------
+@contextmanager
+def chat_turn(route: str, session_id: str):
+  """
+  Root span of one chat turn. LLM, tool, DB and queue timings recorded by
+  the code it runs (including tasks it spawns) are summed per stage, set as
+  span attributes and printed as one line.
+  """
+  if not TELEMETRY_ENABLED:
+    yield None
+    return
+
+  turn = TurnTimings(route)
+  token = _current_turn.set(turn)
+  try:
+    with span(f"chat.{route}", session_id=session_id) as current:
+      try:
+        yield turn
+      finally:
+        if current is not None and current.is_recording():
+          for stage, seconds in turn.seconds.items():
+            current.set_attribute(f"turn.{stage}.seconds", seconds)
+            current.set_attribute(f"turn.{stage}.count", turn.counts[stage])
+          current.set_attribute("gen_ai.usage.input_tokens", turn.tokens["input"])
+          current.set_attribute("gen_ai.usage.output_tokens", turn.tokens["output"])
+  finally:
+    try:
+      _current_turn.reset(token)
+    except ValueError:
+      # A streamed turn's generator closed from another context
+      pass
+    TURN_LATENCY.labels(route=route).observe(time.perf_counter() - turn.start)
+    if TELEMETRY_TURN_LOG:
+      print(turn.summary())
+
+# ================================= RECORDERS ==================================
+def record_llm_call(
+  backend: str,
+  seconds: float,
+  outcome: str,
+  usage: Optional[Dict] = None
+) -> None:
+  """
+  Latency, token usage and turn timing of one LLM backend call.
+
+  Args:
+    backend(str): Backend name.
+    seconds(float): Call duration.
+    outcome(str): "ok" or the error kind from `classify_error`.
+    usage(dict): The message's usage_metadata (input_tokens, output_tokens).
+  """
+  LLM_LATENCY.labels(backend=backend, outcome=outcome).observe(seconds)
+  turn = _current_turn.get()
+  if turn is not None:
+    turn.add("llm", seconds)
+
+  usage = usage or {}
+  input_tokens = usage.get("input_tokens", 0)
+  output_tokens = usage.get("output_tokens", 0)
+  if input_tokens or output_tokens:
+    LLM_TOKENS.labels(backend=backend, kind="input").inc(input_tokens)
+    LLM_TOKENS.labels(backend=backend, kind="output").inc(output_tokens)
+    if turn is not None:
+      turn.tokens["input"] += input_tokens
+      turn.tokens["output"] += output_tokens
+
+  if tracer is not None and TELEMETRY_ENABLED:
+    current = trace.get_current_span()
+    if current.is_recording():
+      current.set_attribute("llm.backend", backend)
+      current.set_attribute("llm.outcome", outcome)
+      current.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+      current.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+
+# ------------------------------------------------------------------------------
+def record_queue_wait(queue: str, seconds: float) -> None:
+  """Time spent waiting for a pooled resource (DB connection, tool thread)"""
+  QUEUE_WAIT.labels(queue=queue).observe(seconds)
+  turn = _current_turn.get()
+  if turn is not None:
+    turn.add("queue", seconds)
+
+# ------------------------------------------------------------------------------
+def db_timed(func):
+  """Trace a database helper as a `db.<name>` span and time it per query"""
+  name = func.__name__
+  labels = {"query": name}
+
+  if inspect.iscoroutinefunction(func):
+    @functools.wraps(func)
+    async def async_wrapper(*args, **kwargs):
+      with span(f"db.{name}", stage="db", histogram=DB_QUERY_LATENCY, labels=labels):
+        return await func(*args, **kwargs)
+    return async_wrapper
+
+  @functools.wraps(func)
+  def wrapper(*args, **kwargs):
+    with span(f"db.{name}", stage="db", histogram=DB_QUERY_LATENCY, labels=labels):
+      return func(*args, **kwargs)
+  return wrapper
@@ -0,0 +1,29 @@
+# tests/conftest.py
+import csv
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.database.connection import MenuItems
+from src.database.menu_catalog import _clean_sub_category
+
+MENU_CSV = Path(__file__).resolve().parent.parent / "data" / "coffee_house_data.csv"
+
+@pytest.fixture(scope="session")
+def menu_items() -> List[MenuItems]:
+  """The shipped menu CSV as catalog items, no database needed"""
+  with open(MENU_CSV, encoding="utf-8", newline="") as f:
+    rows = list(csv.DictReader(f))
+  return [
+    MenuItems(
+      id=index + 1,
+      title=row["title"],
+      price=float(row["price"]),
+      image_url=row["image_url"],
+      description=row["description"],
+      main_category=row["main_category"],
+      sub_category=_clean_sub_category(row["sub_category"])
+    )
+    for index, row in enumerate(rows)
+  ]
@@ -0,0 +1,31 @@
+# tests/test_context.py
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.context import compact_history
+
+STALE_DRAFT = "Đơn của bạn: Bạc Xỉu x2 - 58,000 VND. " + "Ghi chú " * 100
+CURRENT_DRAFT = "Đơn mới: Trà Đào Cam Sả x1 - 45,000 VND"
+
+def conversation():
+  messages = [HumanMessage(content="cho minh 2 bac xiu"), AIMessage(content=STALE_DRAFT)]
+  for index in range(6):
+    messages += [HumanMessage(content=f"cau hoi {index} " + "a " * 300), AIMessage(content="b " * 300)]
+  messages += [HumanMessage(content="doi sang tra dao"), AIMessage(content=CURRENT_DRAFT)]
+  for index in range(3):
+    messages += [HumanMessage(content=f"hoi them {index} " + "c " * 400), AIMessage(content="d " * 400)]
+  return messages
+
+# ------------------------------------------------------------------------------
+def test_stale_draft_is_not_pinned():
+  compacted, _ = compact_history(conversation(), max_turns=6, token_budget=100_000, summary_chars=80)
+  texts = [m.content for m in compacted]
+
+  assert STALE_DRAFT not in texts
+  assert CURRENT_DRAFT in texts
+
+def test_budget_keeps_the_current_draft():
+  compacted, _ = compact_history(conversation(), max_turns=6, token_budget=600)
+  texts = [m.content for m in compacted]
+
+  assert CURRENT_DRAFT in texts
+  assert texts[-1] == "d " * 400
@@ -0,0 +1,40 @@
+# tests/test_llm_router.py
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+from src.utils.llm_manager import LLMBackend, LLMRouter
+
+def fake_router(reply: str) -> LLMRouter:
+  backend = LLMBackend("fake", lambda api_key: GenericFakeChatModel(messages=iter([AIMessage(content=reply)])))
+  return LLMRouter(backends=[backend])
+
+async def node_events(router: LLMRouter, kind: str):
+  """astream_events of a graph-like node awaiting the router, as the agent does"""
+  async def call_model(text):
+    return await router.ainvoke(text)
+
+  return [
+    event async for event in RunnableLambda(call_model).astream_events("xin chao", version="v2")
+    if event["event"] == kind
+  ]
+
+# ------------------------------------------------------------------------------
+def test_each_token_is_streamed_once():
+  events = asyncio.run(node_events(fake_router("xin chao ban"), "on_chat_model_stream"))
+
+  assert {event["name"] for event in events} == {"LLMRouter"}
+  assert "".join(event["data"]["chunk"].content for event in events) == "xin chao ban"
+
+def test_backend_runs_are_not_reported():
+  events = asyncio.run(node_events(fake_router("xin chao"), "on_chat_model_start"))
+
+  assert [event["name"] for event in events] == ["LLMRouter"]
+
+def test_invoke_returns_backend_reply():
+  reply = asyncio.run(fake_router("xin chao").ainvoke("xin chao"))
+
+  assert reply.content == "xin chao"
+  assert reply.response_metadata["llm_backend"] == "fake"
@@ -0,0 +1,62 @@
+# tests/test_menu_embeddings.py
+import pytest
+
+from src.database.menu_catalog import MenuCatalog
+from src.database.menu_embeddings import MenuEmbeddingIndex, embedding_features
+from src.database.menu_search import tokenize
+from src.utils.helpers import fold_text
+
+@pytest.fixture(scope="module")
+def index(menu_items) -> MenuEmbeddingIndex:
+  return MenuEmbeddingIndex.build(menu_items, "test")
+
+def recommend(index: MenuEmbeddingIndex, query: str, sub_category: str = None):
+  rows = None
+  if sub_category is not None:
+    rows = index.category_rows[("sub_category", sub_category)]
+    query = fold_text(query).replace(fold_text(sub_category), " ")
+  return [item for item, _ in index.top_k([query], 5, rows)[0]]
+
+# ------------------------------------------------------------------------------
+def test_negation_avoids_the_next_word():
+  words, _, negated = embedding_features("something not too sweet with coconut")
+  assert words == ["dua"]
+  assert negated == ["ngot"]
+
+@pytest.mark.parametrize("query, sub_category, avoided", [
+  ("trà trái cây ít ngọt", "Trà trái cây", "ngot"),
+  ("something less sweet with coconut", None, "ngot"),
+  ("trà sữa không đường", None, "duong"),
+])
+def test_negated_words_are_avoided(index, query, sub_category, avoided):
+  # Items with the avoided word may still come last, never first
+  has_avoided = [avoided in tokenize(item.description) for item in recommend(index, query, sub_category)]
+  assert has_avoided and not has_avoided[0]
+  assert has_avoided == sorted(has_avoided)
+
+def test_less_sweet_with_coconut_has_coconut(index):
+  items = recommend(index, "something less sweet with coconut")
+  assert all("dua" in fold_text(item.title + " " + item.description) for item in items)
+
+@pytest.mark.parametrize("query, word", [
+  ("thức uống nóng ấm áp", "nong"),
+  ("món nào có trân châu", "tran chau"),
+  ("món gì chua chua", "chua"),
+])
+def test_descriptive_requests(index, query, word):
+  items = recommend(index, query)
+  assert items
+  assert word in fold_text(items[0].title + " " + items[0].description)
+
+@pytest.mark.parametrize("query", ["xin chao", "cam on ban", "có wifi không", "quán ở đâu", "xyz"])
+def test_non_menu_queries_match_nothing(index, query):
+  assert recommend(index, query) == []
+
+def test_save_and_load(index, menu_items, tmp_path):
+  path = str(tmp_path / "menu_embeddings")
+  index.save(path)
+  loaded = MenuEmbeddingIndex.load(path, MenuCatalog(menu_items, "test"))
+  assert loaded is not None
+  query = "something less sweet with coconut"
+  assert loaded.top_k([query]) == index.top_k([query])
+  assert MenuEmbeddingIndex.load(path, MenuCatalog(menu_items, "other")) is None
@@ -0,0 +1,32 @@
+# tests/test_menu_sampler.py
+import pytest
+
+from src.database import menu_sampler
+from src.database.menu_catalog import MenuCatalog
+
+@pytest.fixture
+def popularity_reads(menu_items, monkeypatch):
+  """Serve the CSV menu and record getItemPopularity calls (no orders yet)"""
+  reads = []
+  def get_item_popularity(after_id=None):
+    reads.append("full" if after_id is None else "incremental")
+    return {}, after_id or 0
+
+  catalog = MenuCatalog(menu_items, "test")
+  monkeypatch.setattr(menu_sampler, "get_menu_catalog", lambda: catalog)
+  monkeypatch.setattr(menu_sampler, "getItemPopularity", get_item_popularity)
+  monkeypatch.setattr(menu_sampler, "_sampler", None)
+  return reads
+
+# ------------------------------------------------------------------------------
+def test_request_path_reads_no_orders(popularity_reads):
+  sampler = menu_sampler.get_menu_sampler()
+
+  assert popularity_reads == []
+  assert sampler.counted_at is None
+
+def test_empty_order_table_is_counted_once(popularity_reads):
+  for _ in range(3):
+    menu_sampler.refreshMenuPopularity()
+
+  assert popularity_reads == ["full", "incremental", "incremental"]
@@ -0,0 +1,61 @@
+# tests/test_menu_search.py
+import pytest
+
+from src.database.menu_search import MenuSearchIndex
+
+@pytest.fixture(scope="module")
+def index(menu_items) -> MenuSearchIndex:
+  return MenuSearchIndex(menu_items, "test")
+
+def titles(index: MenuSearchIndex, query: str):
+  return [item.title for item, _ in index.search(query)]
+
+# ------------------------------------------------------------------------------
+@pytest.mark.parametrize("query, expected", [
+  ("bac siu", "Bạc Xỉu"),
+  ("cho minh 1 ly bac siu", "Bạc Xỉu"),
+  ("capuchino", "Cappuccino Đá"),
+  ("capuchino nong", "Cappuccino Nóng"),
+  ("croisant", "Butter Croissant"),
+  ("spagetti", "Spaghetti Bò Bằm"),
+  ("frape caramen", "Frappe Caramel"),
+  ("cheese cake matcha", "Matcha Burnt Cheesecake"),
+  ("bạc xĩu nóng", "Bạc Xỉu Nóng"),
+  ("tra dao cam sa", "Trà Đào Cam Sả - Đá"),
+])
+def test_misspelled_names_find_the_item(index, query, expected):
+  assert titles(index, query)[0] == expected
+
+@pytest.mark.parametrize("query", [
+  "xin chao",
+  "chào bạn",
+  "cam on ban",
+  "không cảm ơn",
+  "hello",
+  "quán ở đâu",
+  "có wifi không",
+  "cho mình hỏi quán mở cửa mấy giờ",
+  "mình bị dị ứng sữa",
+])
+def test_non_menu_queries_match_nothing(index, query):
+  assert titles(index, query) == []
+
+@pytest.mark.parametrize("query", [
+  "tôi muốn uống gì đó mát",
+  "trà trái cây ít ngọt",
+  "đồ uống nào ít ngọt",
+  "có đồ uống nào nóng không",
+  "có món nào thơm mùi dừa không",
+  "món gì chua chua",
+])
+def test_descriptive_queries_are_left_to_recommendations(index, query):
+  # A word shared with a title or a description is not a title match
+  assert titles(index, query) == []
+
+def test_single_title_word_lists_its_items(index):
+  assert set(titles(index, "kombucha")) == {"Hi-Tea Đào Kombucha", "Hi-Tea Yuzu Kombucha"}
+
+def test_limit_and_order(index):
+  results = index.search("matcha latte tay bac", limit=2)
+  assert [item.title for item, _ in results] == ["Matcha Latte Tây Bắc", "Matcha Latte Tây Bắc (Nóng)"]
+  assert results[0][1] >= results[1][1]
@@ -0,0 +1,27 @@
+# tests/test_response_cache.py
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.agent.response_cache import ResponseCache
+from src.agent.router import FAST_PATH_METADATA
+
+KEY = "test|sub_category:Trà trái cây|tra trai cay co nhung mon nao"
+
+def cached_after(turn) -> int:
+  cache = ResponseCache()
+  cache.remember_turn(KEY, [HumanMessage(content="tra trai cay co nhung mon nao"), *turn])
+  return cache.stats()["entries"]
+
+# ------------------------------------------------------------------------------
+def test_router_reply_is_cached():
+  assert cached_after([AIMessage(content="Dạ, nhóm Trà trái cây ...", response_metadata=dict(FAST_PATH_METADATA))]) == 1
+
+def test_llm_reply_is_not_cached():
+  assert cached_after([AIMessage(content="Chào anh Nam, nhóm Trà trái cây ...")]) == 0
+
+def test_llm_reply_after_menu_lookup_is_not_cached():
+  turn = [
+    AIMessage(content="", tool_calls=[{"name": "hand_customer_query", "args": {"query": "tra"}, "id": "1"}]),
+    ToolMessage(content="[...]", tool_call_id="1"),
+    AIMessage(content="Chào anh Nam, bên mình có ...")
+  ]
+  assert cached_after(turn) == 0
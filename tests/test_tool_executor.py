@@ -0,0 +1,31 @@
+# tests/test_tool_executor.py
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agent.tool_executor import ParallelToolNode
+
+@tool
+async def slow_write(order_id: int) -> str:
+  """Stand-in for a tool committing to Postgres"""
+  await asyncio.sleep(0.2)
+  return f"saved {order_id}"
+
+def run_node(node: ParallelToolNode):
+  call = {"name": "slow_write", "args": {"order_id": 1}, "id": "1"}
+  state = {"messages": [AIMessage(content="", tool_calls=[call])]}
+  return asyncio.run(node(state, {}))["messages"][0]
+
+# ------------------------------------------------------------------------------
+def test_slow_tool_times_out():
+  message = run_node(ParallelToolNode([slow_write], timeout=0.05))
+
+  assert message.status == "error"
+  assert "did not answer" in message.content
+
+def test_untimed_tool_runs_to_completion():
+  message = run_node(ParallelToolNode([slow_write], timeout=0.05, timeouts={"slow_write": None}))
+
+  assert message.status == "success"
+  assert message.content == "saved 1"